@@ -0,0 +1,196 @@
+import os
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Resampled paths per run
+DEFAULT_PATHS = 10_000
+
+# Paths × trades simulated per 2D array (float64, 8 MB): small enough to stay mostly in the CPU cache
+CHUNK_ELEMENTS = 1 << 20
+
+# Percentiles reported by `summarize_distribution`
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+METHODS = ("shuffle", "bootstrap")
+
+
+def default_block_size(n_trades):
+    """Block length for the block bootstrap: about the cube root of the trade count."""
+    return max(1, int(round(n_trades ** (1 / 3))))
+
+
+def _chunk_paths(n_trades):
+    return max(1, CHUNK_ELEMENTS // max(1, n_trades))
+
+
+def _resample(profits, n_paths, method, block_size, rng):
+    """
+    (n_paths, n_trades) array of resampled trade sequences.
+
+    shuffle:   each row is a random permutation of the trades (same trades, new order)
+    bootstrap: each row is drawn with replacement in blocks of `block_size` consecutive
+               trades (circular), which keeps short streaks of wins / losses together
+    """
+    n = len(profits)
+    if method == "shuffle":
+        paths = np.tile(profits, (n_paths, 1))
+        return rng.permuted(paths, axis=1, out=paths)   # every row shuffled independently, in place
+
+    # every window of `block_size` trades, wrapping around the end: one gather per path
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate((profits, profits[:block_size - 1])), block_size)
+    starts = rng.integers(0, n, size=(n_paths, -(-n // block_size)))
+    return windows[starts].reshape(n_paths, -1)[:, :n]
+
+
+def _path_metrics(paths, initial_capital):
+    """
+    Final capital, max drawdown % and Sharpe of every row of trade profits.
+
+    Same definitions as the trade-level `calculate_performance`: capital after each
+    exit, starting from `initial_capital`, Sharpe over capital changes × sqrt(252).
+    `paths` is overwritten (cumulative capital).
+    """
+    n = paths.shape[1]
+    mean = paths.sum(axis=1) / n
+    variance = np.einsum('ij,ij->i', paths, paths) / n - mean * mean
+    std = np.sqrt(np.maximum(variance, 0.0))
+    sharpe = np.divide(mean, std, out=np.zeros_like(mean), where=std > 0) * np.sqrt(252)
+
+    capital = np.cumsum(paths, axis=1, out=paths)
+    capital += initial_capital
+    peak = np.maximum.accumulate(capital, axis=1)
+    np.maximum(peak, initial_capital, out=peak)       # the starting capital is the first peak
+    np.divide(capital, peak, out=peak)
+    max_drawdown = (1 - peak.min(axis=1)) * 100
+    return capital[:, -1].copy(), max_drawdown, sharpe
+
+
+def _simulate_chunks(profits, initial_capital, sizes, method, block_size, seeds):
+    """Worker task: simulates consecutive chunks of paths, one seed per chunk."""
+    out = [np.empty(sum(sizes)) for _ in range(3)]
+    first = 0
+    for size, seed in zip(sizes, seeds):
+        paths = _resample(profits, size, method, block_size, np.random.default_rng(seed))
+        for column, values in zip(out, _path_metrics(paths, initial_capital)):
+            column[first:first + size] = values
+        first += size
+    return out
+
+
+def monte_carlo(profits, initial_capital, n_paths=DEFAULT_PATHS, method="shuffle", block_size=None,
+                seed=None, max_workers=None):
+    """
+    Robustness of a backtest: resamples its trades many times and measures each path.
+
+    Paths are simulated as 2D NumPy arrays (one row per path) in chunks of about
+    CHUNK_ELEMENTS values. Every chunk has its own seed from `seed`, so the result
+    is the same with or without worker processes.
+
+    With fixed per-trade sizing, capital is the starting capital plus the summed
+    profits: "shuffle" keeps the final capital and only varies the drawdown (trade
+    order), while "bootstrap" also varies the final capital and Sharpe.
+
+    Parameters:
+        profits (array-like): Profit of each closed trade, in trade order
+        initial_capital (float): Capital before the first trade
+        n_paths (int): Number of resampled paths
+        method (str): "shuffle" (permutations) or "bootstrap" (block bootstrap)
+        block_size (int, optional): Trades per bootstrap block (default: `default_block_size`)
+        seed (int, optional): Seed for reproducible paths
+        max_workers (int, optional): Worker processes; None or 1 runs in this process
+
+    Returns:
+        dict: 'final_capital', 'max_drawdown_percent', 'sharpe_ratio' → arrays of length n_paths
+
+    Example:
+        trades = ledger.columns()
+        dist = monte_carlo(trades['profit'], 50000, n_paths=100_000, method="bootstrap", seed=7)
+        np.percentile(dist['max_drawdown_percent'], 95)   → drawdown exceeded by 5% of the paths
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+    profits = np.asarray(profits, dtype=np.float64)
+    if not len(profits):
+        raise ValueError("No trades to resample")
+    if n_paths < 1:
+        raise ValueError(f"n_paths must be at least 1, got {n_paths}")
+    block_size = block_size or default_block_size(len(profits))
+
+    chunk = _chunk_paths(len(profits))
+    sizes = [min(chunk, n_paths - first) for first in range(0, n_paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = min(max_workers or 1, len(sizes))
+    if workers == 1:
+        parts = [_simulate_chunks(profits, initial_capital, sizes, method, block_size, seeds)]
+    else:
+        # contiguous runs of chunks per worker keep the path order
+        bounds = np.linspace(0, len(sizes), workers + 1).astype(int)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_simulate_chunks, profits, initial_capital, sizes[lo:hi], method,
+                                   block_size, seeds[lo:hi])
+                       for lo, hi in zip(bounds[:-1], bounds[1:])]
+            parts = [future.result() for future in futures]
+
+    final_capital, max_drawdown, sharpe = (np.concatenate(columns) for columns in zip(*parts))
+    return {
+        "final_capital": final_capital,
+        "max_drawdown_percent": max_drawdown,
+        "sharpe_ratio": sharpe
+    }
+
+
+def summarize_distribution(distribution, percentiles=DEFAULT_PERCENTILES):
+    """
+    Mean, standard deviation and percentiles of each resampled metric.
+
+    Returns:
+        pd.DataFrame: One row per metric, columns mean, std, p5, p25, ...
+
+    Example:
+        summarize_distribution(monte_carlo(profits, 50000)).loc['max_drawdown_percent', 'p95']
+    """
+    rows = {}
+    for name, values in distribution.items():
+        row = {"mean": float(values.mean()), "std": float(values.std())}
+        row.update({f"p{p}": float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))})
+        rows[name] = row
+    return pd.DataFrame.from_dict(rows, orient="index").round(2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo / bootstrap robustness of a backtest's trades")
+    parser.add_argument("--trades", default="output/latest/executed_trades.csv")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--paths", type=int, default=DEFAULT_PATHS)
+    parser.add_argument("--method", choices=METHODS, default="shuffle")
+    parser.add_argument("--block-size", type=int, default=None, help="Trades per bootstrap block")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    profits = pd.read_csv(args.trades, usecols=["profit"])["profit"].to_numpy()
+    initial_capital = config["capital"]["total_capital"]
+
+    print(f"🎲 Resampling {len(profits)} trades into {args.paths} {args.method} paths...")
+    distribution = monte_carlo(profits, initial_capital, n_paths=args.paths, method=args.method,
+                               block_size=args.block_size, seed=args.seed, max_workers=args.workers)
+    summary = summarize_distribution(distribution)
+
+    run_folder = f"output/monte_carlo_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(run_folder, exist_ok=True)
+    pd.DataFrame(distribution).to_csv(f"{run_folder}/paths.csv", index=False)
+    with open(f"{run_folder}/monte_carlo_summary.json", "w") as f:
+        json.dump({"trades": args.trades, "method": args.method, "paths": args.paths,
+                   "block_size": args.block_size or default_block_size(len(profits)), "seed": args.seed, "initial_capital": initial_capital,
+                   "distribution": summary.to_dict(orient="index")}, f, indent=4)
+
+    print(summary.to_string())
+    print(f"\n✅ Monte Carlo results saved in: {run_folder}")
@@ -1,14 +1,80 @@
 import csv
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Mapping, Optional, Union
 
+# 5-minute candles of the 09:15–15:30 NSE session, 252 sessions a year
+BARS_PER_DAY = 75
+BARS_PER_YEAR = 252 * BARS_PER_DAY
 
-def calculate_performance(trades: List[Dict]) -> Dict[str, float]:
+
+def equity_metrics(equity: np.ndarray, position: Optional[np.ndarray] = None,
+                   periods_per_year: float = BARS_PER_YEAR) -> Dict[str, float]:
+    """
+    Risk metrics of a bar-level (mark-to-market) equity curve.
+
+    Every metric is a whole-array NumPy reduction (np.maximum.accumulate for the
+    running peak) over one reused scratch buffer, so a 10M-bar curve takes a
+    couple of hundred milliseconds.
+
+    Parameters:
+        equity (np.ndarray): Account value at each bar's close (see `run_backtest` "equity")
+        position (np.ndarray, optional): Signed position value at each close, 0 when flat
+        periods_per_year (float): Bars per year, for annualising Sharpe / Sortino
+
+    Returns:
+        Dict[str, float]:
+            max_drawdown_percent: Largest drop from a running peak of the curve
+            sharpe_ratio: mean / std of bar returns × sqrt(periods_per_year)
+            sortino_ratio: mean / downside deviation of bar returns × sqrt(periods_per_year)
+            exposure_percent: Average |position| as a share of equity (needs `position`)
+            time_in_market_percent: Share of bars with an open position (needs `position`)
+
+    Example:
+        equity = [100, 110, 99, 120] → max_drawdown_percent = (110 - 99) / 110 = 10.0
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        return {}
+
+    n = len(equity)
+    # One scratch buffer, reused in place: running peak → equity / peak → bar returns
+    buffer = np.maximum.accumulate(equity)
+    np.divide(equity, buffer, out=buffer)
+    max_drawdown = (1 - buffer.min()) * 100
+
+    returns = buffer[:n - 1]
+    np.divide(equity[1:], equity[:-1], out=returns)
+    returns -= 1
+    mean = returns.sum() / (n - 1)
+    std = np.sqrt(max(np.dot(returns, returns) / (n - 1) - mean * mean, 0.0))
+    np.minimum(returns, 0.0, out=returns)
+    downside = np.sqrt(np.dot(returns, returns) / (n - 1))
+    annualise = np.sqrt(periods_per_year)
+
+    metrics = {
+        "max_drawdown_percent": round(float(max_drawdown), 2),
+        "sharpe_ratio": round(float(mean / std * annualise), 2) if std > 0 else 0,
+        "sortino_ratio": round(float(mean / downside * annualise), 2) if downside > 0 else 0,
+    }
+    if position is not None:
+        position = np.asarray(position, dtype=np.float64)
+        np.divide(position, equity, out=buffer)
+        np.abs(buffer, out=buffer)
+        metrics["exposure_percent"] = round(float(buffer.sum() / n * 100), 2)
+        metrics["time_in_market_percent"] = round(float(np.count_nonzero(position) / n * 100), 2)
+    return metrics
+
+
+def calculate_performance(trades: Union[List[Dict], Mapping[str, np.ndarray]],
+                          initial_capital: Optional[float] = None,
+                          equity: Optional[np.ndarray] = None,
+                          position: Optional[np.ndarray] = None,
+                          periods_per_year: float = BARS_PER_YEAR) -> Dict[str, float]:
     """
     Calculates overall performance metrics from completed trades.
 
     Parameters:
-        trades (List[Dict]): Each trade is a dictionary with:
+        trades (List[Dict] or Mapping): Either a list of trade dictionaries with:
             {
                 "entry_time": str,
                 "exit_time": str,
@@ -20,6 +86,14 @@ def calculate_performance(trades: List[Dict]) -> Dict[str, float]:
                 "return_pct": float,
                 "capital_left": float
             }
+            or trade columns (e.g. `TradeLedger.columns()`), where at least
+            "profit" and "capital_left" are arrays in trade order.
+        initial_capital (float, optional): Capital before the first trade; defaults to
+            the first trade's capital_left minus its profit
+        equity (np.ndarray, optional): Bar-level mark-to-market equity (`run_backtest`
+            "equity"); drawdown and ratios then come from `equity_metrics`
+        position (np.ndarray, optional): Bar-level position value (`run_backtest` "position")
+        periods_per_year (float): Bars per year for the bar-level ratios
 
     Returns:
         Dict[str, float]: Summary metrics for dashboard or report.
@@ -30,32 +104,56 @@ def calculate_performance(trades: List[Dict]) -> Dict[str, float]:
     - avg_profit: Average profit per trade
     - win_rate_percent: Percentage of winning trades
     - max_drawdown_percent: Max drop from peak capital
-    - sharpe_ratio: Risk-adjusted return (daily approx, 252 periods)
+    - sharpe_ratio: Risk-adjusted return
+
+    With `equity`, drawdown and Sharpe use every bar (open trades marked to market)
+    and sortino_ratio, exposure_percent, time_in_market_percent are added (see
+    `equity_metrics`). Without it they fall back to the capital after each exit,
+    starting from `initial_capital`, with Sharpe annualised over 252 trades.
 
     Example:
         5 trades: [100, 102, 105, 103, 106]
         Max drawdown = (105 - 103) / 105 = 1.9%
         Sharpe = mean(returns) / std(returns) * sqrt(252)
     """
-    if not trades:
+    if isinstance(trades, Mapping):
+        profits = np.asarray(trades["profit"], dtype=np.float64)
+        capital_left = np.asarray(trades["capital_left"], dtype=np.float64)
+    else:
+        profits = np.array([t["profit"] for t in trades], dtype=np.float64)
+        capital_left = np.array([t["capital_left"] for t in trades], dtype=np.float64)
+
+    n_trades = len(profits)
+    if not n_trades:
         return {}
 
-    total_profit = sum(t['profit'] for t in trades)
-    avg_profit = total_profit / len(trades)
+    # Sequential sum keeps the same float result as summing trade by trade
+    total_profit = np.float64(sum(profits.tolist()))
+    avg_profit = total_profit / n_trades
+
+    wins = int((profits > 0).sum())
+    win_rate = (wins / n_trades) * 100
+
+    metrics = {
+        "total_trades": n_trades,
+        "wins": wins,
+        "losses": n_trades - wins,
+        "win_rate_percent": round(win_rate, 2),
+        "total_profit": round(total_profit, 2),
+        "avg_profit": round(avg_profit, 2),
+    }
 
-    wins = [t for t in trades if t['profit'] > 0]
-    win_rate = (len(wins) / len(trades)) * 100
+    if equity is not None:
+        metrics.update(equity_metrics(equity, position, periods_per_year))
+        return metrics
 
-    # Capital curve for drawdown/sharpe
-    capital_series = [100000] + [t["capital_left"] for t in trades]
-    drawdowns = []
-    peak = capital_series[0]
-    for val in capital_series:
-        if val > peak:
-            peak = val
-        dd = (peak - val) / peak
-        drawdowns.append(dd)
-    max_drawdown = max(drawdowns) * 100
+    # Capital after each exit, starting from the capital before the first trade
+    if initial_capital is None:
+        initial_capital = capital_left[0] - profits[0]
+    capital_series = np.concatenate(([float(initial_capital)], capital_left))
+    peak = np.maximum.accumulate(capital_series)
+    drawdowns = (peak - capital_series) / peak
+    max_drawdown = drawdowns.max() * 100
 
     # Sharpe ratio based on capital changes
     returns = np.diff(capital_series)
@@ -63,16 +161,9 @@ def calculate_performance(trades: List[Dict]) -> Dict[str, float]:
     if len(returns) > 1 and np.std(returns) != 0:
         sharpe_ratio = np.mean(returns) / np.std(returns) * np.sqrt(252)
 
-    return {
-        "total_trades": len(trades),
-        "wins": len(wins),
-        "losses": len(trades) - len(wins),
-        "win_rate_percent": round(win_rate, 2),
-        "total_profit": round(total_profit, 2),
-        "avg_profit": round(avg_profit, 2),
-        "max_drawdown_percent": round(max_drawdown, 2),
-        "sharpe_ratio": round(sharpe_ratio, 2)
-    }
+    metrics["max_drawdown_percent"] = round(max_drawdown, 2)
+    metrics["sharpe_ratio"] = round(sharpe_ratio, 2)
+    return metrics
 
 
 def export_trades_to_csv(trades: List[Dict], filename: str = "output/trade_log.csv") -> None:
@@ -9,15 +9,26 @@ import numpy as np
 import plotly.graph_objs as go
 from utils.trade_segment import get_trade_segment, determine_indicators_used, resample_trade_segment
 from utils.trade_plotter import plot_single_trade
+from utils.trade_visualizer import load_stop_loss
+from utils.candle_store import read_meta, load_frame
+from utils.timeframes import BASE_TIMEFRAME, TIMEFRAMES, load_timeframe_segment
 
 # Load data
 DATA_FOLDER = "output/latest"
 candles_csv = os.path.join(DATA_FOLDER, "calculated_indicators.csv")
+candles_store = os.path.join(DATA_FOLDER, "candles")
 trades_csv = os.path.join(DATA_FOLDER, "executed_trades.csv")
+timeframes_dir = os.path.join(DATA_FOLDER, "timeframes")
 
-# Read data with timezone neutral timestamps
-df = pd.read_csv(candles_csv, parse_dates=['timestamp'])
+# Read data with timezone neutral timestamps (memory-mapped candle store when available)
+df = load_frame(candles_store) if read_meta(candles_store) else pd.read_csv(candles_csv, parse_dates=['timestamp'])
 df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
+
+# Trailing SL per candle, memory-mapped from stop_loss.npy
+sl_trail = load_stop_loss(candles_csv, len(df))
+if sl_trail is not None:
+    df['stop_loss'] = sl_trail
+
 trades = pd.read_csv(trades_csv, parse_dates=['entry_time', 'exit_time'])
 trades['entry_time'] = pd.to_datetime(trades['entry_time']).dt.tz_localize(None)
 trades['exit_time'] = pd.to_datetime(trades['exit_time']).dt.tz_localize(None)
@@ -41,7 +52,7 @@ st.markdown(f"**Capital Left:** ₹{selected_trade['capital_left']}")
 st.markdown(f"**Triggered by:** `{', '.join(used_indicators)}`")
 
 # Time resampling and indicator toggles
-resample_option = st.selectbox("Select Time Window", ["5min", "15min", "30min", "1H", "3H", "1D"], index=0)
+resample_option = st.selectbox("Select Time Window", [BASE_TIMEFRAME] + list(TIMEFRAMES), index=0)
 all_indicators = ['RSI', 'MACD', 'DMI', 'Divergence']
 selected_indicators = st.multiselect("Indicators to show:", options=all_indicators, default=used_indicators)
 show_full_candles = st.checkbox("Show OHLCV candles between entry and exit", value=True)
@@ -50,7 +61,15 @@ show_full_candles = st.checkbox("Show OHLCV candles between entry and exit", val
 segment_df = get_trade_segment(df, selected_trade)
 segment_df = segment_df[segment_df['timestamp'].dt.time.between(pd.to_datetime("09:15").time(), pd.to_datetime("15:30").time())]
 segment_df = segment_df[segment_df['timestamp'].dt.dayofweek < 5]
-resampled_segment = resample_trade_segment(segment_df, resample_option) if show_full_candles else segment_df
+if not show_full_candles or resample_option == BASE_TIMEFRAME:
+    resampled_segment = segment_df
+elif read_meta(os.path.join(timeframes_dir, resample_option)) and 'entry_bar' in selected_trade:
+    # Precomputed session-aligned bars saved by main.py: a row-range lookup, no resampling
+    resampled_segment = load_timeframe_segment(timeframes_dir, resample_option,
+                                               selected_trade['entry_bar'], selected_trade['exit_bar'])
+    resampled_segment['timestamp'] = resampled_segment['timestamp'].dt.tz_localize(None)
+else:
+    resampled_segment = resample_trade_segment(segment_df, resample_option)
 
 # Plot base
 fig = go.Figure()
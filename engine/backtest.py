@@ -0,0 +1,552 @@
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from engine.ledger import TradeLedger
+from indicators.divergence import DIVERGENCE_LABELS
+from trade_manager import entry_reason
+from utils.signal_logic import entry_signals
+from utils.event_log import EventLog, DEBUG, INFO
+
+# Columns the engine reads from the indicator frame
+BAR_COLUMNS = ['timestamp', 'close', 'rsi', 'macd', 'signal', '+DI', '-DI', 'ADX', 'divergence']
+
+SKIPPED_MESSAGE = "💸 Skipped: Insufficient capital"
+
+# Simulation modes accepted by run_backtest
+MODES = ("bars", "events")
+
+
+def _round(value, decimals):
+    """
+    Same result as `round(np.float64, decimals)` (multiply, round-half-even, divide),
+    without the numpy scalar overhead of ~5µs per call.
+    """
+    value = float(value)
+    if value != value or value in (np.inf, -np.inf):
+        return np.float64(value)
+    scale = 10.0 ** decimals
+    return np.float64(round(value * scale) / scale)
+
+
+def frame_to_bars(df, extra=()):
+    """
+    Extracts the columns used by the backtest engine as plain positional arrays.
+
+    Parameters:
+        df (pd.DataFrame): OHLCV data merged with RSI, MACD, DMI and divergence columns
+        extra (iterable): More float columns to carry, e.g. `rule_columns(config)`
+
+    Returns:
+        dict: column name → array (timestamps keep their timezone, prices are float64)
+
+    Example:
+        bars = frame_to_bars(df)
+        bars['close'][30]   → close of the 31st candle, regardless of df.index
+    """
+    bars = {}
+    for col in BAR_COLUMNS + [c for c in extra if c not in BAR_COLUMNS]:
+        if col == 'timestamp':
+            bars[col] = df[col].array              # indexing gives pd.Timestamp
+        elif col == 'divergence':
+            bars[col] = df[col].array              # Categorical stays int8-coded
+        else:
+            bars[col] = df[col].to_numpy(dtype=np.float64)
+    return bars
+
+
+def slice_bars(bars, start, stop):
+    """
+    Bars of candles [start, stop) as views, e.g. one walk-forward fold.
+
+    Indicators keep the values computed on the full history, so a slice starting
+    after the warm-up needs no warm-up of its own (start_bar=0).
+
+    Example:
+        fold = slice_bars(bars, 5000, 6500)
+        fold['close'][0]   → bars['close'][5000]
+    """
+    n = len(bars['close'])
+    return {col: values[start:stop] if hasattr(values, '__len__') and len(values) == n else values
+            for col, values in bars.items()}
+
+
+def timestamps_ns(bars):
+    """
+    Candle timestamps as int64 nanoseconds plus their timezone (None when naive).
+
+    Uses bars['ts'] when it is already there (see `load_symbol_bars`).
+    """
+    times = pd.DatetimeIndex(bars['timestamp'])
+    ts = bars['ts'] if 'ts' in bars else times.as_unit('ns').asi8
+    return ts, times.tz
+
+
+class CapitalPool:
+    """
+    Capital shared by all open positions: one instrument, or every symbol of a portfolio.
+
+    Attributes:
+        capital_per_trade (float): Allocation per trade
+        available_capital (float): Capital not tied up in open trades
+    """
+    __slots__ = ("capital_per_trade", "available_capital")
+
+    def __init__(self, total_capital=50000, capital_per_trade=5000):
+        self.capital_per_trade = capital_per_trade
+        self.available_capital = total_capital
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["capital"]["total_capital"], config["capital"]["per_trade"])
+
+
+class EarlyAbort:
+    """
+    Stops a backtest as soon as it is clearly bad (config "early_abort").
+
+    Checked on every exit (realized drawdown, losing streak) and before entries
+    (minimum trade count once `min_trades_by_bar` is reached). Unset limits are
+    not checked.
+
+    Attributes:
+        reason (str): Why the run stopped, None while it is still going
+        bar (int): Bar at which it stopped
+
+    Example:
+        {"max_drawdown_percent": 10, "max_loss_streak": 8, "min_trades": 5, "min_trades_by_bar": 20000}
+        → stops at the first exit that takes equity 10% below its peak, after 8 losses
+          in a row, or when fewer than 5 trades were entered by bar 20000
+    """
+    __slots__ = ("max_drawdown_percent", "max_loss_streak", "min_trades", "min_trades_by_bar",
+                 "equity", "peak", "streak", "reason", "bar")
+
+    def __init__(self, total_capital, max_drawdown_percent=None, max_loss_streak=None,
+                 min_trades=None, min_trades_by_bar=None):
+        if (min_trades is None) != (min_trades_by_bar is None):
+            raise ValueError("early_abort: min_trades and min_trades_by_bar must be set together")
+        self.max_drawdown_percent = max_drawdown_percent
+        self.max_loss_streak = max_loss_streak
+        self.min_trades = min_trades
+        self.min_trades_by_bar = min_trades_by_bar
+        self.equity = self.peak = float(total_capital)     # realized equity: capital + closed PnL
+        self.streak = 0
+        self.reason = None
+        self.bar = None
+
+    @classmethod
+    def from_config(cls, config):
+        """EarlyAbort from config "early_abort", or None when no limit is set."""
+        settings = {k: v for k, v in config.get("early_abort", {}).items() if v is not None}
+        if not settings:
+            return None
+        return cls(config["capital"]["total_capital"], **settings)
+
+    def _stop(self, i, reason):
+        self.reason, self.bar = reason, i
+        return True
+
+    def after_exit(self, i, profit):
+        """Books a closed trade; True when the run must stop."""
+        self.equity += profit
+        if self.equity > self.peak:
+            self.peak = self.equity
+        self.streak = self.streak + 1 if profit < 0 else 0
+
+        if self.max_drawdown_percent is not None:
+            drawdown = (self.peak - self.equity) / self.peak * 100
+            if drawdown > self.max_drawdown_percent:
+                return self._stop(i, f"drawdown {drawdown:.2f}% > {self.max_drawdown_percent}%")
+        if self.max_loss_streak is not None and self.streak >= self.max_loss_streak:
+            return self._stop(i, f"{self.streak} losing trades in a row")
+        return False
+
+    def before_entry(self, i, trades):
+        """True when bar i is past `min_trades_by_bar` with fewer than `min_trades` entered."""
+        if self.min_trades_by_bar is not None and i >= self.min_trades_by_bar and trades < self.min_trades:
+            return self._stop(self.min_trades_by_bar, f"{trades} trades by bar {self.min_trades_by_bar} < {self.min_trades}")
+        return False
+
+    def at_end(self, n_bars, trades):
+        """Applies the trade-count limit to a run that ended without another entry attempt."""
+        if self.reason is None and self.min_trades_by_bar is not None and n_bars > self.min_trades_by_bar:
+            self.before_entry(self.min_trades_by_bar, trades)
+
+    def report(self):
+        """None, or {"reason": str, "bar": int} when the run was aborted."""
+        return None if self.reason is None else {"reason": self.reason, "bar": self.bar}
+
+
+class _TradeBook:
+    """
+    Capital and trade ledger shared by both simulation modes.
+
+    Mirrors what `execute_entry` / `execute_exit` do to a `TradeState`, using the
+    same arithmetic so rounded values match the row-based loop exactly. Values go
+    straight into the `TradeLedger` columns; timestamps and reason strings are only
+    built when the event log keeps INFO events.
+    """
+    __slots__ = ("bars", "config", "log", "logging", "log_skips", "close", "ts", "divergence", "pool", "ledger",
+                 "group", "tags", "row", "entry_price", "qty", "direction")
+
+    def __init__(self, bars, config, log, pool=None, ledger=None, group=0, tags=None):
+        self.bars = bars
+        self.config = config
+        self.log = log
+        self.logging = log.enabled(INFO)
+        self.log_skips = log.enabled(DEBUG)
+        self.close = np.asarray(bars['close'], dtype=np.float64)
+        self.ts, tz = timestamps_ns(bars)
+        self.divergence = pd.Categorical(bars['divergence'], categories=DIVERGENCE_LABELS).codes
+        self.pool = pool if pool is not None else CapitalPool.from_config(config)
+        self.ledger = ledger if ledger is not None else TradeLedger(tz=tz)
+        self.group = group
+        self.tags = tags or {}      # extra fields on every event, e.g. {"symbol": "INFY"}
+        self.row = -1
+        self.entry_price = None
+        self.qty = None
+        self.direction = 0
+
+    def can_enter(self):
+        return self.pool.available_capital >= self.pool.capital_per_trade
+
+    def skip(self, i):
+        self.ledger.skip()
+        if self.log_skips:
+            self.log.debug("skip", time=self.bars['timestamp'][i], bar=i, **self.tags)
+
+    def enter(self, i, signal):
+        """Opens a trade at bar i and returns its initial stop-loss."""
+        bars = self.bars
+        sl_percent = self.config["stop_loss_percent"]
+        entry_price = float(self.close[i])
+        entry_sl = entry_price * (1 - sl_percent) if signal == 1 else entry_price * (1 + sl_percent)
+        pool = self.pool
+        qty = _round(pool.capital_per_trade / entry_price, 4)
+        pool.available_capital -= pool.capital_per_trade
+
+        self.row = self.ledger.open(
+            i, self.ts[i], signal, entry_price, qty, pool.available_capital, entry_sl,
+            bars['rsi'][i], bars['macd'][i], bars['signal'][i], bars['+DI'][i], bars['-DI'][i],
+            bars['ADX'][i], self.divergence[i], group=self.group
+        )
+        self.entry_price = entry_price
+        self.qty = qty
+        self.direction = signal
+
+        if self.logging:
+            side = 'buy' if signal == 1 else 'short'
+            reason_str = entry_reason(
+                side, _round(bars['rsi'][i], 2), _round(bars['macd'][i], 4), _round(bars['signal'][i], 4),
+                _round(bars['+DI'][i], 2), _round(bars['-DI'][i], 2), _round(bars['ADX'][i], 2),
+                bars['divergence'][i], self.config
+            )
+            self.log.info("entry", time=bars['timestamp'][i], side=side.upper(), price=entry_price,
+                          qty=qty, reason=reason_str, bar=i, **self.tags)
+        return entry_sl
+
+    def exit(self, i):
+        """Closes the open trade at bar i (PnL, capital restore, ledger update) and returns its profit."""
+        exit_price = float(self.close[i])
+        entry_price = self.entry_price
+        qty = self.qty
+        if self.direction == 1:
+            profit = (exit_price - entry_price) * qty
+        else:
+            profit = (entry_price - exit_price) * qty
+        return_pct = (profit / (entry_price * qty)) * 100 if qty > 0 else 0
+        pool = self.pool
+        pool.available_capital += (pool.capital_per_trade + profit)
+
+        self.ledger.close(self.row, i, self.ts[i], exit_price, profit, return_pct, pool.available_capital)
+
+        if self.logging:
+            self.log.info("exit", time=self.bars['timestamp'][i], side='BUY' if self.direction == 1 else 'SHORT',
+                          price=exit_price, profit=profit, return_pct=return_pct, bar=i, **self.tags)
+
+        self.row = -1
+        self.direction = 0
+        return profit
+
+
+def find_exit(close, entry_bar, direction, sl_percent, out=None, chunk=256):
+    """
+    Finds the bar where the trailing stop-loss of a trade is first touched.
+
+    Because `update_stop_loss` only ratchets, the SL checked on bar j of a BUY is
+    (1 - sl_percent) * max(close[entry_bar .. j-1]); for a SHORT it is
+    (1 + sl_percent) * min(...). The exit is the first j with close[j] <= SL (BUY)
+    or close[j] >= SL (SHORT). The search runs on growing vectorized chunks, so the
+    cost depends on the trade length rather than on Python-level bar stepping.
+
+    Parameters:
+        close (np.ndarray): Close prices (float64)
+        entry_bar (int): Bar index of the entry
+        direction (int): 1 = buy, -1 = short
+        sl_percent (float): Trailing SL percentage
+        out (np.ndarray, optional): Per-bar SL trail, filled for the in-trade bars before exit
+        chunk (int): Initial search window, doubled until the exit is found
+
+    Returns:
+        int or None: Exit bar index, or None if the SL is never hit
+
+    Example (BUY, sl_percent = 0.02):
+        close = [100, 105, 103, 102.8]  → SL after bar 1 = 102.9 → exit at bar 3
+    """
+    n = len(close)
+    factor = 1 - sl_percent if direction == 1 else 1 + sl_percent
+    accumulate = np.maximum.accumulate if direction == 1 else np.minimum.accumulate
+    combine = np.maximum if direction == 1 else np.minimum
+
+    extreme = close[entry_bar]
+    start = entry_bar + 1
+    while start < n:
+        stop = min(n, start + chunk)
+        segment = close[start:stop]
+
+        # best close up to and including each bar (the SL after that bar's update)
+        running = combine(accumulate(segment), extreme)
+        trail = running * factor
+        checked = np.empty_like(trail)         # SL in force when each bar is checked
+        checked[0] = extreme * factor
+        checked[1:] = trail[:-1]
+
+        hit = segment <= checked if direction == 1 else segment >= checked
+        k = int(hit.argmax())
+        if hit[k]:
+            if out is not None:
+                out[start:start + k] = trail[:k]
+            return start + k
+
+        if out is not None:
+            out[start:stop] = trail
+        extreme = running[-1]
+        start = stop
+        chunk *= 2
+
+    return None
+
+
+def open_positions(close, entry_bar, exit_bar, signed_qty, entry_price):
+    """
+    Unrealized PnL and position value per bar of one instrument's trades (one open at a time).
+
+    A trade is open from its entry bar up to, excluding, its exit bar (-1 = still open
+    at the end). Forward-filled trade indices (np.maximum.accumulate), no Python loop.
+
+    Parameters:
+        close (np.ndarray): Close prices
+        entry_bar, exit_bar (np.ndarray[int64]): Trade bars, entries in bar order
+        signed_qty (np.ndarray): Position size, negative for shorts
+        entry_price (np.ndarray): Entry price per trade
+
+    Returns:
+        (np.ndarray, np.ndarray): open PnL per bar, and signed position value per bar
+                                  (qty × close, 0 when flat)
+    """
+    n = len(close)
+    pnl = np.zeros(n)
+    position = np.zeros(n)
+    if not len(entry_bar):
+        return pnl, position
+    marker = np.full(n, -1, dtype=np.int64)
+    marker[entry_bar] = np.arange(len(entry_bar))
+    trade = np.maximum.accumulate(marker)
+    stop = np.where(exit_bar >= 0, exit_bar, n)
+    in_trade = (trade >= 0) & (np.arange(n) < stop[trade])
+    trade = trade[in_trade]
+    price = close[in_trade]
+    pnl[in_trade] = signed_qty[trade] * (price - entry_price[trade])
+    position[in_trade] = signed_qty[trade] * price
+    return pnl, position
+
+
+def equity_curve(close, ledger, total_capital):
+    """
+    Bar-level mark-to-market equity of a single-instrument run.
+
+    Flat bars hold the capital after the last closed trade (its capital_left, or
+    `total_capital` before the first exit). Bars inside a trade add the open
+    position's PnL at that bar's close; the exit bar holds the realized capital.
+    Built with forward-filled trade indices (np.maximum.accumulate, see `open_positions`).
+
+    Parameters:
+        close (np.ndarray): Close prices
+        ledger (TradeLedger): Trades of the run, entries in bar order
+        total_capital (float): Starting capital
+
+    Returns:
+        (np.ndarray, np.ndarray): equity per bar, and signed position value per bar
+                                  (qty × close, negative for shorts, 0 when flat)
+
+    Example:
+        BUY 50 @ 100 on bar 2, exit @ 104 on bar 5, capital 50000
+        → equity [50000, 50000, 50000, 50000 + 50 × (close[3] - 100), ..., capital_left at bar 5]
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    equity = np.full(n, float(total_capital))
+    position = np.zeros(n)
+    entry_bar = ledger.raw("entry_bar")
+    if not len(entry_bar):
+        return equity, position
+    exit_bar = ledger.raw("exit_bar")
+
+    # realized capital: capital_left of the last trade closed at or before each bar
+    closed = np.flatnonzero(exit_bar >= 0)
+    marker = np.full(n, -1, dtype=np.int64)
+    marker[exit_bar[closed]] = closed
+    last_closed = np.maximum.accumulate(marker)
+    has_closed = last_closed >= 0
+    equity[has_closed] = ledger.raw("capital_left")[last_closed[has_closed]]
+
+    # open trade on each bar: the last entry, until (excluding) its exit bar
+    signed_qty = ledger.raw("direction") * ledger.raw("position_size")
+    pnl, position = open_positions(close, entry_bar, exit_bar, signed_qty, ledger.raw("entry_price"))
+    equity += pnl
+    return equity, position
+
+
+def run_backtest(bars, config, start_bar=30, mode="bars", log=None, abort=None):
+    """
+    Simulates the strategy over column arrays instead of per-candle DataFrame rows.
+
+    Produces exactly the same trades as the `TradeState` loop (`should_enter_trade`,
+    `execute_entry`, `update_stop_loss`, `should_exit_trade`, `execute_exit`), but the
+    trade state lives in local scalars and entry signals are computed once for all bars.
+
+    Modes:
+        "bars":   steps through every candle, like the original loop
+        "events": jumps from one entry candidate (nonzero signal) to its exit bar
+                  (`find_exit`) and then to the next candidate; runtime scales with
+                  the number of trades rather than the number of bars
+
+    Parameters:
+        bars (dict): Column arrays, see `frame_to_bars`
+        config (dict): Configuration values from config.json
+        start_bar (int): First bar to simulate (indicator warm-up is skipped)
+        mode (str): "bars" or "events" (identical results)
+        log (EventLog, optional): Receives entry / exit / skip events; defaults to a
+                                  console log printing the same lines as `execute_entry`.
+                                  Pass `EventLog.silent()` to skip all formatting.
+        abort (EarlyAbort, optional): Stop limits; defaults to config "early_abort" (none when absent).
+                                      An aborted run keeps the trades closed so far.
+
+    Returns:
+        dict:
+            ledger (TradeLedger): Executed trades (columnar) and the skipped-entry count
+            stop_loss (np.ndarray): Trailing SL per bar while in a trade, NaN otherwise
+            available_capital (float): Capital left at the end of the run
+            equity (np.ndarray): Mark-to-market equity per bar (see `equity_curve`)
+            position (np.ndarray): Signed position value per bar, 0 when flat
+            aborted (dict or None): {"reason", "bar"} when an early-abort limit stopped the run
+
+    Example:
+        result = run_backtest(frame_to_bars(df), config, mode="events")
+        result['ledger'].to_csv("executed_trades.csv")
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown backtest mode '{mode}', expected one of {MODES}")
+
+    book = _TradeBook(bars, config, log if log is not None else EventLog())
+    signals = entry_signals(bars, config)
+    stop_loss_trail = np.full(len(book.close), np.nan)
+    abort = abort if abort is not None else EarlyAbort.from_config(config)
+
+    if mode == "bars":
+        _simulate_bars(book, signals, start_bar, config["stop_loss_percent"], stop_loss_trail, abort)
+    else:
+        _simulate_events(book, signals, start_bar, config["stop_loss_percent"], stop_loss_trail, abort)
+    book.ledger.set_reasons(config)
+    book.ledger.set_excursions(book.close, config["stop_loss_percent"])
+    if abort is not None:
+        abort.at_end(len(signals), len(book.ledger))
+    equity, position = equity_curve(book.close, book.ledger, config["capital"]["total_capital"])
+
+    return {
+        "ledger": book.ledger,
+        "stop_loss": stop_loss_trail,
+        "available_capital": book.pool.available_capital,
+        "equity": equity,
+        "position": position,
+        "aborted": abort.report() if abort is not None else None
+    }
+
+
+def _simulate_bars(book, signals, start_bar, sl_percent, stop_loss_trail, abort=None):
+    buy_factor = 1 - sl_percent
+    short_factor = 1 + sl_percent
+
+    # Python lists make scalar access in the hot loop much cheaper than numpy indexing
+    closes = book.close.tolist()
+    signals = signals.tolist()
+    direction = 0
+    stop_loss = 0.0
+
+    for i in range(start_bar, len(closes)):
+        price = closes[i]
+
+        if direction == 0:
+            signal = signals[i]
+            if not signal:
+                continue
+            if abort is not None and abort.before_entry(i, len(book.ledger)):
+                return
+            if not book.can_enter():
+                book.skip(i)
+                continue
+            stop_loss = book.enter(i, signal)
+            direction = signal
+            continue
+
+        # In trade: SL hit? (should_exit_trade)
+        if (price <= stop_loss) if direction == 1 else (price >= stop_loss):
+            profit = book.exit(i)
+            direction = 0
+            if abort is not None and abort.after_exit(i, profit):
+                return
+            continue
+
+        # Ratchet the trailing SL (update_stop_loss)
+        if direction == 1:
+            new_sl = price * buy_factor
+            if new_sl > stop_loss:
+                stop_loss = new_sl
+        else:
+            new_sl = price * short_factor
+            if new_sl < stop_loss:
+                stop_loss = new_sl
+        stop_loss_trail[i] = stop_loss
+
+
+def _simulate_events(book, signals, start_bar, sl_percent, stop_loss_trail, abort=None):
+    close = book.close
+    candidates = (np.flatnonzero(signals[start_bar:]) + start_bar).tolist()
+    pos = 0
+
+    while pos < len(candidates):
+        i = candidates[pos]
+
+        if abort is not None and abort.before_entry(i, len(book.ledger)):
+            return
+        if not book.can_enter():
+            # Capital only changes on exits, so every remaining candidate is skipped
+            # (each still goes through the trade-count check, as in the bars mode)
+            for j in candidates[pos:]:
+                if abort is not None and abort.before_entry(j, len(book.ledger)):
+                    return
+                book.skip(j)
+            break
+
+        signal = int(signals[i])
+        book.enter(i, signal)
+        exit_bar = find_exit(close, i, signal, sl_percent, out=stop_loss_trail)
+        if exit_bar is None:
+            break                                  # trade still open at the end of data
+
+        profit = book.exit(exit_bar)
+        if abort is not None and abort.after_exit(exit_bar, profit):
+            return
+        # next candidate strictly after the exit bar
+        pos = bisect_right(candidates, exit_bar)
@@ -0,0 +1,306 @@
+import numpy as np
+import pandas as pd
+
+from indicators.divergence import DIVERGENCE_LABELS
+from utils.signal_logic import CONDITION_RULES, condition_bits
+
+# Per-trade excursion fields, filled by TradeLedger.set_excursions
+EXCURSION_FIELDS = ["mae_pct", "mfe_pct", "bars_in_trade", "exit_sl", "exit_sl_distance_pct"]
+
+# Column order of executed_trades.csv
+TRADE_FIELDS = [
+    "entry_time", "exit_time", "direction",
+    "entry_price", "exit_price", "position_size",
+    "rsi", "macd", "signal_line", "+DI", "-DI", "adx", "divergence", "entry_reason",
+    "profit", "return_pct", "capital_left", "entry_sl"
+] + EXCURSION_FIELDS
+
+# Decimals applied on export (same rounding execute_entry / execute_exit used)
+DECIMALS = {
+    "entry_price": 2, "exit_price": 2, "rsi": 2, "macd": 4, "signal_line": 4,
+    "+DI": 2, "-DI": 2, "adx": 2, "profit": 2, "return_pct": 2,
+    "capital_left": 2, "entry_sl": 2,
+    "mae_pct": 2, "mfe_pct": 2, "exit_sl": 2, "exit_sl_distance_pct": 2
+}
+
+# Entry-reason labels in CONDITION_RULES order; bit k of the reason mask means label k applies
+REASON_LABELS = {
+    direction: [rules[side][1] for rules in CONDITION_RULES.values()]
+    for direction, side in ((1, 'buy'), (-1, 'short'))
+}
+
+NAT = np.iinfo(np.int64).min                               # int64 value of NaT
+
+_COLUMN_DTYPES = {
+    "entry_bar": np.int64, "exit_bar": np.int64,
+    "entry_time": np.int64, "exit_time": np.int64,          # ns since epoch (UTC when tz-aware)
+    "direction": np.int8, "divergence": np.int8, "reason": np.uint8, "group": np.int32,
+    "entry_price": np.float64, "exit_price": np.float64, "position_size": np.float64,
+    "rsi": np.float64, "macd": np.float64, "signal_line": np.float64,
+    "+DI": np.float64, "-DI": np.float64, "adx": np.float64,
+    "profit": np.float64, "return_pct": np.float64, "capital_left": np.float64,
+    "entry_sl": np.float64,
+    "mae_pct": np.float64, "mfe_pct": np.float64, "bars_in_trade": np.int64,
+    "exit_sl": np.float64, "exit_sl_distance_pct": np.float64,
+}
+
+_REASON_TEXT = {
+    direction: [", ".join(label for k, label in enumerate(labels) if bits >> k & 1) for bits in range(32)]
+    for direction, labels in REASON_LABELS.items()
+}
+
+
+def reason_bits(direction, rsi, macd, signal_line, plus_di, minus_di, adx, divergence, config):
+    """
+    Vectorized entry-reason mask from rounded indicator values (see `entry_reason`).
+
+    The checks are the CONDITION_RULES of utils/signal_logic.py, evaluated with
+    `condition_bits` on the trades' entry values.
+
+    Parameters:
+        direction (np.ndarray[int8]): 1 = buy, -1 = short
+        rsi, macd, signal_line, plus_di, minus_di, adx (np.ndarray): Rounded values at entry
+        divergence (np.ndarray[int8]): Divergence codes (1 = bullish, 2 = bearish)
+        config (dict): RSI thresholds and min_adx_strength
+
+    Returns:
+        np.ndarray[uint8]: Bit k set when REASON_LABELS[direction][k] applies
+    """
+    values = {
+        'rsi': rsi, 'macd': macd, 'signal': signal_line, '+DI': plus_di, '-DI': minus_di, 'ADX': adx,
+        'divergence': np.asarray(DIVERGENCE_LABELS, dtype=object)[divergence],
+    }
+    buy_bits, short_bits, _ = condition_bits(values, config)
+    return np.where(direction == 1, buy_bits, short_bits)
+
+
+class TradeLedger:
+    """
+    Array-backed trade log with typed columns.
+
+    Rows are preallocated and the arrays double in size when full, so opening and
+    closing a trade is a handful of scalar writes. Indicator and price values are
+    stored unrounded; rounding to the executed_trades.csv precision happens once,
+    vectorized, on export. Skipped entries are only counted (`skipped`).
+
+    Attributes:
+        skipped (int): Entry signals skipped for lack of capital
+        tz: Timezone used when exporting entry / exit times
+        group_name (str): Name of the optional group column (e.g. "symbol")
+        group_labels (list): Label per group code
+
+    Example:
+        ledger = run_backtest(bars, config)['ledger']
+        ledger.to_csv("executed_trades.csv")
+        metrics = calculate_performance(ledger.columns())
+    """
+
+    def __init__(self, capacity=1024, tz=None, group_name=None, group_labels=None):
+        self.size = 0
+        self.skipped = 0
+        self.tz = tz
+        self.group_name = group_name
+        self.group_labels = group_labels
+        self._data = {name: self._empty(name, dtype, capacity) for name, dtype in _COLUMN_DTYPES.items()}
+
+    @staticmethod
+    def _empty(name, dtype, capacity):
+        if np.issubdtype(dtype, np.floating):
+            fill = np.nan
+        elif name in ("entry_time", "exit_time"):
+            fill = NAT
+        elif name in ("entry_bar", "exit_bar", "bars_in_trade"):
+            fill = -1
+        else:
+            fill = 0
+        return np.full(capacity, fill, dtype=dtype)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        for name, arr in self._data.items():
+            extra = self._empty(name, arr.dtype.type, len(arr))
+            self._data[name] = np.concatenate([arr, extra])
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def open(self, entry_bar, entry_time, direction, entry_price, position_size, capital_left,
+             entry_sl, rsi, macd, signal_line, plus_di, minus_di, adx, divergence, reason=0, group=0):
+        """Appends an open trade and returns its row number."""
+        row = self.size
+        if row == len(self._data["entry_bar"]):
+            self._grow()
+        d = self._data
+        d["entry_bar"][row] = entry_bar
+        d["entry_time"][row] = entry_time
+        d["direction"][row] = direction
+        d["entry_price"][row] = entry_price
+        d["position_size"][row] = position_size
+        d["capital_left"][row] = capital_left
+        d["entry_sl"][row] = entry_sl
+        d["rsi"][row] = rsi
+        d["macd"][row] = macd
+        d["signal_line"][row] = signal_line
+        d["+DI"][row] = plus_di
+        d["-DI"][row] = minus_di
+        d["adx"][row] = adx
+        d["divergence"][row] = divergence
+        d["reason"][row] = reason
+        d["group"][row] = group
+        self.size = row + 1
+        return row
+
+    def close(self, row, exit_bar, exit_time, exit_price, profit, return_pct, capital_left):
+        """Fills in the exit side of an open trade."""
+        d = self._data
+        d["exit_bar"][row] = exit_bar
+        d["exit_time"][row] = exit_time
+        d["exit_price"][row] = exit_price
+        d["profit"][row] = profit
+        d["return_pct"][row] = return_pct
+        d["capital_left"][row] = capital_left
+
+    def skip(self):
+        self.skipped += 1
+
+    def set_reasons(self, config):
+        """Computes the entry-reason mask of every trade from its rounded indicator values."""
+        d = self._data
+        n = self.size
+        rounded = {name: np.round(d[name][:n], DECIMALS[name]) for name in ("rsi", "macd", "signal_line", "+DI", "-DI", "adx")}
+        d["reason"][:n] = reason_bits(
+            d["direction"][:n], rounded["rsi"], rounded["macd"], rounded["signal_line"],
+            rounded["+DI"], rounded["-DI"], rounded["adx"], d["divergence"][:n], config
+        )
+
+    def set_excursions(self, close, sl_percent, rows=None):
+        """
+        Computes MAE / MFE, bars in trade and the trailing SL at exit of completed trades.
+
+        All trades are reduced together: np.maximum.reduceat / np.minimum.reduceat over
+        the (entry_bar, exit_bar) pairs give the best and worst close of every trade
+        before its exit bar, in one pass over the bars, and the exit close is combined
+        in afterwards. Excursions use closes, the prices the engine trades and marks at.
+
+        Parameters:
+            close (np.ndarray): Close prices of the trades' instrument
+            sl_percent (float): Trailing SL percentage (see `find_exit`)
+            rows (np.ndarray, optional): Ledger rows traded on `close` (default: all),
+                                         e.g. one symbol of a portfolio;
+                                         trades recorded without bar positions are left out
+
+        Fields (percent of the entry price, MAE / MFE ≥ 0):
+            mae_pct: Largest move against the trade, entry to exit
+            mfe_pct: Largest move in favour of the trade
+            bars_in_trade: exit_bar - entry_bar
+            exit_sl: Trailing SL in force when the exit bar was checked
+            exit_sl_distance_pct: Exit price beyond (< 0) or inside the SL, % of the SL
+
+        Example (BUY @ 100, closes 100, 99, 104, 101.5 → exit on the last bar, sl_percent 0.02):
+            mae_pct 1.0, mfe_pct 4.0, bars_in_trade 3, exit_sl 101.92, exit_sl_distance_pct -0.41
+        """
+        close = np.asarray(close, dtype=np.float64)
+        rows = np.arange(self.size) if rows is None else np.asarray(rows)
+        d = self._data
+        rows = rows[(d["entry_bar"][rows] >= 0) & (d["exit_bar"][rows] >= 0)]
+        if not len(rows):
+            return
+        entry_bar = d["entry_bar"][rows]
+        exit_bar = d["exit_bar"][rows]
+
+        # slot 2k reduces close[entry_k:exit_k]; odd slots span the gaps and are ignored
+        bounds = np.column_stack((entry_bar, exit_bar)).ravel()
+        highest = np.maximum.reduceat(close, bounds)[::2]
+        lowest = np.minimum.reduceat(close, bounds)[::2]
+
+        buy = d["direction"][rows] == 1
+        entry_price = d["entry_price"][rows]
+        exit_price = close[exit_bar]
+        exit_sl = np.where(buy, highest * (1 - sl_percent), lowest * (1 + sl_percent))
+        np.maximum(highest, exit_price, out=highest)
+        np.minimum(lowest, exit_price, out=lowest)
+        up = (highest - entry_price) / entry_price * 100
+        down = (entry_price - lowest) / entry_price * 100
+
+        d["mae_pct"][rows] = np.where(buy, down, up)
+        d["mfe_pct"][rows] = np.where(buy, up, down)
+        d["bars_in_trade"][rows] = exit_bar - entry_bar
+        d["exit_sl"][rows] = exit_sl
+        d["exit_sl_distance_pct"][rows] = np.where(buy, exit_price - exit_sl, exit_sl - exit_price) / exit_sl * 100
+
+    # ------------------------------------------------------------------
+    # Access / export
+    # ------------------------------------------------------------------
+    def raw(self, name):
+        """Unrounded column view over the recorded rows."""
+        return self._data[name][:self.size]
+
+    def completed(self):
+        """Boolean mask of trades that have an exit."""
+        return self.raw("exit_time") != NAT
+
+    def _times(self, ns):
+        times = pd.DatetimeIndex(ns.view("M8[ns]"))       # NAT stays NaT
+        return times.tz_localize("UTC").tz_convert(self.tz) if self.tz is not None else times
+
+    def columns(self, complete_only=True):
+        """
+        Trade columns rounded as in executed_trades.csv (no per-trade dicts involved).
+
+        Returns:
+            dict: column name → array (times as DatetimeIndex, labels as string arrays)
+        """
+        mask = self.completed() if complete_only else slice(None)
+        d = {name: self.raw(name)[mask] for name in _COLUMN_DTYPES}
+
+        out = {}
+        if self.group_name:
+            labels = np.asarray(self.group_labels, dtype=object)
+            out[self.group_name] = labels[d["group"]] if len(labels) else d["group"]
+        for name in TRADE_FIELDS:
+            if name in ("entry_time", "exit_time"):
+                out[name] = self._times(d[name])
+            elif name == "direction":
+                out[name] = np.where(d[name] == 1, "buy", "short").astype(object)
+            elif name == "divergence":
+                out[name] = np.asarray(DIVERGENCE_LABELS, dtype=object)[d[name]]
+            elif name == "entry_reason":
+                buy_text = np.asarray(_REASON_TEXT[1], dtype=object)
+                short_text = np.asarray(_REASON_TEXT[-1], dtype=object)
+                out[name] = np.where(d["direction"] == 1, buy_text[d["reason"]], short_text[d["reason"]])
+            elif name in EXCURSION_FIELDS and name in DECIMALS:
+                out[name] = np.round(d[name], DECIMALS[name]) + 0.0     # exits just past the SL: no "-0.0"
+            elif name in DECIMALS:
+                out[name] = np.round(d[name], DECIMALS[name])
+            else:
+                out[name] = d[name]
+        out["entry_bar"] = d["entry_bar"]
+        out["exit_bar"] = d["exit_bar"]
+        return out
+
+    def to_frame(self, complete_only=True, include_bars=False):
+        """Trades as a DataFrame in executed_trades.csv column order."""
+        cols = self.columns(complete_only)
+        names = ([self.group_name] if self.group_name else []) + TRADE_FIELDS
+        if include_bars:
+            names += ["entry_bar", "exit_bar"]
+        return pd.DataFrame({name: cols[name] for name in names})
+
+    def to_csv(self, path, complete_only=True, include_bars=False):
+        """Writes executed_trades.csv (same bytes as the csv.DictWriter export)."""
+        self.to_frame(complete_only, include_bars).to_csv(path, index=False, lineterminator="\r\n")
+
+    def to_parquet(self, path, complete_only=True):
+        """Writes the trades to Parquet (needs pyarrow or fastparquet)."""
+        self.to_frame(complete_only, include_bars=True).to_parquet(path, index=False)
+
+    def open_trades(self):
+        """Open (incomplete) trades as a list of dicts, for the incomplete-trades log."""
+        mask = ~self.completed()
+        if not mask.any():
+            return []
+        frame = self.to_frame(complete_only=False, include_bars=True)[mask]
+        exit_fields = ["exit_time", "exit_price", "profit", "return_pct", "exit_bar"] + EXCURSION_FIELDS
+        return frame.drop(columns=exit_fields).to_dict("records")
@@ -0,0 +1,281 @@
+import os
+import json
+import heapq
+import argparse
+import itertools
+from bisect import bisect_right
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine.backtest import _round, find_exit, timestamps_ns
+from engine.ledger import TradeLedger
+from engine.portfolio import load_symbol_bars
+from indicators.divergence import DIVERGENCE_LABELS
+from utils.signal_logic import ENTRY_CONDITIONS, condition_bits
+from analysis.performance_metrics import calculate_performance
+
+# Strategies simulated per bitmask word (one uint64 per bar and side)
+WORD_BITS = 64
+
+
+def strategy_name(conditions):
+    """e.g. ('rsi', 'divergence') → "rsi+divergence" (empty → "any")."""
+    return "+".join(conditions) or "any"
+
+
+def condition_mask(conditions):
+    """
+    Bitmask of the required entry conditions (bit k = ENTRY_CONDITIONS[k]).
+
+    Example:
+        condition_mask(['macd', 'divergence']) → 0b10010
+    """
+    mask = 0
+    for name in conditions:
+        if name not in ENTRY_CONDITIONS:
+            raise ValueError(f"Unknown entry condition '{name}', expected one of {ENTRY_CONDITIONS}")
+        mask |= 1 << ENTRY_CONDITIONS.index(name)
+    return mask
+
+
+def condition_combinations(conditions=ENTRY_CONDITIONS, required=()):
+    """
+    Every non-empty combination of entry conditions that contains `required`.
+
+    Parameters:
+        conditions (iterable): Conditions to combine
+        required (iterable): Conditions every strategy keeps
+
+    Returns:
+        List[tuple]: Condition tuples in ENTRY_CONDITIONS order
+
+    Example:
+        condition_combinations(('rsi', 'macd', 'divergence'), required=('divergence',))
+        → [('divergence',), ('rsi', 'divergence'), ('macd', 'divergence'), ('rsi', 'macd', 'divergence')]
+    """
+    required = set(required)
+    optional = [c for c in ENTRY_CONDITIONS if c in set(conditions) and c not in required]
+    fixed = [c for c in ENTRY_CONDITIONS if c in required]
+    combos = []
+    for size in range(len(optional) + 1):
+        for extra in itertools.combinations(optional, size):
+            combo = tuple(c for c in ENTRY_CONDITIONS if c in fixed or c in extra)
+            if combo:
+                combos.append(combo)
+    return combos
+
+
+def _signal_words(codes, valid, masks):
+    """
+    Per-bar bitsets of the strategies whose conditions all hold.
+
+    A bar's code takes one of 32 values, so each word is a table lookup:
+    table[code] has bit s set when (code & masks[s]) == masks[s].
+    """
+    codes_all = np.arange(1 << len(ENTRY_CONDITIONS), dtype=np.uint64)
+    table = np.zeros(len(codes_all), dtype=np.uint64)
+    for s, mask in enumerate(masks):
+        table |= ((codes_all & np.uint64(mask)) == mask).astype(np.uint64) << np.uint64(s)
+    words = table[codes]
+    words[~valid] = 0
+    return words
+
+
+def run_strategies(bars, config, strategies, start_bar=30):
+    """
+    Simulates many entry-rule combinations together over the same indicator arrays.
+
+    Every strategy trades the same way as `run_backtest` ("events" mode, identical
+    trades and capital), only the entry conditions differ. The conditions are
+    evaluated once for all bars (`condition_bits`); each bar then carries a bitset of
+    the strategies that would enter there. One chronological pass over those bars
+    updates the per-strategy state (flat / in trade, capital, open ledger row), which
+    lives in arrays of length N. Exits depend only on the entry bar and direction, so
+    strategies that enter together share one `find_exit` search.
+
+    Parameters:
+        bars (dict): Column arrays, see `frame_to_bars`
+        config (dict): Configuration values from config.json (shared by all strategies)
+        strategies (List[iterable]): Required conditions per strategy, names from ENTRY_CONDITIONS
+                                     (e.g. `condition_combinations()`)
+        start_bar (int): First bar to trade
+
+    Returns:
+        dict:
+            ledger (TradeLedger): Trades of all strategies in entry order, 'strategy' group column
+            strategies (List[str]): Strategy names (group labels)
+            available_capital (np.ndarray): Capital left per strategy
+            skipped (np.ndarray): Skipped entries per strategy
+
+    Example:
+        result = run_strategies(bars, config, [['divergence'], ['rsi', 'divergence']])
+        summarize(result)
+    """
+    strategies = [tuple(s) for s in strategies]
+    masks = [condition_mask(s) for s in strategies]
+    names = [strategy_name(s) for s in strategies]
+    n_strategies = len(strategies)
+
+    close = np.asarray(bars['close'], dtype=np.float64)
+    ts, tz = timestamps_ns(bars)
+    divergence = pd.Categorical(bars['divergence'], categories=DIVERGENCE_LABELS).codes
+    ledger = TradeLedger(tz=tz, group_name="strategy", group_labels=names)
+    buy_codes, short_codes, valid = condition_bits(bars, config)
+
+    sl_percent = config["stop_loss_percent"]
+    per_trade = config["capital"]["per_trade"]
+    capital = [config["capital"]["total_capital"]] * n_strategies
+    skipped = np.zeros(n_strategies, dtype=np.int64)
+    exits = {}                                        # (entry bar, direction) → exit bar
+
+    for first in range(0, n_strategies, WORD_BITS):
+        group = range(first, min(n_strategies, first + WORD_BITS))
+        buy = _signal_words(buy_codes, valid, masks[first:group.stop])
+        # BUY takes precedence over SHORT, like should_enter_trade
+        short = _signal_words(short_codes, valid, masks[first:group.stop]) & ~buy
+
+        candidates = np.flatnonzero((buy | short)[start_bar:]) + start_bar
+        _simulate_group(
+            bars, close, ts, divergence, ledger, group, candidates.tolist(),
+            buy[candidates].tolist(), short[candidates].tolist(),
+            capital, skipped, exits, sl_percent, per_trade
+        )
+
+    ledger.skipped = int(skipped.sum())
+    ledger.set_reasons(config)
+    ledger.set_excursions(close, sl_percent)
+    return {
+        "ledger": ledger,
+        "strategies": names,
+        "available_capital": np.asarray(capital, dtype=np.float64),
+        "skipped": skipped
+    }
+
+
+def _close(ledger, row, exit_bar, close, ts, capital, k, per_trade):
+    """Closes strategy k's trade (same arithmetic as `_TradeBook.exit`)."""
+    direction = int(ledger.raw("direction")[row])
+    entry_price = float(ledger.raw("entry_price")[row])
+    qty = float(ledger.raw("position_size")[row])
+    exit_price = float(close[exit_bar])
+    if direction == 1:
+        profit = (exit_price - entry_price) * qty
+    else:
+        profit = (entry_price - exit_price) * qty
+    return_pct = (profit / (entry_price * qty)) * 100 if qty > 0 else 0
+    capital[k] += (per_trade + profit)
+    ledger.close(row, exit_bar, ts[exit_bar], exit_price, profit, return_pct, capital[k])
+
+
+def _simulate_group(bars, close, ts, divergence, ledger, group, candidates, buy, short,
+                    capital, skipped, exits, sl_percent, per_trade):
+    """One pass over the candidate bars for up to WORD_BITS strategies (bit s = group[s])."""
+    flat = (1 << len(group)) - 1                      # bitset of strategies without a trade
+    rows = [-1] * len(group)
+    open_exits = []                                   # heap of (exit bar, bit)
+    pos, n_candidates = 0, len(candidates)
+
+    while pos < n_candidates:
+        i = candidates[pos]
+
+        # Trades that closed before this bar free their strategy (exit bar itself never re-enters)
+        while open_exits and open_exits[0][0] < i:
+            exit_bar, s = heapq.heappop(open_exits)
+            _close(ledger, rows[s], exit_bar, close, ts, capital, group[s], per_trade)
+            flat |= 1 << s
+
+        hits = (buy[pos] | short[pos]) & flat
+        while hits:
+            s = (hits & -hits).bit_length() - 1
+            hits &= hits - 1
+            k = group[s]
+            flat &= ~(1 << s)
+
+            if capital[k] < per_trade:
+                # Capital only changes on exits: every later signal of this strategy is skipped
+                bit = 1 << s
+                skipped[k] = sum(1 for b, sh in zip(buy[pos:], short[pos:]) if (b | sh) & bit)
+                continue
+
+            signal = 1 if buy[pos] >> s & 1 else -1
+            entry_price = float(close[i])
+            entry_sl = entry_price * (1 - sl_percent) if signal == 1 else entry_price * (1 + sl_percent)
+            qty = _round(per_trade / entry_price, 4)
+            capital[k] -= per_trade
+            rows[s] = ledger.open(
+                i, ts[i], signal, entry_price, qty, capital[k], entry_sl,
+                bars['rsi'][i], bars['macd'][i], bars['signal'][i], bars['+DI'][i], bars['-DI'][i],
+                bars['ADX'][i], divergence[i], group=k
+            )
+
+            if (i, signal) not in exits:
+                exits[(i, signal)] = find_exit(close, i, signal, sl_percent)
+            exit_bar = exits[(i, signal)]
+            if exit_bar is not None:                  # None: open until the end of data
+                heapq.heappush(open_exits, (exit_bar, s))
+
+        if flat:
+            pos += 1
+        elif open_exits:
+            # every strategy is in a trade: jump past the earliest exit
+            pos = bisect_right(candidates, open_exits[0][0], pos)
+        else:
+            break
+
+    while open_exits:
+        exit_bar, s = heapq.heappop(open_exits)
+        _close(ledger, rows[s], exit_bar, close, ts, capital, group[s], per_trade)
+
+
+def summarize(result):
+    """
+    Performance metrics per strategy.
+
+    Returns:
+        pd.DataFrame: One row per strategy (name, metrics, skipped entries, capital left),
+                      best total_profit first
+    """
+    trades = result['ledger'].columns()
+    rows = []
+    for k, name in enumerate(result['strategies']):
+        mask = trades['strategy'] == name
+        metrics = calculate_performance({"profit": trades['profit'][mask], "capital_left": trades['capital_left'][mask]})
+        rows.append({
+            "strategy": name,
+            **(metrics or {"total_trades": 0}),
+            "skipped_entries": int(result['skipped'][k]),
+            "available_capital": round(float(result['available_capital'][k]), 2)
+        })
+    results = pd.DataFrame(rows)
+    if "total_profit" in results.columns:
+        results = results.sort_values("total_profit", ascending=False, na_position="last")
+    return results.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest many entry-condition combinations in one pass")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--data", default=None, help="Candle CSV (default: config data_file)")
+    parser.add_argument("--conditions", nargs="+", default=list(ENTRY_CONDITIONS),
+                        help=f"Conditions to combine, from {ENTRY_CONDITIONS}")
+    parser.add_argument("--require", nargs="*", default=[], help="Conditions every strategy keeps")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    data_path = args.data or config.get("data_file", "data/nifty50_5minute_data.csv")
+
+    bars = load_symbol_bars(data_path, config)
+    strategies = condition_combinations(args.conditions, required=args.require)
+    print(f"🔀 Simulating {len(strategies)} strategies...")
+    result = run_strategies(bars, config, strategies, start_bar=bars['start_bar'])
+    results = summarize(result)
+
+    run_folder = f"output/multi_strategy_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(run_folder, exist_ok=True)
+    results.to_csv(f"{run_folder}/strategy_results.csv", index=False)
+    result['ledger'].to_csv(f"{run_folder}/executed_trades.csv")
+    print(results.head(10).to_string())
+    print(f"\n✅ {len(results)} strategies saved in: {run_folder}/strategy_results.csv")
@@ -0,0 +1,256 @@
+import os
+import glob
+import json
+import heapq
+import argparse
+from itertools import repeat
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from indicators.pipeline import add_indicators, warmup_bars, trim_warmup
+from engine.backtest import CapitalPool, _TradeBook, frame_to_bars, find_exit, open_positions, timestamps_ns
+from engine.ledger import TradeLedger
+from utils.event_log import EventLog
+from utils.candle_store import read_csv_window, rows_before
+from utils.signal_logic import entry_signals
+from utils.rule_engine import rule_columns
+from analysis.performance_metrics import calculate_performance
+
+DATA_SUFFIX = "_5minute_data.csv"
+
+
+def discover_symbols(data_dir, suffix=DATA_SUFFIX):
+    """
+    Finds one candle file per symbol in a folder.
+
+    Returns:
+        dict: symbol → CSV path, sorted by symbol
+
+    Example:
+        data/constituents/RELIANCE_5minute_data.csv → {"RELIANCE": ".../RELIANCE_5minute_data.csv"}
+    """
+    paths = sorted(glob.glob(os.path.join(data_dir, f"*{suffix}")))
+    return {os.path.basename(p)[:-len(suffix)]: p for p in paths}
+
+
+def load_symbol_bars(path, config):
+    """
+    Reads one symbol's candles, applies the backtest window and computes indicators.
+
+    Returns:
+        dict: Engine column arrays (see `frame_to_bars`) plus 'ts' (int64 UTC ns) for merging
+              and 'start_bar' (first tradable bar after the indicator warm-up)
+    """
+    start_time = config.get("backtest_start_time")
+    end_time = config.get("backtest_end_time")
+    if start_time and end_time:
+        # window plus the candles the indicators need to warm up
+        df = read_csv_window(path, start_time, end_time, lookback=warmup_bars(config))
+        warmup_rows = rows_before(df, start_time)
+    else:
+        df = read_csv_window(path)
+        warmup_rows = 0
+
+    df = add_indicators(df.reset_index(drop=True), config)
+    df, start_bar = trim_warmup(df, warmup_rows)
+    bars = frame_to_bars(df, extra=rule_columns(config))
+    bars['ts'] = pd.DatetimeIndex(df['timestamp']).as_unit('ns').asi8
+    bars['start_bar'] = start_bar
+    return bars
+
+
+def portfolio_equity(symbol_bars, ledger, total_capital, start_bar=30):
+    """
+    Bar-level mark-to-market equity of a portfolio run, on the union of the symbols' candle times.
+
+    Realized equity is `total_capital` plus the profits of the trades closed at or
+    before each time, in exit order (the pool's capital_left also has every other
+    open position deducted, so it is not an equity curve). Open positions of each
+    symbol are marked at that symbol's latest close at or before the time.
+
+    Parameters:
+        symbol_bars (dict): symbol → bars, in the ledger's group order
+        ledger (TradeLedger): Trades of `run_portfolio`
+        total_capital (float): Starting capital of the pool
+        start_bar (int): First bar of each symbol, unless its bars carry their own 'start_bar'
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): times (int64 ns), equity per time, and gross
+        position value per time (sum of |qty × close| over the open positions)
+
+    Example:
+        SYM0 long 1 @ 100 (close 104), SYM1 closed earlier for +30, capital 15000
+        → equity 15000 + 30 + 4 = 15034, position 104
+    """
+    ts = [timestamps_ns(bars)[0] for bars in symbol_bars.values()]
+    starts = [bars.get('start_bar', start_bar) for bars in symbol_bars.values()]
+    times = np.unique(np.concatenate([t[s:] for t, s in zip(ts, starts)])) if ts else np.array([], dtype=np.int64)
+
+    # realized: cumulative profit of the trades closed so far, in exit order
+    closed = ledger.completed()
+    exit_time = ledger.raw("exit_time")[closed]
+    order = np.argsort(exit_time, kind="stable")
+    realized = np.concatenate(([0.0], np.cumsum(ledger.raw("profit")[closed][order])))
+    equity = float(total_capital) + realized[np.searchsorted(exit_time[order], times, side="right")]
+    position = np.zeros(len(times))
+
+    # open positions, marked at each symbol's latest candle at or before every time
+    groups = ledger.raw("group")
+    signed_qty = ledger.raw("direction") * ledger.raw("position_size")
+    for g, (bars, symbol_ts) in enumerate(zip(symbol_bars.values(), ts)):
+        rows = np.flatnonzero(groups == g)
+        pnl, value = open_positions(np.asarray(bars['close'], dtype=np.float64), ledger.raw("entry_bar")[rows],
+                                    ledger.raw("exit_bar")[rows], signed_qty[rows], ledger.raw("entry_price")[rows])
+        bar = np.searchsorted(symbol_ts, times, side="right") - 1
+        seen = bar >= 0
+        equity[seen] += pnl[bar[seen]]
+        position[seen] += np.abs(value[bar[seen]])
+    return times, equity, position
+
+
+def run_portfolio(symbol_bars, config, start_bar=30, log=None):
+    """
+    Runs the strategy on many symbols at once, all drawing on one capital pool.
+
+    Each symbol can hold one trade at a time; every trade takes
+    `capital.per_trade` out of the shared `capital.total_capital` and gives it back
+    (plus PnL) on exit. Entry candidates from all symbols are merged by timestamp
+    with a heap merge of the per-symbol arrays, and exits are looked up with
+    `find_exit`, so only signal bars are visited. Within one timestamp, symbols are
+    processed in the order given (exits of earlier symbols free capital first).
+
+    Parameters:
+        symbol_bars (dict): symbol → bars from `load_symbol_bars`
+        config (dict): Configuration values from config.json
+        start_bar (int): First bar of each symbol to trade, unless its bars carry their own 'start_bar'
+        log (EventLog, optional): Receives every entry / exit / skip (with a 'symbol' field); silent by default
+
+    Returns:
+        dict:
+            ledger (TradeLedger): Trades in entry-time order with a 'symbol' column, plus skip count
+            stop_loss (dict): symbol → trailing SL per bar (NaN when flat)
+            available_capital (float): Pool capital at the end (open trades still deducted)
+            equity_times (np.ndarray[int64]): Union of the symbols' candle times (ns)
+            equity (np.ndarray): Mark-to-market portfolio equity per time (see `portfolio_equity`)
+            position (np.ndarray): Gross open position value per time
+
+    Example:
+        bars = {s: load_symbol_bars(p, config) for s, p in discover_symbols("data/constituents").items()}
+        result = run_portfolio(bars, config)
+    """
+    symbols = list(symbol_bars)
+    sl_percent = config["stop_loss_percent"]
+    pool = CapitalPool.from_config(config)
+    tz = timestamps_ns(symbol_bars[symbols[0]])[1] if symbols else None
+    ledger = TradeLedger(tz=tz, group_name="symbol", group_labels=symbols)
+    log = log if log is not None else EventLog.silent()
+
+    books, signals, trails, candidates = [], [], [], []
+    for symbol in symbols:
+        bars = symbol_bars[symbol]
+        books.append(_TradeBook(bars, config, log, pool=pool, ledger=ledger, group=len(books), tags={"symbol": symbol}))
+        sig = entry_signals(bars, config)
+        signals.append(sig)
+        trails.append(np.full(len(sig), np.nan))
+        first_bar = bars.get('start_bar', start_bar)
+        bar_idx = np.flatnonzero(sig[first_bar:]) + first_bar
+        candidates.append(zip(bars['ts'][bar_idx].tolist(), repeat(len(candidates)), bar_idx.tolist()))
+
+    open_until = [-1] * len(symbols)   # exit bar of the open trade per symbol
+    exits = []                          # heap of (exit ts, symbol index, exit bar)
+
+    for ts, s, i in heapq.merge(*candidates):
+        # release capital of trades that closed before this candle (or earlier in its symbol order)
+        while exits and (exits[0][0], exits[0][1]) < (ts, s):
+            _, sx, exit_bar = heapq.heappop(exits)
+            books[sx].exit(exit_bar)
+
+        if i <= open_until[s]:
+            continue                                   # this symbol is still in a trade
+        if not books[s].can_enter():
+            books[s].skip(i)
+            continue
+
+        signal = int(signals[s][i])
+        books[s].enter(i, signal)
+        exit_bar = find_exit(books[s].close, i, signal, sl_percent, out=trails[s])
+        if exit_bar is None:
+            open_until[s] = len(signals[s])           # open until the end of data
+        else:
+            open_until[s] = exit_bar
+            heapq.heappush(exits, (int(symbol_bars[symbols[s]]['ts'][exit_bar]), s, exit_bar))
+
+    while exits:
+        _, sx, exit_bar = heapq.heappop(exits)
+        books[sx].exit(exit_bar)
+
+    ledger.set_reasons(config)
+    groups = ledger.raw("group")
+    for g, book in enumerate(books):
+        ledger.set_excursions(book.close, sl_percent, rows=np.flatnonzero(groups == g))
+
+    times, equity, position = portfolio_equity(symbol_bars, ledger, config["capital"]["total_capital"], start_bar)
+    return {
+        "ledger": ledger,
+        "stop_loss": dict(zip(symbols, trails)),
+        "available_capital": pool.available_capital,
+        "equity_times": times,
+        "equity": equity,
+        "position": position
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the strategy on many symbols with one capital pool")
+    parser.add_argument("--data-dir", default="data/constituents", help=f"Folder of <SYMBOL>{DATA_SUFFIX} files")
+    parser.add_argument("--config", default="config.json")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    symbol_files = discover_symbols(args.data_dir)
+    if not symbol_files:
+        raise SystemExit(f"No *{DATA_SUFFIX} files found in {args.data_dir}")
+
+    print(f"📥 Loading {len(symbol_files)} symbols...")
+    symbol_bars = {symbol: load_symbol_bars(path, config) for symbol, path in symbol_files.items()}
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_folder = f"output/portfolio_run_{timestamp}"
+    os.makedirs(run_folder, exist_ok=True)
+
+    # Trade events go to trade_events.jsonl only (one console line per trade is too much here)
+    with EventLog.from_config(config, path=f"{run_folder}/trade_events.jsonl", echo=False) as log:
+        result = run_portfolio(symbol_bars, config, log=log)
+    ledger = result['ledger']
+    trades = ledger.columns()
+
+    ledger.to_csv(f"{run_folder}/executed_trades.csv")
+
+    # Drawdown and ratios from the mark-to-market portfolio equity (pool cash is not equity:
+    # it has every other open position deducted)
+    metrics = calculate_performance(trades, equity=result['equity'], position=result['position'])
+    per_symbol = {}
+    for symbol in symbol_files:
+        symbol_profit = trades["profit"][trades["symbol"] == symbol]
+        per_symbol[symbol] = {
+            "trades": len(symbol_profit),
+            "total_profit": round(float(sum(symbol_profit.tolist())), 2)
+        }
+
+    with open(f"{run_folder}/performance_summary.json", "w") as f:
+        json.dump({
+            "summary_metrics": metrics,
+            "skipped_entries": ledger.skipped,
+            "per_symbol": per_symbol,
+            "run_timestamp": timestamp,
+            "capital_used": config["capital"]
+        }, f, indent=4, default=float)
+
+    print("\n--- PORTFOLIO PERFORMANCE ---")
+    for k, v in metrics.items():
+        print(f"{k}: {v}")
+    print(f"\n✅ Logs saved in: {run_folder}")
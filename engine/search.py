@@ -0,0 +1,140 @@
+import os
+import json
+import math
+import argparse
+from itertools import repeat
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from engine.sweep import (expand_grid, get_param, load_candle_arrays, share_candles,
+                          _attach_candles, _group_configs, _run_group)
+
+# Share of the candle history each rung backtests: growing windows from the first candle
+DEFAULT_RUNGS = (0.25, 0.5, 1.0)
+
+# 1 / ETA of the configs survive each rung
+DEFAULT_ETA = 3
+
+
+def rank_results(results, metric="total_profit"):
+    """
+    Orders one rung's results: completed runs by `metric` (best first), then runs
+    without trades, then runs stopped by "early_abort".
+    """
+    results = results.copy()
+    results["_aborted"] = results["aborted"].astype(bool) if "aborted" in results.columns else False
+    if metric not in results.columns:
+        results[metric] = float("nan")
+    results = results.sort_values(["_aborted", metric], ascending=[True, False], na_position="last")
+    return results.drop(columns="_aborted").reset_index(drop=True)
+
+
+def successive_halving(grid, base_config, data_path, rungs=DEFAULT_RUNGS, eta=DEFAULT_ETA,
+                       metric="total_profit", max_workers=None, mode="events"):
+    """
+    Parameter search that spends full-history backtests only on promising configs.
+
+    Every config of the grid is first backtested on the earliest `rungs[0]` share of
+    the candles. The best 1 / `eta` (by `metric`) move on to the next, longer window,
+    and so on until the last rung. Runs stopped by config "early_abort" are dropped
+    at once, so set limits such as max_drawdown_percent to prune bad configs early.
+    Indicators and backtests use the same worker pool and shared-memory candles as
+    `run_sweep`. Rungs are shares of the full history: backtest_start_time /
+    backtest_end_time are not applied.
+
+    Parameters:
+        grid (dict): dotted key → values spec, as for `run_sweep`
+        base_config (dict): config.json contents (including "early_abort")
+        data_path (str): Candle CSV
+        rungs (tuple): Growing shares of the history, the last one usually 1.0
+        eta (int): Reduction factor per rung
+        metric (str): Column of `calculate_performance` to maximize
+        max_workers (int): Worker processes (default: all cores)
+        mode (str): Backtest mode passed to run_backtest
+
+    Returns:
+        (pd.DataFrame, pd.DataFrame): Last rung's results (best first), and every rung's
+                                      results with 'rung' and 'bars' columns
+
+    Example:
+        81 configs, rungs (0.25, 0.5, 1.0), eta 3
+        → 81 runs on 25% of the data, 27 on 50%, 9 on 100% (≈ 43 full-length runs instead of 81)
+    """
+    if not rungs or any(not 0 < r <= 1 for r in rungs) or list(rungs) != sorted(rungs):
+        raise ValueError(f"rungs must be increasing shares of the history in (0, 1], got {rungs}")
+    if eta < 2:
+        raise ValueError(f"eta must be at least 2, got {eta}")
+
+    configs = expand_grid(grid, base_config)
+    keys = list(grid)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    candles, tz = load_candle_arrays(data_path)
+    n_bars = len(candles['close'])
+    blocks, specs = share_candles(candles)
+    del candles
+
+    history = []
+    survivors = configs
+    ranked = pd.DataFrame()
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_candles, initargs=(specs, tz)) as pool:
+            for rung, share in enumerate(rungs):
+                stop = max(1, int(round(n_bars * share)))
+                print(f"🪜 Rung {rung + 1}/{len(rungs)}: {len(survivors)} configs on {stop} candles")
+
+                max_group = max(1, -(-len(survivors) // (max_workers * 4)))
+                tasks = _group_configs(survivors, keys, max_group)
+                rows = []
+                for task_rows in pool.map(_run_group, tasks, repeat(mode), repeat(stop)):
+                    rows.extend(task_rows)
+
+                ranked = rank_results(pd.DataFrame(rows), metric)
+                history.append(ranked.assign(rung=rung, bars=stop))
+                if rung == len(rungs) - 1:
+                    break
+
+                completed = ranked[~ranked["aborted"].astype(bool)]
+                keep = min(len(completed), math.ceil(len(survivors) / eta))
+                kept = set(completed[keys].head(keep).itertuples(index=False, name=None))
+                survivors = [c for c in survivors if tuple(get_param(c, k) for k in keys) in kept]
+                if not survivors:
+                    print("⛔ Every config was aborted, stopping the search")
+                    break
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    return ranked, pd.concat(history, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving parameter search over growing data windows")
+    parser.add_argument("--grid", default="sweep_grid.json", help="JSON file: dotted key → list or {start, stop, step}")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--data", default="data/nifty50_5minute_data.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rungs", type=float, nargs="+", default=list(DEFAULT_RUNGS), help="Shares of the history per rung")
+    parser.add_argument("--eta", type=int, default=DEFAULT_ETA, help="Keep 1/eta of the configs per rung")
+    parser.add_argument("--metric", default="total_profit")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        base_config = json.load(f)
+    with open(args.grid) as f:
+        grid = json.load(f)
+
+    results, history = successive_halving(
+        grid, base_config, args.data, rungs=tuple(args.rungs), eta=args.eta, metric=args.metric,
+        max_workers=args.workers, mode=base_config.get("backtest_mode", "events")
+    )
+
+    run_folder = f"output/search_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(run_folder, exist_ok=True)
+    results.to_csv(f"{run_folder}/search_results.csv", index=False)
+    history.to_csv(f"{run_folder}/search_history.csv", index=False)
+    print(results.head(10).to_string())
+    print(f"\n✅ {len(results)} finalists saved in: {run_folder}/search_results.csv")
@@ -0,0 +1,360 @@
+import os
+import copy
+import json
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from indicators import batch
+from indicators.divergence import DIVERGENCE_LABELS, divergence_codes
+from indicators.planner import NODES, evaluate
+from indicators.pipeline import MIN_START_BAR, warmup_bars
+from engine.backtest import frame_to_bars, run_backtest, slice_bars
+from analysis.performance_metrics import calculate_performance
+from utils.candle_store import read_csv_window, to_ns
+from utils.event_log import EventLog
+from utils.rule_engine import rule_columns
+
+# Parameters that can be swept (dotted paths into config.json)
+SWEEP_KEYS = [
+    "rsi.period", "macd.fast", "macd.slow", "macd.signal", "dmi.period",
+    "stop_loss_percent", "min_adx_strength"
+]
+
+# Parameters that change the indicator values (the others only change the simulation)
+INDICATOR_KEYS = ["rsi.period", "macd.fast", "macd.slow", "macd.signal", "dmi.period"]
+
+# Indicator parameters computed for many values at once (indicators/batch.py);
+# a task holds one value of every other indicator key
+BATCHED_KEYS = ["rsi.period", "dmi.period"]
+BATCHED_OUTPUTS = ('rsi', 'divergence', '+DI', '-DI', 'ADX')
+
+CANDLE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Column arrays attached from shared memory, one set per worker process, their timezone
+# and the first row of the backtest window (0 = full history)
+_CANDLES = None
+_SEGMENTS = []
+_TZ = None
+_WINDOW_START = 0
+
+
+def expand_values(spec):
+    """
+    Turns one grid entry into a list of values.
+
+    Parameters:
+        spec (list | dict | number): Explicit values, or {"start", "stop", "step"} (stop inclusive)
+
+    Returns:
+        list: Values to try
+
+    Example:
+        {"start": 0.01, "stop": 0.03, "step": 0.01} → [0.01, 0.02, 0.03]
+    """
+    if isinstance(spec, dict):
+        start, stop, step = spec["start"], spec["stop"], spec.get("step", 1)
+        count = int(round((stop - start) / step)) + 1
+        values = [start + k * step for k in range(count)]
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return values
+        return [round(v, 10) for v in values]
+    if isinstance(spec, list):
+        return spec
+    return [spec]
+
+
+def set_param(config, dotted_key, value):
+    """Sets e.g. "macd.fast" inside a nested config dict."""
+    *parents, leaf = dotted_key.split(".")
+    node = config
+    for key in parents:
+        node = node[key]
+    node[leaf] = value
+
+
+def get_param(config, dotted_key):
+    node = config
+    for key in dotted_key.split("."):
+        node = node[key]
+    return node
+
+
+def expand_grid(grid, base_config):
+    """
+    Builds one config per combination of the grid values.
+
+    Parameters:
+        grid (dict): dotted key → values spec (see `expand_values`)
+        base_config (dict): config.json contents used for every other setting
+
+    Returns:
+        List[dict]: Full configs (deep copies of base_config)
+
+    Example:
+        expand_grid({"rsi.period": [10, 14], "stop_loss_percent": [0.01, 0.02]}, config)
+        → 4 configs
+    """
+    unknown = [k for k in grid if k not in SWEEP_KEYS]
+    if unknown:
+        raise ValueError(f"Unsupported sweep parameter(s): {unknown}. Allowed: {SWEEP_KEYS}")
+
+    keys = list(grid)
+    configs = []
+    for combo in itertools.product(*(expand_values(grid[k]) for k in keys)):
+        config = copy.deepcopy(base_config)
+        for key, value in zip(keys, combo):
+            set_param(config, key, value)
+        # MACD needs the fast EMA to be faster than the slow one
+        if config["macd"]["fast"] >= config["macd"]["slow"]:
+            continue
+        configs.append(config)
+    return configs
+
+
+def load_candle_arrays(data_path, start_time=None, end_time=None, lookback=0):
+    """
+    Reads the candle CSV once into plain column arrays.
+
+    Timestamps are parsed like main.py does (pd.to_datetime, no UTC conversion), so
+    naive exchange times stay naive and tz-aware ones keep their timezone. With a
+    window, only its rows plus `lookback` earlier warm-up rows are read.
+
+    Returns:
+        (dict, tzinfo or None): 'timestamp' (int64 ns: UTC for tz-aware data, wall-clock
+        for naive data) and float64 OHLCV columns, and the timezone of the timestamps
+    """
+    df = read_csv_window(data_path, start_time, end_time, lookback=lookback)
+    timestamps = pd.DatetimeIndex(df['timestamp']).as_unit('ns')
+    candles = {'timestamp': timestamps.asi8}
+    for col in CANDLE_COLUMNS:
+        candles[col] = df[col].to_numpy(dtype=np.float64)
+    return candles, timestamps.tz
+
+
+def candle_times(ns, tz=None):
+    """
+    Datetimes of int64 candle timestamps from `load_candle_arrays`, in the data's timezone.
+
+    Example:
+        candles, tz = load_candle_arrays(path)
+        candle_times(candles['timestamp'], tz)   → same values as pd.to_datetime(df['timestamp'])
+    """
+    times = pd.DatetimeIndex(np.asarray(ns, dtype=np.int64).view("M8[ns]"))
+    return times.tz_localize("UTC").tz_convert(tz) if tz is not None else times
+
+
+def share_candles(candles):
+    """
+    Copies candle arrays into named shared-memory blocks.
+
+    Returns:
+        (List[SharedMemory], List[tuple]): the blocks (keep them alive, unlink when done)
+        and picklable (column, block name, length, dtype) specs for the workers
+    """
+    blocks, specs = [], []
+    for col, arr in candles.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        specs.append((col, shm.name, len(arr), arr.dtype.str))
+    return blocks, specs
+
+
+def _attach_candles(specs, tz=None, window_start=0):
+    """Worker initializer: maps the shared candle arrays without copying them."""
+    global _CANDLES, _SEGMENTS, _TZ, _WINDOW_START
+    _CANDLES, _SEGMENTS, _TZ, _WINDOW_START = {}, [], tz, window_start
+    for col, name, length, dtype in specs:
+        # pool workers share the parent's resource tracker, which unlinks the blocks once
+        shm = shared_memory.SharedMemory(name=name)
+        _SEGMENTS.append(shm)
+        _CANDLES[col] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def variant_bars(variants, stop=None):
+    """
+    Yields (params, config, bars) per variant, computing indicators once for all of them.
+
+    Variants share MACD parameters. RSI and DMI are computed for all their periods in
+    one batch (shared cumulative sums); the bar arrays of each (rsi, dmi) period pair
+    are built once and yielded for every stop-loss / ADX variant on top of it.
+    Reads the candles attached by `_attach_candles`; `stop` limits them to the first
+    `stop` rows.
+
+    With a backtest window (`run_sweep`), indicators start `warmup_bars` candles
+    before it, as in main.py, and the yielded bars cover the window only, with the
+    first bar to trade in bars['start_bar'] (see `trim_warmup`).
+    """
+    first = max(0, _WINDOW_START - max(warmup_bars(config) for _, config in variants)) if _WINDOW_START else 0
+    warmup_rows = _WINDOW_START - first
+    candles = {col: arr[first:stop] for col, arr in _CANDLES.items()}
+    df = pd.DataFrame({col: candles[col] for col in CANDLE_COLUMNS}, copy=False)
+    df.insert(0, 'timestamp', candle_times(candles['timestamp'], _TZ))
+    close = candles['close']
+
+    rsi_periods = sorted({get_param(config, "rsi.period") for _, config in variants})
+    dmi_periods = sorted({get_param(config, "dmi.period") for _, config in variants})
+    rsi = batch.rsi_periods(close, rsi_periods)
+    dmi = batch.dmi_periods(candles['high'], candles['low'], close, dmi_periods)
+    # MACD plus any other column the entry rules read (e.g. ema)
+    config = variants[0][1]
+    extra = rule_columns(config)
+    outputs = ('macd', 'signal') + tuple(c for c in extra if c in NODES and c not in BATCHED_OUTPUTS + ('macd', 'signal'))
+    for name, values in evaluate(df, config, outputs).items():
+        df[name] = values
+
+    divergence, bars, bars_key = {}, None, None
+    for params, config in variants:
+        rsi_period, dmi_period = (get_param(config, k) for k in BATCHED_KEYS)
+        if (rsi_period, dmi_period) != bars_key:
+            i, j = rsi_periods.index(rsi_period), dmi_periods.index(dmi_period)
+            if rsi_period not in divergence:
+                divergence[rsi_period] = divergence_codes(close, rsi[:, i])
+            df['rsi'] = rsi[:, i]
+            df['divergence'] = pd.Categorical.from_codes(divergence[rsi_period], categories=DIVERGENCE_LABELS)
+            for name in ('+DI', '-DI', 'ADX'):
+                df[name] = dmi[name][:, j]
+            bars, bars_key = frame_to_bars(df, extra=extra), (rsi_period, dmi_period)
+            if _WINDOW_START:
+                bars = slice_bars(bars, warmup_rows, None)
+                bars['start_bar'] = max(0, MIN_START_BAR - warmup_rows)
+        yield params, config, bars
+
+
+def backtest_metrics(bars, config, mode, start_bar=30):
+    """
+    Silent backtest reduced to its performance metrics.
+
+    Returns:
+        (dict, TradeLedger): `calculate_performance` metrics plus "aborted" (early-abort
+                             reason, "" when the run completed), and the trade ledger
+    """
+    result = run_backtest(bars, config, start_bar=start_bar, mode=mode, log=EventLog.silent())
+    metrics = calculate_performance(result['ledger'].columns(), equity=result['equity'],
+                                    position=result['position']) or {"total_trades": 0}
+    aborted = result['aborted']
+    return {**metrics, "aborted": aborted["reason"] if aborted else ""}, result['ledger']
+
+
+def _run_group(variants, mode, stop=None):
+    """
+    Worker task: backtests every variant on indicators computed once for the group
+    (see `variant_bars`). `stop` limits the run to the first `stop` candles (search windows).
+    Backtests stopped by config "early_abort" report the metrics of their closed trades.
+    """
+    results = []
+    for params, config, bars in variant_bars(variants, stop):
+        metrics, _ = backtest_metrics(bars, config, mode, start_bar=bars.get('start_bar', MIN_START_BAR))
+        results.append({**params, **metrics})
+    return results
+
+
+def _group_configs(configs, keys, max_group):
+    """
+    Groups configs by their non-batched indicator parameters (MACD), ordered by
+    RSI / DMI period so each piece of a split group covers few period pairs.
+    """
+    shared_keys = [k for k in INDICATOR_KEYS if k not in BATCHED_KEYS]
+    groups = {}
+    for config in configs:
+        group_key = tuple(get_param(config, k) for k in shared_keys)
+        params = {k: get_param(config, k) for k in keys}
+        groups.setdefault(group_key, []).append((params, config))
+
+    tasks = []
+    for variants in groups.values():
+        variants.sort(key=lambda variant: tuple(get_param(variant[1], k) for k in BATCHED_KEYS))
+        for start in range(0, len(variants), max_group):
+            tasks.append(variants[start:start + max_group])
+    return tasks
+
+
+def run_sweep(grid, base_config, data_path, max_workers=None, mode="events"):
+    """
+    Backtests every combination of a parameter grid in parallel.
+
+    The candles are read once and placed in shared memory; each worker process maps
+    them without copying, computes RSI / DMI for all periods of a task in one batch and
+    runs all stop-loss / ADX variants on top of them. backtest_start_time /
+    backtest_end_time of base_config are applied like main.py does (window plus the
+    indicators' warm-up), so each row matches a main.py run of that config.
+
+    Parameters:
+        grid (dict): dotted key → values spec, e.g. {"rsi.period": {"start": 5, "stop": 50, "step": 5}}
+        base_config (dict): config.json contents
+        data_path (str): Candle CSV
+        max_workers (int): Worker processes (default: all cores)
+        mode (str): Backtest mode passed to run_backtest
+
+    Returns:
+        pd.DataFrame: One row per configuration (swept parameters + performance metrics),
+                      best total_profit first
+
+    Example:
+        results = run_sweep({"stop_loss_percent": [0.01, 0.02, 0.03]}, config, "data/nifty50_5minute_data.csv")
+    """
+    configs = expand_grid(grid, base_config)
+    max_workers = max_workers or os.cpu_count() or 1
+    # a few tasks per worker keeps all cores busy until the end
+    max_group = max(1, -(-len(configs) // (max_workers * 4)))
+    tasks = _group_configs(configs, list(grid), max_group)
+
+    start_time = base_config.get("backtest_start_time")
+    end_time = base_config.get("backtest_end_time")
+    if start_time and end_time:
+        lookback = max(warmup_bars(config) for config in configs)
+        candles, tz = load_candle_arrays(data_path, start_time, end_time, lookback=lookback)
+        window_start = int(np.searchsorted(candles['timestamp'], to_ns(start_time, tz)))
+    else:
+        candles, tz = load_candle_arrays(data_path)
+        window_start = 0
+    blocks, specs = share_candles(candles)
+    del candles
+
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_candles,
+                                 initargs=(specs, tz, window_start)) as pool:
+            futures = [pool.submit(_run_group, variants, mode) for variants in tasks]
+            for done, future in enumerate(as_completed(futures), start=1):
+                rows.extend(future.result())
+                print(f"\r🔁 Sweep progress: {done}/{len(futures)} tasks", end="", flush=True)
+        print()
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    results = pd.DataFrame(rows)
+    if "total_profit" in results.columns:
+        results = results.sort_values("total_profit", ascending=False, na_position="last")
+    return results.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep over config.json values")
+    parser.add_argument("--grid", default="sweep_grid.json", help="JSON file: dotted key → list or {start, stop, step}")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--data", default="data/nifty50_5minute_data.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        base_config = json.load(f)
+    with open(args.grid) as f:
+        grid = json.load(f)
+
+    results = run_sweep(grid, base_config, args.data, max_workers=args.workers,
+                        mode=base_config.get("backtest_mode", "events"))
+
+    run_folder = f"output/sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(run_folder, exist_ok=True)
+    results.to_csv(f"{run_folder}/sweep_results.csv", index=False)
+    print(results.head(10).to_string())
+    print(f"\n✅ {len(results)} configurations saved in: {run_folder}/sweep_results.csv")
@@ -0,0 +1,232 @@
+import os
+import json
+import argparse
+from itertools import repeat
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine.backtest import slice_bars
+from engine.search import rank_results
+from engine.sweep import (expand_grid, get_param, load_candle_arrays, candle_times, share_candles, _attach_candles,
+                          _group_configs, variant_bars, backtest_metrics)
+from indicators.pipeline import MIN_START_BAR
+from analysis.performance_metrics import calculate_performance
+
+# Rolling window lengths in trading days
+DEFAULT_TRAIN_DAYS = 60
+DEFAULT_TEST_DAYS = 20
+
+NS_PER_DAY = 86_400 * 10**9
+
+
+def make_folds(timestamps, train_days=DEFAULT_TRAIN_DAYS, test_days=DEFAULT_TEST_DAYS):
+    """
+    Splits the candles into rolling train / test windows of whole trading days.
+
+    Each test window directly follows its train window; the next fold moves both
+    forward by `test_days`, so the test windows tile the history after the first
+    train window without overlapping. The last test window may be shorter.
+
+    Parameters:
+        timestamps (np.ndarray[int64]): Candle times in ns (`load_candle_arrays`)
+        train_days (int): Trading days to optimise on
+        test_days (int): Trading days to evaluate out-of-sample
+
+    Returns:
+        List[dict]: {"fold", "train": (start_bar, stop_bar), "test": (start_bar, stop_bar)}
+
+    Example:
+        100 trading days, train 60, test 20
+        → fold 0: train days 0-59, test 60-79; fold 1: train 20-79, test 80-99
+    """
+    if train_days < 1 or test_days < 1:
+        raise ValueError("train_days and test_days must be at least 1")
+    days = np.asarray(timestamps, dtype=np.int64) // NS_PER_DAY   # NSE sessions fall inside one UTC date
+    day_starts = np.flatnonzero(np.diff(days, prepend=days[0] - 1)) if len(days) else np.array([], dtype=np.int64)
+    bounds = np.append(day_starts, len(days))
+    n_days = len(day_starts)
+
+    folds = []
+    first = 0
+    while first + train_days < n_days:
+        split = first + train_days
+        folds.append({
+            "fold": len(folds),
+            "train": (int(bounds[first]), int(bounds[split])),
+            "test": (int(bounds[split]), int(bounds[min(n_days, split + test_days)])),
+        })
+        first += test_days
+    return folds
+
+
+def _start_bar(start):
+    """Only the very first candles of the history lack indicator warm-up."""
+    return max(0, MIN_START_BAR - start)
+
+
+def _train_group(variants, mode, windows):
+    """
+    Worker task: computes the group's indicators once on the history, then backtests
+    every variant on every train window (bar slices of the same arrays).
+    """
+    rows = []
+    for params, config, bars in variant_bars(variants, stop=max(stop for _, stop in windows)):
+        for fold, (start, stop) in enumerate(windows):
+            metrics, _ = backtest_metrics(slice_bars(bars, start, stop), config, mode, start_bar=_start_bar(start))
+            rows.append({"fold": fold, **params, **metrics})
+    return rows
+
+
+def _test_config(params, config, mode, folds):
+    """
+    Worker task: runs one config on the test windows of the folds it won.
+
+    Returns:
+        list: (fold, metrics, trades DataFrame with entry_bar / exit_bar in full-history bars)
+    """
+    runs = []
+    for _, _, bars in variant_bars([(params, config)], stop=max(f["test"][1] for f in folds)):
+        for f in folds:
+            start, stop = f["test"]
+            metrics, ledger = backtest_metrics(slice_bars(bars, start, stop), config, mode, start_bar=_start_bar(start))
+            trades = ledger.to_frame(include_bars=True)
+            trades["entry_bar"] += start
+            trades["exit_bar"] += start
+            runs.append((f["fold"], metrics, trades))
+    return runs
+
+
+def walk_forward(grid, base_config, data_path, train_days=DEFAULT_TRAIN_DAYS, test_days=DEFAULT_TEST_DAYS,
+                 metric="total_profit", max_workers=None, mode="events"):
+    """
+    Walk-forward optimisation: tune on each train window, trade the next test window.
+
+    1. Every grid config is backtested on every train window in parallel. A worker task
+       computes its indicators once on the full history and slices them per fold
+       (indicators only look back, so the values match a per-window computation
+       after the warm-up).
+    2. The best config per fold (by `metric`; early-aborted runs rank last) is run on
+       the fold's test window, again on shared indicator arrays.
+    3. The out-of-sample trades are stitched in fold order. Each test window starts
+       flat with `capital.total_capital`; the stitched equity curve adds up the
+       realized profits of all folds.
+
+    Folds tile the full history: backtest_start_time / backtest_end_time are not applied.
+
+    Parameters:
+        grid (dict): dotted key → values spec, as for `run_sweep`
+        base_config (dict): config.json contents
+        data_path (str): Candle CSV
+        train_days, test_days (int): Window lengths in trading days
+        metric (str): Column of `calculate_performance` to maximize on the train window
+        max_workers (int): Worker processes (default: all cores)
+        mode (str): Backtest mode passed to run_backtest
+
+    Returns:
+        dict:
+            folds (pd.DataFrame): Per fold: window times, chosen params, train metric, test metrics
+            trades (pd.DataFrame): Out-of-sample trades with 'fold' and stitched 'equity' columns
+            metrics (dict): `calculate_performance` of the stitched out-of-sample trades
+
+    Example:
+        wf = walk_forward({"rsi.period": [10, 14, 20], "stop_loss_percent": [0.01, 0.02]}, config, "data/nifty50_5minute_data.csv")
+        wf['folds'][['fold', 'rsi.period', 'test_total_profit']]
+    """
+    configs = expand_grid(grid, base_config)
+    keys = list(grid)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    candles, tz = load_candle_arrays(data_path)
+    folds = make_folds(candles['timestamp'], train_days, test_days)
+    if not folds:
+        raise ValueError(f"Not enough data for one fold of {train_days} + {test_days} trading days")
+    times = candle_times(candles['timestamp'], tz)
+    blocks, specs = share_candles(candles)
+    del candles
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_candles, initargs=(specs, tz)) as pool:
+            # 1. in-sample: every config on every train window
+            print(f"🏋️ Training {len(configs)} configs on {len(folds)} folds")
+            max_group = max(1, -(-len(configs) // (max_workers * 4)))
+            windows = [f["train"] for f in folds]
+            rows = []
+            for task_rows in pool.map(_train_group, _group_configs(configs, keys, max_group), repeat(mode), repeat(windows)):
+                rows.extend(task_rows)
+            train = pd.DataFrame(rows)
+
+            # 2. best config per fold
+            winners = {}
+            for f in folds:
+                ranked = rank_results(train[train["fold"] == f["fold"]].drop(columns="fold"), metric)
+                best = ranked.iloc[0]
+                f["params"] = dict(zip(keys, best[keys].tolist()))
+                f["train_metric"] = best[metric]
+                winners.setdefault(tuple(f["params"].values()), []).append(f)
+
+            # 3. out-of-sample: each winner on the test windows it was chosen for
+            print(f"🧪 Testing {len(winners)} distinct winning configs")
+            config_of = {tuple(get_param(c, k) for k in keys): c for c in configs}
+            futures = [pool.submit(_test_config, dict(zip(keys, key)), config_of[key], mode, won)
+                       for key, won in winners.items()]
+            test_runs = sorted((run for future in futures for run in future.result()), key=lambda run: run[0])
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    summary = []
+    for (fold, metrics, _), f in zip(test_runs, folds):
+        (train_start, train_stop), (test_start, test_stop) = f["train"], f["test"]
+        summary.append({
+            "fold": fold,
+            "train_start": times[train_start], "train_end": times[train_stop - 1],
+            "test_start": times[test_start], "test_end": times[test_stop - 1],
+            **f["params"],
+            f"train_{metric}": f["train_metric"],
+            **{f"test_{k}": v for k, v in metrics.items()},
+        })
+
+    trades = pd.concat([t.assign(fold=fold) for fold, _, t in test_runs], ignore_index=True)
+    trades["equity"] = base_config["capital"]["total_capital"] + trades["profit"].cumsum()
+    metrics = calculate_performance({"profit": trades["profit"].to_numpy(), "capital_left": trades["equity"].to_numpy()},
+                                    initial_capital=base_config["capital"]["total_capital"])
+    return {"folds": pd.DataFrame(summary), "trades": trades, "metrics": metrics}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward optimisation over rolling train / test windows")
+    parser.add_argument("--grid", default="sweep_grid.json", help="JSON file: dotted key → list or {start, stop, step}")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--data", default="data/nifty50_5minute_data.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--train-days", type=int, default=DEFAULT_TRAIN_DAYS)
+    parser.add_argument("--test-days", type=int, default=DEFAULT_TEST_DAYS)
+    parser.add_argument("--metric", default="total_profit")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        base_config = json.load(f)
+    with open(args.grid) as f:
+        grid = json.load(f)
+
+    wf = walk_forward(grid, base_config, args.data, train_days=args.train_days, test_days=args.test_days,
+                      metric=args.metric, max_workers=args.workers, mode=base_config.get("backtest_mode", "events"))
+
+    run_folder = f"output/walk_forward_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    os.makedirs(run_folder, exist_ok=True)
+    wf['folds'].to_csv(f"{run_folder}/folds.csv", index=False)
+    wf['trades'].to_csv(f"{run_folder}/oos_trades.csv", index=False)
+    wf['trades'][['exit_time', 'fold', 'equity']].to_csv(f"{run_folder}/oos_equity.csv", index=False)
+    with open(f"{run_folder}/oos_summary.json", "w") as f:
+        json.dump({"oos_metrics": wf['metrics'], "folds": len(wf['folds']), "grid": grid,
+                   "train_days": args.train_days, "test_days": args.test_days}, f, indent=4, default=float)
+
+    print(wf['folds'].to_string())
+    print("\n--- OUT-OF-SAMPLE PERFORMANCE ---")
+    for k, v in wf['metrics'].items():
+        print(f"{k}: {v}")
+    print(f"\n✅ Walk-forward results saved in: {run_folder}")
@@ -0,0 +1,157 @@
+import numpy as np
+
+from indicators import kernels
+
+# Same block as the single-period kernels, so batch columns are bit-identical to them
+DEFAULT_BLOCK = 1024
+
+# Blocks per piece when looping over periods: the temporaries of one piece
+# (64K bars × 8 bytes) stay in the CPU cache across all periods
+CHUNK_BLOCKS = 64
+
+
+def _block(windows):
+    return max(DEFAULT_BLOCK, max(windows))
+
+
+def _chunks(prefix):
+    """(first, stop) block rows and the matching (lo, hi) bar range of each piece."""
+    block = prefix["csum"].shape[1]
+    n_blocks = len(prefix["csum"])
+    for first in range(0, n_blocks, CHUNK_BLOCKS):
+        stop = min(n_blocks, first + CHUNK_BLOCKS)
+        yield (first, stop), (first * block, min(prefix["n"], stop * block))
+
+
+def _columns(out, n, k):
+    """Returns `out` (checked) or a fresh (n, k) float64 array with contiguous columns."""
+    if out is None:
+        return np.empty((n, k), dtype=np.float64, order='F')
+    if out.shape != (n, k) or out.dtype != np.float64:
+        raise ValueError(f"out buffer must be float64 with shape ({n}, {k}), got {out.dtype} {out.shape}")
+    return out
+
+
+def rolling_sums(values, windows, out=None):
+    """
+    Rolling sums for several window lengths from one cumulative-sum pass.
+
+    Parameters:
+        values (np.ndarray): Input series (float64)
+        windows (list[int]): Window lengths
+        out (np.ndarray, optional): (n_bars, n_windows) float64 buffer
+
+    Returns:
+        np.ndarray: (n_bars, n_windows), column j = rolling_sum(values, windows[j])
+
+    Example:
+        rolling_sums(gains, [5, 10, 14])[:, 2]   → same as kernels.rolling_sum(gains, 14)
+    """
+    windows = list(windows)
+    prefix = kernels.prefix_sums(values, _block(windows))
+    out = _columns(out, prefix["n"], len(windows))
+    for j, window in enumerate(windows):
+        kernels.window_sum(prefix, window, out=out[:, j])
+    return out
+
+
+def rolling_means(values, windows, out=None):
+    """Rolling means for several window lengths (see `rolling_sums`)."""
+    windows = list(windows)
+    out = rolling_sums(values, windows, out)
+    out /= np.asarray(windows, dtype=np.float64)
+    return out
+
+
+def rsi_periods(close, periods, out=None):
+    """
+    RSI for many periods at once.
+
+    close.diff(), the gain / loss split and their cumulative sums are computed once;
+    each extra period then costs a few vector passes instead of a full RSI.
+
+    Parameters:
+        close (np.ndarray): Close prices
+        periods (list[int]): RSI periods, e.g. range(5, 51)
+        out (np.ndarray, optional): (n_bars, n_periods) float64 buffer
+
+    Returns:
+        np.ndarray: (n_bars, n_periods), column j = kernels.rsi(close, periods[j])
+
+    Example:
+        rsi = rsi_periods(close, range(5, 51))
+        rsi[:, periods.index(14)]
+    """
+    periods = list(periods)
+    delta = kernels.diff(close)
+    block = _block(periods)
+    gains = kernels.prefix_sums(np.where(delta > 0, delta, 0.0), block)
+    losses = kernels.prefix_sums(np.where(delta < 0, -delta, 0.0), block)
+    del delta
+
+    out = _columns(out, gains["n"], len(periods))
+    for blocks, (lo, hi) in _chunks(gains):
+        avg_loss = np.empty(hi - lo, dtype=np.float64)
+        for j, period in enumerate(periods):
+            # RSI = 100 - 100 / (1 + avg_gain / (avg_loss + 1e-10)), as in kernels.rsi_from_diff
+            rsi = kernels.window_sum(gains, period, out=out[lo:hi, j], blocks=blocks)
+            rsi /= period
+            kernels.window_sum(losses, period, out=avg_loss, blocks=blocks)
+            avg_loss /= period
+            avg_loss += 1e-10
+            rsi /= avg_loss
+            rsi += 1
+            np.divide(100, rsi, out=rsi)
+            np.subtract(100, rsi, out=rsi)
+    return out
+
+
+def dmi_periods(high, low, close, periods, out=None):
+    """
+    +DI, -DI and ADX for many periods at once.
+
+    Directional movement, true range and their cumulative sums are shared by all
+    periods. Only DX, which depends on the period, gets its own cumsum pass for
+    the ADX mean.
+
+    Parameters:
+        high, low, close (np.ndarray): Candle prices
+        periods (list[int]): DMI periods, e.g. range(7, 29)
+        out (tuple of np.ndarray, optional): Three (n_bars, n_periods) buffers (+DI, -DI, ADX)
+
+    Returns:
+        dict: '+DI', '-DI', 'ADX' → (n_bars, n_periods) arrays,
+              column j = kernels.dmi(high, low, close, periods[j])
+    """
+    periods = list(periods)
+    block = _block(periods)
+    high_diff = kernels.diff(high)
+    low_diff = kernels.diff(low)
+    plus_dm = kernels.prefix_sums(kernels.directional_movement(high_diff, low_diff), block)
+    minus_dm = kernels.prefix_sums(kernels.directional_movement(low_diff, high_diff), block)
+    tr = kernels.prefix_sums(kernels.true_range(high, low, close, out=high_diff), block)
+    del low_diff
+
+    n = tr["n"]
+    k = len(periods)
+    plus_di, minus_di, adx = out if out is not None else (None, None, None)
+    plus_di = _columns(plus_di, n, k)
+    minus_di = _columns(minus_di, n, k)
+    adx = _columns(adx, n, k)
+    for blocks, (lo, hi) in _chunks(tr):
+        tr_sum = np.empty(hi - lo, dtype=np.float64)
+        for j, period in enumerate(periods):
+            # Same steps as kernels.directional_index
+            kernels.window_sum(tr, period, out=tr_sum, blocks=blocks)
+            tr_sum += 1e-10
+            for di, dm in ((plus_di[lo:hi, j], plus_dm), (minus_di[lo:hi, j], minus_dm)):
+                kernels.window_sum(dm, period, out=di, blocks=blocks)
+                di /= tr_sum
+                di *= 100
+
+    # ADX averages DX, which differs per period: one more cumsum pass each
+    dx = np.empty(n, dtype=np.float64)
+    for j, period in enumerate(periods):
+        kernels.directional_spread(plus_di[:, j], minus_di[:, j], out=dx)
+        kernels.rolling_mean(dx, period, out=adx[:, j])
+    return {'+DI': plus_di, '-DI': minus_di, 'ADX': adx}
@@ -0,0 +1,153 @@
+import os
+import json
+import zlib
+import zipfile
+import hashlib
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = "output/.indicator_cache"
+DEFAULT_MAX_MB = 512
+
+
+def file_fingerprint(path, cache_dir=DEFAULT_CACHE_DIR, chunk_size=1 << 20):
+    """
+    Returns a SHA-256 of the file contents.
+
+    The hash is remembered in `<cache_dir>/fingerprints.json` together with the file
+    size and modification time, so an unchanged data file is only hashed once.
+
+    Example:
+        file_fingerprint("data/nifty50_5minute_data.csv") → "3f2a9c..."
+    """
+    stat = os.stat(path)
+    memo_path = os.path.join(cache_dir, "fingerprints.json")
+    memo = {}
+    if os.path.exists(memo_path):
+        try:
+            with open(memo_path) as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+
+    abs_path = os.path.abspath(path)
+    entry = memo.get(abs_path)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+
+    memo[abs_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{memo_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(memo, f, indent=4)
+    os.replace(tmp_path, memo_path)
+    return memo[abs_path]["sha256"]
+
+
+class IndicatorCache:
+    """
+    On-disk cache of computed indicator series (compressed .npz, one file per entry).
+
+    Entries are keyed by the data file fingerprint, the row range the indicator was
+    computed on, the indicator name and its parameters. The directory is kept under
+    `max_mb` by evicting the least recently used files (hits refresh the mtime).
+
+    Example:
+        cache = IndicatorCache()
+        rsi = cache.get_or_compute(fingerprint, (0, len(df)), "rsi", {"period": 14},
+                                   lambda: {"rsi": calculate_rsi(df, 14).to_numpy()})
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(fingerprint, row_range, name, params):
+        """Stable hex key for one (data, rows, indicator, params) combination."""
+        payload = json.dumps(
+            {"data": fingerprint, "rows": list(row_range), "name": name, "params": params},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, name, key):
+        return os.path.join(self.cache_dir, f"{name}_{key[:32]}.npz")
+
+    def get(self, name, key):
+        """Returns the cached arrays (dict) or None on a miss (a corrupt file is deleted and counts as one)."""
+        path = self._path(name, key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {k: data[k] for k in data.files}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile, zlib.error):
+            # truncated / corrupt entry (e.g. an interrupted write): drop it so it is rebuilt
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path)  # mark as recently used
+        return arrays
+
+    def put(self, name, key, arrays):
+        """Stores a dict of arrays, then evicts old entries if over the size cap."""
+        path = self._path(name, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)  # atomic, safe with parallel sweep workers
+        self.evict()
+
+    def get_or_compute(self, fingerprint, row_range, name, params, compute):
+        """
+        Returns cached arrays for this indicator, computing and storing them on a miss.
+
+        Parameters:
+            fingerprint (str): Data file hash (see `file_fingerprint`)
+            row_range (tuple): (first_row, stop_row) of the data the indicator covers
+            name (str): Indicator name, e.g. "rsi"
+            params (dict): Indicator parameters, e.g. {"period": 14}
+            compute (callable): Returns a dict of output name → np.ndarray
+
+        Returns:
+            dict: output name → np.ndarray
+        """
+        key = self.make_key(fingerprint, row_range, name, params)
+        arrays = self.get(name, key)
+        if arrays is None:
+            arrays = {k: np.asarray(v) for k, v in compute().items()}
+            self.put(name, key, arrays)
+        return arrays
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_mb."""
+        entries = []
+        total = 0
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".npz"):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
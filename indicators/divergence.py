@@ -1,3 +1,10 @@
+import numpy as np
+import pandas as pd
+
+# Category order of the returned labels; the int8 codes are the positions in this list
+DIVERGENCE_LABELS = ['', 'bullish', 'bearish']
+
+
 def detect_divergence(df, rsi):
     """
     Detects bullish or bearish divergence using the last 2 and 3 consecutive candles.
@@ -10,12 +17,18 @@ def detect_divergence(df, rsi):
     - Last 2 candles: i and i-1
     - Last 3 candles: i, i-1, i-2 (trend across three)
 
+    The checks run on shifted NumPy arrays for all candles at once. A 3-candle
+    pattern always contains the 2-candle one (close[i] < close[i-1] and
+    rsi[i] > rsi[i-1]), so the 2-candle comparison alone decides the label.
+    Bullish still wins when both could apply.
+
     Parameters:
         df (pd.DataFrame): Must include 'close' column
         rsi (pd.Series): RSI values aligned with df
 
     Returns:
-        List[str]: List of labels: 'bullish', 'bearish', or ''
+        pd.Categorical: Labels 'bullish', 'bearish', or '' (stored as int8 codes,
+                        see DIVERGENCE_LABELS; compares equal to the plain strings)
 
     Examples:
     - Bullish (3-candle):
@@ -25,29 +38,39 @@ def detect_divergence(df, rsi):
         close: 110, 112 (rising)
         rsi:   70, 68 (falling)
     """
-    divergence = [''] * len(df)
+    codes = divergence_codes(df['close'].to_numpy(dtype=np.float64), np.asarray(rsi, dtype=np.float64))
+    return pd.Categorical.from_codes(codes, categories=DIVERGENCE_LABELS)
 
-    for i in range(2, len(df)):
-        # --- 2-candle divergence ---
-        price_down_2 = df['close'][i] < df['close'][i - 1]
-        rsi_up_2 = rsi[i] > rsi[i - 1]
 
-        price_up_2 = df['close'][i] > df['close'][i - 1]
-        rsi_down_2 = rsi[i] < rsi[i - 1]
+def divergence_codes(close, rsi, close_diff=None):
+    """
+    Array version of `detect_divergence`.
 
-        # --- 3-candle divergence ---
-        price_down_3 = df['close'][i] < df['close'][i - 1] < df['close'][i - 2]
-        rsi_up_3 = rsi[i] > rsi[i - 1] > rsi[i - 2]
+    Parameters:
+        close (np.ndarray): Close prices
+        rsi (np.ndarray): RSI values aligned with close
+        close_diff (np.ndarray, optional): close.diff() when it is already computed
+                                           (its sign gives the same price comparisons)
 
-        price_up_3 = df['close'][i] > df['close'][i - 1] > df['close'][i - 2]
-        rsi_down_3 = rsi[i] < rsi[i - 1] < rsi[i - 2]
+    Returns:
+        np.ndarray[int8]: 0 = '', 1 = 'bullish', 2 = 'bearish'
+    """
+    codes = np.zeros(len(close), dtype=np.int8)
+    if len(close) < 3:
+        return codes
 
-        # Check for bullish divergence
-        if (price_down_2 and rsi_up_2) or (price_down_3 and rsi_up_3):
-            divergence[i] = 'bullish'
+    # candle i vs i-1, for i >= 2 (NaN comparisons are False, as in the scalar version)
+    if close_diff is None:
+        falling = close[2:] < close[1:-1]
+        rising = close[2:] > close[1:-1]
+    else:
+        falling = close_diff[2:] < 0
+        rising = close_diff[2:] > 0
+    rsi_now, rsi_prev = rsi[2:], rsi[1:-1]
 
-        # Check for bearish divergence
-        elif (price_up_2 and rsi_down_2) or (price_up_3 and rsi_down_3):
-            divergence[i] = 'bearish'
+    bullish = falling & (rsi_now > rsi_prev)
+    bearish = rising & (rsi_now < rsi_prev) & ~bullish
 
-    return divergence
+    codes[2:][bullish] = 1
+    codes[2:][bearish] = 2
+    return codes
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from indicators import kernels
+
 def calculate_dmi(df, period=14):
     """
     Calculates Directional Movement Index (DMI)
@@ -54,46 +57,15 @@ def calculate_dmi(df, period=14):
 
     """
 
-    # Step 1: Calculate change in highs and lows
-    high_diff = df['high'].diff()
-    low_diff = df['low'].diff()
-
-    # Step 2: Compute +DM (upward movement) and -DM (downward movement)
-    # +DM: only if high_diff > low_diff and it's positive
-    plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0.0)
-
-    # -DM: only if low_diff > high_diff and it's positive
-    minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0.0)
-
-    # Step 3: Calculate True Range (TR)
-    tr1 = df['high'] - df['low']                          # High-Low range
-    tr2 = (df['high'] - df['close'].shift()).abs()        # High - Prev Close
-    tr3 = (df['low'] - df['close'].shift()).abs()         # Low - Prev Close
-
-    # TR is the max of the three components above
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-    # Smooth TR using rolling sum
-    tr_sum = tr.rolling(window=period).sum()
-
-    # Step 4: Calculate Directional Indicators
-    # Smooth DM values
-    plus_dm_sum = plus_dm.rolling(window=period).sum()
-    minus_dm_sum = minus_dm.rolling(window=period).sum()
-
-    # +DI and -DI as % of true range
-    plus_di = 100 * (plus_dm_sum / (tr_sum + 1e-10))      # Avoid division by 0
-    minus_di = 100 * (minus_dm_sum / (tr_sum + 1e-10))
-
-    # Step 5: Calculate DX (Directional Index)
-    dx = (abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)) * 100
-
-    # Step 6: Calculate ADX (Average DX) — measures trend **strength**
-    adx = dx.rolling(window=period).mean()
-
-    # Step 7: Return result as dictionary
+    # DM / TR rolling sums → +DI, -DI → DX → ADX, all on the raw price arrays
+    plus_di, minus_di, adx = kernels.dmi(
+        df['high'].to_numpy(dtype=np.float64),
+        df['low'].to_numpy(dtype=np.float64),
+        df['close'].to_numpy(dtype=np.float64),
+        period
+    )
     return {
-        '+DI': plus_di,
-        '-DI': minus_di,
-        'ADX': adx
-    }
\ No newline at end of file
+        '+DI': pd.Series(plus_di, index=df.index),
+        '-DI': pd.Series(minus_di, index=df.index),
+        'ADX': pd.Series(adx, index=df.index)
+    }
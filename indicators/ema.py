@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from indicators import kernels
+
 def calculate_ema(df, span=20):
     """
     Calculates Exponential Moving Average (EMA) on the 'close' price.
@@ -15,7 +18,7 @@ def calculate_ema(df, span=20):
         pd.Series: EMA values for the 'close' price.
 
     -------------------------------
-    📘 Formula (internal to pandas):
+    📘 Formula (indicators/kernels.py, same values as pandas ewm(adjust=False)):
         EMA_today = α * Price_today + (1 - α) * EMA_yesterday
 
         where α = 2 / (span + 1)
@@ -47,4 +50,4 @@ def calculate_ema(df, span=20):
             This helps detect momentum reversals and entry signals.
              
     """
-    return df['close'].ewm(span=span, adjust=False).mean()
+    return pd.Series(kernels.ema(df['close'].to_numpy(dtype=np.float64), span), index=df.index)
@@ -0,0 +1,398 @@
+import numpy as np
+
+# Largest factor a value is scaled by inside one EMA block (p^-k ≤ this); keeps the
+# blocked recurrence within ~1e-13 of the sequential one
+_MAX_BLOCK_GROWTH = 100.0
+
+
+def _buffer(out, n):
+    """Returns `out` (checked) or a fresh float64 array of length n."""
+    if out is None:
+        return np.empty(n, dtype=np.float64)
+    if out.shape != (n,) or out.dtype != np.float64:
+        raise ValueError(f"out buffer must be float64 with shape ({n},), got {out.dtype} {out.shape}")
+    return out
+
+
+def prefix_sums(values, block=1024):
+    """
+    Everything `window_sum` needs for one series: its cumulative sums, restarted
+    every `block` values, plus a running count of NaN values.
+
+    Computed once, it serves any number of window lengths up to `block`
+    (see `indicators/batch.py`).
+
+    One long cumsum would carry the round-off of the whole history into every
+    window (1e-10 after a million candles). Restarting it keeps each sum within
+    a block's magnitude of the values. It also makes two of the rolling-sum
+    guarantees hold without any fix-up. A run of zeros leaves the cumsum
+    unchanged, so a window of zeros is x - x = 0. Adding a non-negative value
+    never lowers the cumsum, so such a window never sums below 0.
+
+    Parameters:
+        values (np.ndarray): Input series (float64)
+        block (int): Values per cumulative sum; must be ≥ the longest window
+
+    Returns:
+        dict: csum (n_blocks × block), gaps (running NaN count, None without NaNs), n
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    missing = np.isnan(values)
+    n_blocks = -(-n // block)
+    grid = np.zeros(n_blocks * block, dtype=np.float64)
+    grid[:n] = values
+    grid[:n][missing] = 0.0
+    grid = grid.reshape(n_blocks, block)
+    np.cumsum(grid, axis=1, out=grid)
+    return {
+        "n": n,
+        "csum": grid,
+        "gaps": np.cumsum(missing) if missing.any() else None,
+    }
+
+
+def _fill_window_sums(csum, first, count, window, out):
+    """Window sums of cumsum blocks first .. first+count-1 into `out` (count × block)."""
+    if count == 0:
+        return
+    block = csum.shape[1]
+    rows = csum[first:first + count]
+    np.subtract(rows[:, window:], rows[:, :-window], out=out[:, window:])
+    out[:, window - 1] = rows[:, window - 1]
+
+    # Head of each block: rest of the previous block + start of this one
+    skip = 1 if first == 0 else 0       # the series' first window - 1 values have no head
+    previous = csum[first - 1 + skip:first - 1 + count]
+    head = out[skip:, :window - 1]
+    np.subtract(previous[:, -1:], previous[:, block - window:block - 1], out=head)
+    head += rows[skip:, :window - 1]
+
+
+def window_sum(prefix, window, out=None, blocks=None):
+    """
+    Rolling sum of one window length from `prefix_sums`.
+
+    A window that crosses a block boundary takes its head from the previous
+    block's running total. Full blocks are written straight into `out`; only
+    the last partial block goes through a scratch row.
+
+    Parameters:
+        prefix (dict): From `prefix_sums`
+        window (int): Window length (≤ the prefix block)
+        out (np.ndarray, optional): float64 buffer for the result
+        blocks (tuple, optional): (first, stop) block rows to compute, for callers
+                                  that walk the series in cache-sized pieces;
+                                  `out` then covers only those rows' values
+
+    Returns:
+        np.ndarray: Rolling sums (NaN for the first window - 1 values and NaN windows)
+    """
+    n, csum = prefix["n"], prefix["csum"]
+    block = csum.shape[1]
+    if window > block:
+        raise ValueError(f"window {window} is longer than the prefix block ({block})")
+    first, stop = blocks if blocks is not None else (0, len(csum))
+    lo, hi = first * block, min(n, stop * block)
+    out = _buffer(out, hi - lo)
+    if window > n:
+        out[:] = np.nan
+        return out
+
+    full = (hi - lo) // block
+    _fill_window_sums(csum, first, full, window, out[:full * block].reshape(full, block))
+    if first + full < stop:
+        tail = np.empty((1, block), dtype=np.float64)
+        _fill_window_sums(csum, first + full, 1, window, tail)
+        out[full * block:] = tail[0, :hi - lo - full * block]
+    if lo < window - 1:
+        out[:window - 1 - lo] = np.nan
+
+    # Windows holding a NaN (integer counts are exact)
+    gaps = prefix["gaps"]
+    if gaps is not None:
+        start = max(lo, window - 1)
+        totals = gaps[start:hi].copy()
+        if start >= window:
+            totals -= gaps[start - window:hi - window]
+        else:
+            totals[1:] -= gaps[:hi - window]
+        np.putmask(out[start - lo:], totals > 0, np.nan)
+    return out
+
+
+def rolling_sum(values, window, out=None, block=1024):
+    """
+    Sum over the last `window` values, from cumulative sums (no per-window loop).
+
+    Same semantics as `Series.rolling(window).sum()`:
+    - NaN until `window` values are available, and for any window containing a NaN
+    - a window of only zeros sums to exactly 0
+    - a window of non-negative values never sums below 0
+
+    Parameters:
+        values (np.ndarray): Input series (float64)
+        window (int): Window length
+        out (np.ndarray, optional): float64 buffer of the same length to write into
+        block (int): Values per cumulative sum (see `prefix_sums`)
+
+    Returns:
+        np.ndarray: Rolling sums
+
+    Example:
+        rolling_sum(np.array([1., 2., 3., 4.]), 2) → [nan, 3., 5., 7.]
+    """
+    return window_sum(prefix_sums(values, max(block, window)), window, out)
+
+
+def rolling_mean(values, window, out=None):
+    """
+    Mean over the last `window` values (`Series.rolling(window).mean()`).
+
+    Example:
+        rolling_mean(np.array([1., 2., 3., 4.]), 2) → [nan, 1.5, 2.5, 3.5]
+    """
+    out = rolling_sum(values, window, out)
+    out /= window
+    return out
+
+
+def _recurrence(u, p, init, out):
+    """
+    Solves y[t] = p * y[t-1] + u[t] with y[-1] = init, writing y into `out`.
+
+    The series is cut into blocks short enough that p^-k stays below
+    _MAX_BLOCK_GROWTH. Inside a block the recurrence is a scaled cumsum,
+    y[j] = p^j * Σ u[k] / p^k. Only the block-to-block carry is sequential, and
+    it is a single multiply-add per block.
+    """
+    n = len(u)
+    if n == 0:
+        return out
+    if p == 0.0:
+        out[:] = u
+        return out
+
+    block = int(min(n, 1 + np.log(_MAX_BLOCK_GROWTH) / -np.log(p)))
+    n_blocks = -(-n // block)
+    grid = np.zeros(n_blocks * block, dtype=np.float64)
+    grid[:n] = u
+    grid = grid.reshape(n_blocks, block)
+
+    powers = p ** np.arange(block)                # p^j
+    grid /= powers
+    np.cumsum(grid, axis=1, out=grid)
+    grid *= powers                                # block-local y, started from 0
+
+    # y at the end of each previous block, fed into the next one
+    decay = powers * p                            # p^(j+1)
+    carries = np.empty(n_blocks, dtype=np.float64)
+    carry, block_decay = float(init), float(decay[-1])
+    for b, last in enumerate(grid[:, -1].tolist()):
+        carries[b] = carry
+        carry = block_decay * carry + last
+
+    grid += carries[:, None] * decay
+    out[:] = grid.ravel()[:n]
+    return out
+
+
+def ema(values, span, adjust=False, out=None):
+    """
+    Exponential moving average as a linear recurrence (`Series.ewm(span, adjust).mean()`).
+
+    adjust=False: EMA_t = α * x_t + (1 - α) * EMA_{t-1}, EMA_0 = x_0
+    adjust=True:  Σ (1-α)^(t-k) x_k / Σ (1-α)^(t-k)   (pandas' default weighting)
+
+    Leading NaNs stay NaN; the average starts at the first valid value.
+
+    Parameters:
+        values (np.ndarray): Input series (float64)
+        span (int): EMA span, α = 2 / (span + 1)
+        adjust (bool): Weighting, as in pandas
+        out (np.ndarray, optional): float64 buffer of the same length to write into
+
+    Returns:
+        np.ndarray: EMA values
+
+    Example:
+        ema(np.array([100., 105., 110.]), span=20) → [100., 100.476..., 101.859...]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = _buffer(out, n)
+    valid = np.flatnonzero(~np.isnan(values))
+    first = valid[0] if len(valid) else n
+    out[:first] = np.nan
+    if first == n:
+        return out
+
+    alpha = 2 / (span + 1)
+    p = 1 - alpha
+    x = values[first:]
+    y = out[first:]
+    if adjust:
+        _recurrence(x, p, 0.0, y)                         # Σ p^(t-k) x_k
+        # Σ p^(t-k) = (1 - p^(t+1)) / α, constant once p^(t+1) underflows
+        settled = int(min(len(x), 1 + np.log(1e-17) / np.log(p))) if p > 0 else 1
+        y[:settled] /= (1 - p ** np.arange(1, settled + 1)) / alpha
+        y[settled:] /= 1 / alpha
+    else:
+        y[0] = x[0]
+        _recurrence(alpha * x[1:], p, x[0], y[1:])
+    return out
+
+
+def diff(values, out=None):
+    """values[t] - values[t-1] (`Series.diff()`); the first element is NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    out = _buffer(out, len(values))
+    out[:1] = np.nan
+    np.subtract(values[1:], values[:-1], out=out[1:])
+    return out
+
+
+def rsi_from_diff(delta, period=14, out=None):
+    """
+    RSI from precomputed close differences (see `rsi`).
+
+    Parameters:
+        delta (np.ndarray): close.diff() (first element NaN)
+        period (int): Rolling window
+        out (np.ndarray, optional): float64 buffer for the result
+
+    Returns:
+        np.ndarray: RSI (NaN for the first period - 1 candles)
+    """
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    out = rolling_mean(gain, period, out)                 # avg gain
+    avg_loss = rolling_mean(loss, period, gain)           # reuses the gain buffer
+
+    # RSI = 100 - 100 / (1 + avg_gain / (avg_loss + 1e-10))
+    avg_loss += 1e-10
+    out /= avg_loss
+    out += 1
+    np.divide(100, out, out=out)
+    np.subtract(100, out, out=out)
+    return out
+
+
+def rsi(close, period=14, out=None):
+    """
+    RSI from rolling means of gains and losses (same formula as `calculate_rsi`).
+
+    Parameters:
+        close (np.ndarray): Close prices
+        period (int): Rolling window
+        out (np.ndarray, optional): float64 buffer for the result
+
+    Returns:
+        np.ndarray: RSI (NaN for the first period - 1 candles)
+    """
+    return rsi_from_diff(diff(close), period, out)
+
+
+def macd(close, fast=12, slow=26, signal=9, out=None):
+    """
+    MACD line, signal line and histogram (same formula as `calculate_macd`).
+
+    Parameters:
+        close (np.ndarray): Close prices
+        fast, slow (int): EMA spans of the MACD line
+        signal (int): Span of the signal line (pandas default weighting)
+        out (tuple of np.ndarray, optional): Three float64 buffers (macd, signal, histogram)
+
+    Returns:
+        tuple: (macd, signal, histogram) arrays
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    macd_line, signal_line, histogram = out if out is not None else (None, None, None)
+    macd_line = ema(close, fast, out=macd_line)
+    slow_ema = ema(close, slow, out=_buffer(histogram, n))   # histogram buffer as scratch
+    macd_line -= slow_ema
+    signal_line = ema(macd_line, signal, adjust=True, out=signal_line)
+    histogram = np.subtract(macd_line, signal_line, out=slow_ema)
+    return macd_line, signal_line, histogram
+
+
+def true_range(high, low, close, out=None):
+    """
+    max(high - low, |high - prev close|, |low - prev close|); the first candle is high - low.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    out = _buffer(out, len(high))
+    np.subtract(high, low, out=out)
+    prev_close = close[:-1]
+    np.fmax(out[1:], np.abs(high[1:] - prev_close), out=out[1:])
+    np.fmax(out[1:], np.abs(low[1:] - prev_close), out=out[1:])
+    return out
+
+
+def directional_movement(move, opposite):
+    """
+    +DM from (high_diff, low_diff), or -DM from (low_diff, high_diff):
+    the move where it beats the opposite move and is positive, else 0.
+    """
+    return np.where((move > opposite) & (move > 0), move, 0.0)
+
+
+def directional_index(dm, tr_sum, period=14, out=None):
+    """
+    +DI or -DI: 100 * rolling sum of DM / (rolling sum of TR + 1e-10).
+
+    Parameters:
+        dm (np.ndarray): +DM or -DM
+        tr_sum (np.ndarray): rolling_sum(true_range, period)
+        period (int): Rolling window of the DM sum
+        out (np.ndarray, optional): float64 buffer for the result
+    """
+    out = rolling_sum(dm, period, out)
+    out /= tr_sum + 1e-10
+    out *= 100
+    return out
+
+
+def directional_spread(plus_di, minus_di, out=None):
+    """DX = |+DI - -DI| / (+DI + -DI + 1e-10) * 100."""
+    out = np.subtract(plus_di, minus_di, out=_buffer(out, len(plus_di)))
+    np.abs(out, out=out)
+    total = plus_di + minus_di
+    total += 1e-10
+    out /= total
+    out *= 100
+    return out
+
+
+def dmi(high, low, close, period=14, out=None):
+    """
+    +DI, -DI and ADX (same formulas as `calculate_dmi`).
+
+    Parameters:
+        high, low, close (np.ndarray): Candle prices
+        period (int): Rolling window for the DM / TR sums and the ADX mean
+        out (tuple of np.ndarray, optional): Three float64 buffers (+DI, -DI, ADX)
+
+    Returns:
+        tuple: (+DI, -DI, ADX) arrays
+    """
+    plus_di, minus_di, adx = out if out is not None else (None, None, None)
+
+    # Directional movement (first candle has no previous one → 0)
+    high_diff = diff(high)
+    low_diff = diff(low)
+    plus_dm = directional_movement(high_diff, low_diff)
+    minus_dm = directional_movement(low_diff, high_diff)
+
+    # Smoothed TR, reusing the diff buffers
+    tr_sum = rolling_sum(true_range(high, low, close, out=high_diff), period, out=low_diff)
+    plus_di = directional_index(plus_dm, tr_sum, period, out=plus_di)
+    minus_di = directional_index(minus_dm, tr_sum, period, out=minus_di)
+
+    # ADX = rolling mean of DX
+    dx = directional_spread(plus_di, minus_di, out=plus_dm)
+    adx = rolling_mean(dx, period, out=adx)
+    return plus_di, minus_di, adx
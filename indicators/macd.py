@@ -1,4 +1,7 @@
-from indicators.ema import calculate_ema
+import numpy as np
+import pandas as pd
+
+from indicators import kernels
 
 def calculate_macd(df, fast=12, slow=26, signal=9):
     """
@@ -34,12 +37,10 @@ def calculate_macd(df, fast=12, slow=26, signal=9):
         ewm()	Exponential weighted moving average method in pandas
         
     """
-    ema_fast = calculate_ema(df, fast)
-    ema_slow = calculate_ema(df, slow)
-    macd_line = ema_fast - ema_slow
-    signal_line = macd_line.ewm(span=signal).mean()
+    # EMA_fast - EMA_slow, then the signal EMA (pandas default weighting) of that line
+    macd_line, signal_line, histogram = kernels.macd(df['close'].to_numpy(dtype=np.float64), fast, slow, signal)
     return {
-        'macd': macd_line,
-        'signal': signal_line,
-        'histogram': macd_line - signal_line
+        'macd': pd.Series(macd_line, index=df.index),
+        'signal': pd.Series(signal_line, index=df.index),
+        'histogram': pd.Series(histogram, index=df.index)
     }
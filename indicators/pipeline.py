@@ -0,0 +1,89 @@
+import pandas as pd
+
+from indicators.divergence import DIVERGENCE_LABELS
+from indicators.planner import required_outputs, evaluate
+
+
+# EMA memory decays as (1 - 2/(span+1))^n; after 10 × span bars the start-up
+# difference is below 1e-8 of its initial size
+EMA_SETTLE_FACTOR = 10
+
+# The legacy loop never traded the first 30 candles of a run
+MIN_START_BAR = 30
+
+
+def warmup_bars(config, settle=EMA_SETTLE_FACTOR):
+    """
+    Number of candles the indicators need before a window starts so their values
+    there match a full-history run.
+
+    Parameters:
+        config (dict): rsi.period, macd.slow / macd.signal and dmi.period
+        settle (int): EMA spans to wait for MACD / signal line to converge
+
+    Returns:
+        int: Warm-up candles
+
+    Example (default config):
+        RSI 14 + 1, MACD 10 × (26 + 9), ADX 2 × 14  → max = 350, + 2 for divergence → 352
+    """
+    rsi = config["rsi"]["period"] + 1                                   # diff, then rolling mean
+    macd = settle * (config["macd"]["slow"] + config["macd"]["signal"])  # EMA of an EMA difference
+    adx = 2 * config["dmi"]["period"]                                   # DI rolling sums, then DX mean
+    return max(rsi, macd, adx) + 2                                      # divergence looks 2 candles back
+
+
+def trim_warmup(df, warmup_rows, min_start=MIN_START_BAR):
+    """
+    Drops the warm-up candles once indicators are computed.
+
+    Parameters:
+        df (pd.DataFrame): Candles with indicators, warm-up rows first
+        warmup_rows (int): Rows before the requested window
+        min_start (int): Candles that are never traded when there is no warm-up
+
+    Returns:
+        (pd.DataFrame, int): Window rows only, and the first bar of the window to trade
+                             (0 when enough warm-up was available)
+
+    Example:
+        352 warm-up rows → (df.iloc[352:], 0)
+        10 warm-up rows (window at the start of the file) → (df.iloc[10:], 20)
+    """
+    return df.iloc[warmup_rows:], max(0, min_start - warmup_rows)
+
+
+def add_indicators(df, config, cache=None, source=None, outputs=None):
+    """
+    Computes the indicators a run needs and adds them to the candle frame.
+
+    The dependency graph in `indicators/planner.py` decides what to compute: each
+    shared step (EMAs of the MACD line, close.diff(), TR sums) runs once, and columns
+    nothing reads are skipped.
+
+    Parameters:
+        df (pd.DataFrame): OHLCV candles (columns are added in place)
+        config (dict): Configuration values from config.json (rsi, macd, dmi periods)
+        cache (IndicatorCache, optional): Reuse series computed by an earlier run
+        source (tuple, optional): (data fingerprint, (first_row, stop_row)) identifying
+                                  the candles; required when `cache` is given
+        outputs (iterable, optional): Columns to add; defaults to `required_outputs(config)`
+                                      (strategy columns + config "extra_indicators")
+
+    Returns:
+        pd.DataFrame: Candles plus the output columns (by default rsi, divergence,
+                      macd, signal, +DI, -DI and ADX)
+
+    Example:
+        df = add_indicators(pd.read_csv(...), config)
+        df[['close', 'rsi', 'macd', 'ADX']].tail()
+
+        add_indicators(df, config, outputs=required_outputs(config, plots=['ema']))
+    """
+    outputs = required_outputs(config) if outputs is None else tuple(outputs)
+    for name, values in evaluate(df, config, outputs, cache=cache, source=source).items():
+        if name == 'divergence':
+            df[name] = pd.Categorical.from_codes(values, categories=DIVERGENCE_LABELS)
+        else:
+            df[name] = values
+    return df
@@ -0,0 +1,217 @@
+import numpy as np
+
+from indicators import kernels
+from indicators.divergence import divergence_codes
+from utils.rule_engine import rule_columns
+
+# Candle columns the graph reads directly
+SOURCE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Read by should_enter_trade and written by the trade ledger (engine BAR_COLUMNS)
+STRATEGY_OUTPUTS = ('rsi', 'macd', 'signal', '+DI', '-DI', 'ADX', 'divergence')
+
+# Columns each plot shows (visualize_trades `indicators_to_plot`, dashboard toggles)
+PLOT_OUTPUTS = {
+    'rsi': ('rsi',),
+    'macd': ('macd', 'signal'),
+    'dmi': ('+DI', '-DI', 'ADX'),
+    'divergence': ('divergence',),
+    'ema': ('ema',),
+}
+
+# Column order in the candle frame (legacy add_indicators order, plus config "ema")
+OUTPUT_ORDER = ('rsi', 'ema', 'ema_fast', 'ema_slow', 'divergence',
+                'macd', 'signal', 'histogram', '+DI', '-DI', 'ADX')
+
+
+class Node:
+    """
+    One step of the indicator graph.
+
+    Attributes:
+        inputs (tuple): Node or candle column names, passed positionally to `compute`
+        params (callable): config → keyword arguments of `compute`
+        compute (callable): Kernel returning one array
+    """
+    __slots__ = ("inputs", "params", "compute")
+
+    def __init__(self, inputs, params, compute):
+        self.inputs = inputs
+        self.params = params
+        self.compute = compute
+
+
+def _no_params(config):
+    return {}
+
+
+def _dmi_window(config):
+    return {"window": config["dmi"]["period"]}
+
+
+def _dmi_period(config):
+    return {"period": config["dmi"]["period"]}
+
+
+NODES = {
+    # Shared intermediates
+    'close_diff': Node(('close',), _no_params, kernels.diff),            # RSI + divergence
+    'high_diff': Node(('high',), _no_params, kernels.diff),
+    'low_diff': Node(('low',), _no_params, kernels.diff),
+    '+DM': Node(('high_diff', 'low_diff'), _no_params, kernels.directional_movement),
+    '-DM': Node(('low_diff', 'high_diff'), _no_params, kernels.directional_movement),
+    'true_range': Node(('high', 'low', 'close'), _no_params, kernels.true_range),
+    'tr_sum': Node(('true_range',), _dmi_window, kernels.rolling_sum),   # +DI and -DI
+    'dx': Node(('+DI', '-DI'), _no_params, kernels.directional_spread),
+
+    # Frame columns
+    'rsi': Node(('close_diff',), lambda config: {"period": config["rsi"]["period"]}, kernels.rsi_from_diff),
+    'ema': Node(('close',), lambda config: {"span": config["ema"]["span"]}, kernels.ema),
+    'ema_fast': Node(('close',), lambda config: {"span": config["macd"]["fast"]}, kernels.ema),
+    'ema_slow': Node(('close',), lambda config: {"span": config["macd"]["slow"]}, kernels.ema),
+    'macd': Node(('ema_fast', 'ema_slow'), _no_params, np.subtract),
+    'signal': Node(('macd',), lambda config: {"span": config["macd"]["signal"], "adjust": True}, kernels.ema),
+    'histogram': Node(('macd', 'signal'), _no_params, np.subtract),
+    '+DI': Node(('+DM', 'tr_sum'), _dmi_period, kernels.directional_index),
+    '-DI': Node(('-DM', 'tr_sum'), _dmi_period, kernels.directional_index),
+    'ADX': Node(('dx',), _dmi_window, kernels.rolling_mean),
+    'divergence': Node(('close', 'rsi', 'close_diff'), _no_params, divergence_codes),  # int8 codes
+}
+
+
+def required_outputs(config, plots=()):
+    """
+    Indicator columns a run needs: the strategy's, those read by config.json
+    "entry_rules", the requested plots', and any listed under "extra_indicators".
+
+    Parameters:
+        config (dict): Configuration values from config.json
+        plots (iterable): Plot names, keys of PLOT_OUTPUTS
+
+    Returns:
+        tuple: Node names in frame column order
+
+    Example:
+        required_outputs(config)                 → ('rsi', 'divergence', 'macd', 'signal', '+DI', '-DI', 'ADX')
+        {"extra_indicators": ["ema_fast"]}       → adds 'ema_fast'
+    """
+    wanted = set(STRATEGY_OUTPUTS)
+    wanted.update(name for name in rule_columns(config) if name in NODES)
+    for plot in plots:
+        if plot not in PLOT_OUTPUTS:
+            raise ValueError(f"Unknown plot '{plot}', expected one of {sorted(PLOT_OUTPUTS)}")
+        wanted.update(PLOT_OUTPUTS[plot])
+    for name in config.get("extra_indicators", []):
+        if name not in NODES:
+            raise ValueError(f"Unknown indicator '{name}', expected one of {sorted(NODES)}")
+        wanted.add(name)
+    ordered = [name for name in OUTPUT_ORDER if name in wanted]
+    return tuple(ordered + sorted(wanted.difference(ordered)))
+
+
+def plan(outputs, available=()):
+    """
+    Orders the nodes needed for `outputs` so every node comes after its inputs.
+    Each node appears once, however many outputs share it.
+
+    Parameters:
+        outputs (iterable): Node names to produce
+        available (iterable): Names already computed (e.g. cache hits); their
+                              inputs are not planned unless something else needs them
+
+    Returns:
+        list: Node names to compute, in order
+
+    Example:
+        plan(['macd', 'ema_fast']) → ['ema_fast', 'ema_slow', 'macd']   (ema_fast computed once)
+    """
+    order, seen = [], set(available) | set(SOURCE_COLUMNS)
+
+    def visit(name):
+        if name in seen:
+            return
+        if name not in NODES:
+            raise ValueError(f"Unknown indicator '{name}'")
+        seen.add(name)
+        for dependency in NODES[name].inputs:
+            visit(dependency)
+        order.append(name)
+
+    for name in outputs:
+        visit(name)
+    return order
+
+
+def key_params(name, config):
+    """
+    Parameters of a node and everything upstream of it (cache key material).
+
+    Example:
+        key_params('signal', config)
+        → {"signal": {"span": 9, "adjust": True}, "macd": {}, "ema_fast": {"span": 12}, ...}
+    """
+    params = {}
+
+    def visit(node_name):
+        if node_name in params or node_name in SOURCE_COLUMNS:
+            return
+        node = NODES[node_name]
+        params[node_name] = node.params(config)
+        for dependency in node.inputs:
+            visit(dependency)
+
+    visit(name)
+    return params
+
+
+def evaluate(df, config, outputs, cache=None, source=None):
+    """
+    Computes the requested indicator arrays from the candle frame.
+
+    Cached outputs are loaded first, so their inputs are only computed when another
+    output still needs them. Intermediates are dropped as soon as their last consumer
+    has run.
+
+    Parameters:
+        df (pd.DataFrame): OHLCV candles
+        config (dict): Indicator parameters from config.json
+        outputs (iterable): Node names to return
+        cache (IndicatorCache, optional): Stores / reuses the output arrays
+        source (tuple, optional): (data fingerprint, (first_row, stop_row)); required with `cache`
+
+    Returns:
+        dict: output name → np.ndarray (divergence as int8 codes)
+    """
+    outputs = tuple(outputs)
+    values = {}
+    keys = {}
+    if cache is not None and source is not None:
+        fingerprint, row_range = source
+        for name in outputs:
+            keys[name] = cache.make_key(fingerprint, row_range, name, key_params(name, config))
+            hit = cache.get(name, keys[name])
+            if hit is not None:
+                values[name] = hit["values"]
+
+    order = plan(outputs, available=values)
+    remaining = {}
+    for name in order:
+        for dependency in NODES[name].inputs:
+            remaining[dependency] = remaining.get(dependency, 0) + 1
+
+    for name in order:
+        node = NODES[name]
+        for column in node.inputs:
+            if column in SOURCE_COLUMNS and column not in values:
+                values[column] = df[column].to_numpy(dtype=np.float64)
+        values[name] = node.compute(*(values[i] for i in node.inputs), **node.params(config))
+        if name in keys:
+            cache.put(name, keys[name], {"values": values[name]})
+
+        # Release intermediates nobody else reads
+        for dependency in node.inputs:
+            remaining[dependency] -= 1
+            if remaining[dependency] == 0 and dependency not in outputs:
+                del values[dependency]
+
+    return {name: values[name] for name in outputs}
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from indicators import kernels
+
 def calculate_rsi(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """
     Calculates the Relative Strength Index (RSI) on the 'close' prices.
@@ -43,21 +46,5 @@ def calculate_rsi(df: pd.DataFrame, period: int = 14) -> pd.Series:
         - RSI > 70 → asset is **overbought** → possible SHORT signal
     """
     
-    # Step 1: Calculate price differences (current - previous)
-    delta = df['close'].diff()
-
-    # Step 2: Separate upward and downward movements
-    gain = delta.where(delta > 0, 0)  # only positive changes
-    loss = -delta.where(delta < 0, 0)  # only negative changes (as positive numbers)
-
-    # Step 3: Calculate average gain and average loss using rolling window
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-
-    # Step 4: Calculate Relative Strength (RS)
-    rs = avg_gain / (avg_loss + 1e-10)  # add small value to avoid divide-by-zero
-
-    # Step 5: Calculate RSI
-    rsi = 100 - (100 / (1 + rs))
-
-    return rsi
+    # Gains / losses → rolling means → RS → RSI, all on the raw close array
+    return pd.Series(kernels.rsi(df['close'].to_numpy(dtype=np.float64), period), index=df.index)
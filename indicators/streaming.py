@@ -0,0 +1,282 @@
+import math
+
+
+class _RollingSum:
+    """
+    Fixed-window running sum with O(1) update.
+
+    The window is kept in a ring buffer. The running total is re-summed from the
+    buffer every time the buffer wraps, so floating-point drift never builds up
+    over long live sessions, and a window of only zeros always sums to exactly 0.
+    """
+    __slots__ = ("window", "buffer", "pos", "count", "total", "nonzero")
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [0.0] * window
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.nonzero = 0
+
+    def update(self, value):
+        """Adds a value and returns the window sum (NaN until the window is full)."""
+        old = self.buffer[self.pos]
+        self.buffer[self.pos] = value
+        self.total += value - old
+        self.nonzero += (value != 0) - (old != 0)
+        self.pos += 1
+        if self.pos == self.window:
+            self.pos = 0
+            self.total = math.fsum(self.buffer)
+        if self.count < self.window:
+            self.count += 1
+            if self.count < self.window:
+                return math.nan
+        return self.total if self.nonzero else 0.0
+
+
+class RSIState:
+    """
+    Incremental RSI, same values as `calculate_rsi` (rolling mean of gains / losses).
+
+    Example:
+        rsi = RSIState(period=14)
+        for candle in live_feed:
+            value = rsi.update(candle)   # NaN for the first 13 candles
+    """
+    __slots__ = ("period", "prev_close", "gains", "losses", "value")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = math.nan
+        self.gains = _RollingSum(period)
+        self.losses = _RollingSum(period)
+        self.value = math.nan
+
+    def update(self, candle):
+        close = float(candle['close'])
+        delta = close - self.prev_close          # NaN on the first candle → gain = loss = 0
+        self.prev_close = close
+
+        gain_sum = self.gains.update(delta if delta > 0 else 0.0)
+        loss_sum = self.losses.update(-delta if delta < 0 else 0.0)
+
+        avg_gain = gain_sum / self.period
+        avg_loss = loss_sum / self.period
+        rs = avg_gain / (avg_loss + 1e-10)
+        self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class EMAState:
+    """
+    Incremental EMA, same values as `calculate_ema` (pandas `ewm(span).mean()`).
+
+    adjust=False is the recursive form used for the price EMAs:
+        EMA_t = α * x_t + (1 - α) * EMA_{t-1}
+    adjust=True is pandas' default weighting, used for the MACD signal line.
+
+    Example:
+        ema = EMAState(span=20)
+        ema.update({'close': 100.0})  → 100.0
+        ema.update({'close': 105.0})  → 100.476...
+    """
+    __slots__ = ("span", "adjust", "old_wt_factor", "new_wt", "old_wt", "value", "key")
+
+    def __init__(self, span=20, adjust=False, key='close'):
+        alpha = 2 / (span + 1)
+        self.span = span
+        self.adjust = adjust
+        self.old_wt_factor = 1 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.old_wt = 1.0
+        self.value = math.nan
+        self.key = key
+
+    def update(self, candle):
+        return self.push(float(candle[self.key]))
+
+    def push(self, x):
+        """Feeds a raw value (used when the input is another indicator, e.g. MACD line)."""
+        # Same weight bookkeeping as pandas' ewm kernel, so results agree to the last bits
+        weighted = self.value
+        if weighted != weighted:
+            if x == x:
+                self.value = x
+            return self.value
+        if x == x:
+            self.old_wt *= self.old_wt_factor
+            if weighted != x:
+                weighted = (self.old_wt * weighted + self.new_wt * x) / (self.old_wt + self.new_wt)
+            if self.adjust:
+                self.old_wt += self.new_wt
+            else:
+                self.old_wt = 1.0
+            self.value = weighted
+        else:
+            self.old_wt *= self.old_wt_factor
+        return self.value
+
+
+class MACDState:
+    """
+    Incremental MACD, same values as `calculate_macd`.
+
+    Returns:
+        dict: macd, signal, histogram (floats)
+
+    Example:
+        macd = MACDState(fast=12, slow=26, signal=9)
+        out = macd.update(candle)
+        out['macd'] > out['signal'] → bullish momentum
+    """
+    __slots__ = ("fast", "slow", "signal", "value")
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal, adjust=True)
+        self.value = None
+
+    def update(self, candle):
+        macd_line = self.fast.update(candle) - self.slow.update(candle)
+        signal_line = self.signal.push(macd_line)
+        self.value = {
+            'macd': macd_line,
+            'signal': signal_line,
+            'histogram': macd_line - signal_line
+        }
+        return self.value
+
+
+class DMIState:
+    """
+    Incremental DMI, same values as `calculate_dmi` (rolling sums of TR, +DM, -DM,
+    rolling mean of DX for ADX).
+
+    Returns:
+        dict: +DI, -DI, ADX (floats, NaN during warm-up)
+
+    Example:
+        dmi = DMIState(period=14)
+        out = dmi.update({'high': 101.2, 'low': 99.8, 'close': 100.5})
+    """
+    __slots__ = ("period", "prev_high", "prev_low", "prev_close",
+                 "tr_sum", "plus_sum", "minus_sum", "dx_sum", "value")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_high = math.nan
+        self.prev_low = math.nan
+        self.prev_close = math.nan
+        self.tr_sum = _RollingSum(period)
+        self.plus_sum = _RollingSum(period)
+        self.minus_sum = _RollingSum(period)
+        self.dx_sum = _RollingSum(period)
+        self.value = None
+
+    def update(self, candle):
+        high = float(candle['high'])
+        low = float(candle['low'])
+        close = float(candle['close'])
+
+        # same definitions as calculate_dmi (both are plain .diff() of the series)
+        high_diff = high - self.prev_high
+        low_diff = low - self.prev_low
+        plus_dm = high_diff if (high_diff > low_diff and high_diff > 0) else 0.0
+        minus_dm = low_diff if (low_diff > high_diff and low_diff > 0) else 0.0
+
+        # True range; the previous-close legs are skipped on the first candle
+        tr = high - low
+        if self.prev_close == self.prev_close:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        tr_sum = self.tr_sum.update(tr)
+        plus_di = 100 * (self.plus_sum.update(plus_dm) / (tr_sum + 1e-10))
+        minus_di = 100 * (self.minus_sum.update(minus_dm) / (tr_sum + 1e-10))
+        dx = (abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)) * 100
+
+        # DX is NaN while TR warms up; ADX averages only the valid DX values
+        adx = self.dx_sum.update(dx) / self.period if dx == dx else math.nan
+
+        self.value = {'+DI': plus_di, '-DI': minus_di, 'ADX': adx}
+        return self.value
+
+
+class DivergenceState:
+    """
+    Incremental price/RSI divergence, same labels as `detect_divergence`
+    (2-candle and 3-candle checks, bullish wins over bearish).
+
+    Example:
+        div = DivergenceState()
+        label = div.update(candle, rsi_value)   → 'bullish', 'bearish' or ''
+    """
+    __slots__ = ("closes", "rsis", "count", "value")
+
+    def __init__(self):
+        self.closes = [math.nan, math.nan]   # [i-2, i-1]
+        self.rsis = [math.nan, math.nan]
+        self.count = 0
+        self.value = ''
+
+    def update(self, candle, rsi):
+        close = float(candle['close'])
+        rsi = float(rsi)
+        c2, c1 = self.closes
+        r2, r1 = self.rsis
+        self.closes = [c1, close]
+        self.rsis = [r1, rsi]
+        self.count += 1
+
+        label = ''
+        if self.count >= 3:
+            if (close < c1 and rsi > r1) or (close < c1 < c2 and rsi > r1 > r2):
+                label = 'bullish'
+            elif (close > c1 and rsi < r1) or (close > c1 > c2 and rsi < r1 < r2):
+                label = 'bearish'
+        self.value = label
+        return label
+
+
+class StreamingIndicators:
+    """
+    All strategy indicators for one instrument, updated one candle at a time.
+
+    Produces the same columns `main.py` adds to the DataFrame (every column an entry
+    rule can read), so the result can be fed straight into `should_enter_trade` for
+    live trading. 'ema' is only produced when config has an "ema" section.
+
+    Parameters:
+        config (dict): Configuration values from config.json (rsi, ema span, macd, dmi periods)
+
+    Example:
+        live = StreamingIndicators(config)
+        for candle in feed:
+            row = live.update(candle)
+            signal = should_enter_trade(row, row['rsi'], row, row, row['divergence'], config)
+    """
+    __slots__ = ("rsi", "ema", "macd", "dmi", "divergence")
+
+    def __init__(self, config):
+        self.rsi = RSIState(config["rsi"]["period"])
+        self.ema = EMAState(config["ema"]["span"]) if "ema" in config else None
+        self.macd = MACDState(**config["macd"])
+        self.dmi = DMIState(config["dmi"]["period"])
+        self.divergence = DivergenceState()
+
+    def update(self, candle):
+        rsi = self.rsi.update(candle)
+        row = dict(candle)
+        row['rsi'] = rsi
+        if self.ema is not None:
+            row['ema'] = self.ema.update(candle)
+        macd = self.macd.update(candle)
+        row['ema_fast'] = self.macd.fast.value          # the MACD's own fast / slow EMAs
+        row['ema_slow'] = self.macd.slow.value
+        row['divergence'] = self.divergence.update(candle, rsi)
+        row.update(macd)
+        row.update(self.dmi.update(candle))
+        return row
@@ -186,23 +186,21 @@
 
 
 import os
-import csv
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import shutil
 
 # --- Custom Modules ---
-from indicators.rsi import calculate_rsi
-from indicators.ema import calculate_ema
-from indicators.macd import calculate_macd
-from indicators.dmi import calculate_dmi
-from indicators.divergence import detect_divergence
-from trade_manager import (
-    TradeState, update_stop_loss, should_exit_trade,
-    execute_entry, execute_exit
-)
-from utils.signal_logic import should_enter_trade
+from indicators.pipeline import add_indicators, warmup_bars, trim_warmup
+from indicators.planner import required_outputs
+from indicators.cache import IndicatorCache, file_fingerprint
+from utils.candle_store import load_candles, read_csv_window, rows_before, save_frame
+from utils.timeframes import save_timeframes
+from engine.backtest import frame_to_bars, run_backtest, SKIPPED_MESSAGE
+from utils.rule_engine import rule_columns
+from utils.event_log import EventLog
 from analysis.performance_metrics import calculate_performance, export_trades_to_csv
 from utils.trade_visualizer import visualize_trades
 
@@ -215,17 +213,25 @@ with open("config.json") as f:
 # ----------------------------
 # Step 2: Load Historical OHLCV Data
 # ----------------------------
-df = pd.read_csv("data/nifty50_5minute_data.csv")
-df['timestamp'] = pd.to_datetime(df['timestamp'])
+data_path = config.get("data_file", "data/nifty50_5minute_data.csv")
 
-# Optional: Trim date range for backtest
+# Optional: Trim date range for backtest (only the window's rows are read)
 start_time = config.get("backtest_start_time")
 end_time = config.get("backtest_end_time")
+window = (start_time, end_time) if start_time and end_time else (None, None)
+
+# A window also loads the candles its indicators need to warm up (dropped after Step 4)
+lookback = warmup_bars(config) if start_time and end_time else 0
 
-if start_time and end_time:
-    start_dt = pd.to_datetime(start_time)
-    end_dt = pd.to_datetime(end_time)
-    df = df[(df['timestamp'] >= start_dt) & (df['timestamp'] <= end_dt)]
+store_settings = config.get("candle_store", {})
+if store_settings.get("enabled", False):
+    # Memory-mapped .npy columns (the CSV is converted once, then reused);
+    # the window is found by binary search on the stored timestamps
+    df = load_candles(data_path, store_settings.get("dir", "data/.candle_store"), *window, lookback=lookback)
+else:
+    # Chunked read that stops after the window
+    df = read_csv_window(data_path, *window, lookback=lookback)
+warmup_rows = rows_before(df, window[0])
 
 # ----------------------------
 # Step 3: Create Output Folder
@@ -237,119 +243,106 @@ os.makedirs(run_folder, exist_ok=True)
 # ----------------------------
 # Step 4: Compute Technical Indicators
 # ----------------------------
-df['rsi'] = calculate_rsi(df, config["rsi"]["period"])
-df['ema_fast'] = calculate_ema(df, config["macd"]["fast"])
-df['ema_slow'] = calculate_ema(df, config["macd"]["slow"])
-macd = calculate_macd(df, **config["macd"])
-dmi = calculate_dmi(df, config["dmi"]["period"])
-df['divergence'] = detect_divergence(df, df['rsi'])
-
-# Combine all outputs into DataFrame
-df = pd.concat([df, pd.DataFrame(macd), pd.DataFrame(dmi)], axis=1)
-
-# Initialize column to log SL trail during active trades
-df['stop_loss'] = None
+# Only what the strategy, the trade log and these charts read (+ config "extra_indicators")
+indicators_to_plot = ['rsi', 'macd', 'dmi', 'divergence']
+outputs = required_outputs(config, plots=indicators_to_plot)
+
+# Reuse indicator series from earlier runs on the same data and parameters
+cache_settings = config.get("indicator_cache", {})
+if cache_settings.get("enabled", False):
+    cache = IndicatorCache(cache_settings.get("dir", "output/.indicator_cache"), cache_settings.get("max_mb", 512))
+    row_range = (int(df.index[0]), int(df.index[-1]) + 1) if len(df) else (0, 0)
+    source = (file_fingerprint(data_path, cache.cache_dir), row_range)
+    df = add_indicators(df, config, cache=cache, source=source, outputs=outputs)
+else:
+    df = add_indicators(df, config, outputs=outputs)
+
+# Keep only the requested window; indicators there are already warmed up
+df, start_bar = trim_warmup(df, warmup_rows)
 
 # ----------------------------
-# Step 5: Initialize Trade Manager
+# Step 5: Extract Column Arrays for the Engine
 # ----------------------------
-state = TradeState(
-    total_capital=config["capital"]["total_capital"],
-    capital_per_trade=config["capital"]["per_trade"]
-)
+bars = frame_to_bars(df, extra=rule_columns(config))
 
 # ----------------------------
-# Step 6: Iterate Candles to Simulate Strategy
+# Step 6: Simulate Strategy over the Candle Arrays
 # ----------------------------
-for i in range(30, len(df)):  # start after warm-up period
-    row = df.iloc[i]
-    price = row['close']
-
-    if state.active_trade is None:
-        # Check if strategy wants to enter new trade
-        signal = should_enter_trade(
-            row=row,
-            rsi=row['rsi'],
-            macd_row=row,
-            dmi_row=row,
-            divergence=row['divergence'],
-            config=config
-        )
-        if signal:
-            if state.available_capital >= state.capital_per_trade:
-                execute_entry(row, signal, state, config)
-            else:
-                state.trades.append((row['timestamp'], "💸 Skipped: Insufficient capital"))
-
-    else:
-        # Check for SL hit or update SL trail
-        if should_exit_trade(price, state):
-            execute_exit(row, state)
-        else:
-            update_stop_loss(price, state, config["stop_loss_percent"])
-            df.at[i, 'stop_loss'] = state.stop_loss  # ✅ Log latest SL to visualize later
+# Entry / exit / skip events: console lines + trade_events.jsonl (background writer)
+event_log = EventLog.from_config(config, path=f"{run_folder}/trade_events.jsonl")
+result = run_backtest(
+    bars, config,
+    start_bar=start_bar,  # 30 without warm-up candles, 0 when the window has them
+    mode=config.get("backtest_mode", "bars"),
+    log=event_log
+)
+event_log.close()
+
+# Trailing SL per candle (float64, NaN when flat), aligned with the candle rows
+stop_loss = result['stop_loss']
 
 # ----------------------------
 # Step 7: Save Trade Logs
 # ----------------------------
 
-# Separate valid trades from incomplete entries
-full_logs = []
-incomplete_trades = []
+ledger = result['ledger']
+trades = ledger.columns()  # completed trades, rounded like executed_trades.csv
 
-for trade in state.trades:
-    if isinstance(trade, dict) and all(k in trade for k in ["entry_time", "exit_time", "entry_price", "exit_price"]):
-        full_logs.append(trade)
-    else:
-        incomplete_trades.append(trade)
-
-# Save enriched OHLCV data with indicators and SL
+# Save enriched OHLCV data with indicators, and the SL trail as a bar-indexed array
 df.to_csv(f"{run_folder}/calculated_indicators.csv", index=False)
+save_frame(df, f"{run_folder}/candles")  # binary copy for the chart / dashboard
+save_timeframes(df, f"{run_folder}/timeframes")  # 15min … 1D bars for the dashboard's time window
+np.save(f"{run_folder}/stop_loss.npy", stop_loss)
+np.save(f"{run_folder}/equity.npy", result['equity'])  # mark-to-market equity per candle
 
 # Save trade log (readable)
 with open(f"{run_folder}/trade_log.txt", "w") as f:
     f.write("--- TRADE LOG ---\n")
-    for trade in full_logs:
+    for entry_time, exit_time, direction, entry_price, exit_price, profit, return_pct, capital_left in zip(
+        trades['entry_time'], trades['exit_time'], trades['direction'],
+        trades['entry_price'].tolist(), trades['exit_price'].tolist(), trades['profit'].tolist(),
+        trades['return_pct'].tolist(), trades['capital_left'].tolist()
+    ):
         f.write(
-            f"{trade['entry_time']} → {trade['exit_time']} | "
-            f"{trade['direction'].upper()} | Entry: ₹{trade['entry_price']} | "
-            f"Exit: ₹{trade['exit_price']} | PnL: ₹{trade['profit']} | "
-            f"Return: {trade['return_pct']}% | Capital Left: ₹{trade['capital_left']}\n"
+            f"{entry_time} → {exit_time} | "
+            f"{direction.upper()} | Entry: ₹{entry_price} | "
+            f"Exit: ₹{exit_price} | PnL: ₹{profit} | "
+            f"Return: {return_pct}% | Capital Left: ₹{capital_left}\n"
         )
 
-# Save incomplete trades separately
-if incomplete_trades:
+# Save incomplete trades (still open at the end) and skipped entries separately
+open_trades = ledger.open_trades()
+if open_trades or ledger.skipped:
     with open(f"{run_folder}/incomplete_trades.txt", "w") as f:
         f.write("--- INCOMPLETE TRADES ---\n")
-        for trade in incomplete_trades:
+        for trade in open_trades:
             f.write(f"{trade}\n")
+        if ledger.skipped:
+            f.write(f"{SKIPPED_MESSAGE} × {ledger.skipped}\n")
 
 # Export complete trades to CSV
-csv_file = f"{run_folder}/executed_trades.csv"
-with open(csv_file, mode='w', newline='') as file:
-    writer = csv.DictWriter(file, fieldnames=[
-        "entry_time", "exit_time", "direction",
-        "entry_price", "exit_price", "position_size",
-        "rsi", "macd", "signal_line", "+DI", "-DI", "adx", "divergence", "entry_reason",
-        "profit", "return_pct", "capital_left", "entry_sl"
-    ])
-    writer.writeheader()
-    writer.writerows(full_logs)
+ledger.to_csv(f"{run_folder}/executed_trades.csv", include_bars=True)  # bar indices for the chart / dashboard
 
 # ----------------------------
 # Step 8: Print Performance Summary
 # ----------------------------
-metrics = calculate_performance(full_logs)
+metrics = calculate_performance(trades, equity=result['equity'], position=result['position'])
 print("\n--- STRATEGY PERFORMANCE ---")
 for k, v in metrics.items():
     print(f"{k}: {v}")
 
+summary = {
+    "summary_metrics": metrics,
+    "run_timestamp": timestamp,
+    "capital_used": config["capital"]
+}
+if result['aborted']:
+    # early_abort limit hit: the metrics above cover the trades closed until then
+    print(f"⛔ Backtest aborted at bar {result['aborted']['bar']}: {result['aborted']['reason']}")
+    summary["aborted"] = result['aborted']
+
 with open(f"{run_folder}/performance_summary.json", "w") as f:
-    json.dump({
-        "summary_metrics": metrics,
-        "run_timestamp": timestamp,
-        "capital_used": config["capital"]
-    }, f, indent=4)
+    json.dump(summary, f, indent=4)
 
 # ----------------------------
 # Step 9: Generate Interactive Trade Chart
@@ -359,7 +352,8 @@ visualize_trades(
     candles_csv=f"{run_folder}/calculated_indicators.csv",
     trades_csv=f"{run_folder}/executed_trades.csv",
     output_path=run_folder,
-    indicators_to_plot=['rsi', 'macd', 'dmi', 'divergence'],
+    stop_loss=stop_loss,
+    indicators_to_plot=indicators_to_plot,
     start_time=start_time,
     end_time=end_time
 )
@@ -1,7 +1,13 @@
+import numpy as np
 import pandas as pd
 
+from engine.ledger import TradeLedger, REASON_LABELS
+from indicators.divergence import DIVERGENCE_LABELS
+from utils.event_log import EventLog
+from utils.signal_logic import condition_checks
+
 class TradeState:
-    def __init__(self, total_capital=50000, capital_per_trade=5000):
+    def __init__(self, total_capital=50000, capital_per_trade=5000, n_bars=0, log=None):
         """
         Tracks and manages a single active trade (BUY or SHORT) using capital and position sizing.
 
@@ -16,7 +22,9 @@ class TradeState:
             capital_per_trade (float): Max allocation per trade
 
             entry_time (str): Timestamp of entry (for merging into trade record)
-            trades (list): Unified log of completed trades
+            trades (TradeLedger): Columnar log of entries / exits and skipped-entry count
+            sl_trail (np.ndarray): Trailing SL per bar (length n_bars, grown on demand), NaN while flat
+            log (EventLog): Receives entry / exit events (INFO, console lines by default) and skips (DEBUG)
         """
         self.active_trade = None
         self.entry_price = None
@@ -28,8 +36,9 @@ class TradeState:
         self.available_capital = total_capital
         self.capital_per_trade = capital_per_trade
 
-        self.trades = []  # unified trade record list
-        self.sl_trail = []  # optional: SL trail log
+        self.trades = TradeLedger()  # unified trade ledger
+        self.sl_trail = np.full(n_bars, np.nan)  # SL trail indexed by bar
+        self.log = log if log is not None else EventLog()
 
     def reset(self):
         """
@@ -40,10 +49,9 @@ class TradeState:
         self.stop_loss = None
         self.position_size = 0
         self.entry_time = None
-        self.sl_trail = []
 
 
-def update_stop_loss(current_price, state, sl_percent=0.02):
+def update_stop_loss(current_price, state, sl_percent=0.02, bar=None):
     """
     Dynamically updates the trailing stop-loss based on price movement.
 
@@ -51,6 +59,8 @@ def update_stop_loss(current_price, state, sl_percent=0.02):
         current_price (float): Latest close price
         state (TradeState): Current trade state
         sl_percent (float): SL trail percentage (default = 2%)
+        bar (int, optional): Bar position of the candle; the updated SL is stored in state.sl_trail[bar]
+                             (the trail grows when bar is past its end)
 
     Returns:
         float: Updated SL
@@ -71,12 +81,14 @@ def update_stop_loss(current_price, state, sl_percent=0.02):
         if new_sl < state.stop_loss:
             state.stop_loss = new_sl
 
-    # Log SL trail if needed
-    if state.active_trade:
-        state.sl_trail.append({
-            "timestamp": pd.to_datetime("now"),
-            "stop_loss": state.stop_loss
-        })
+    # Record SL trail for this candle
+    if state.active_trade and bar is not None:
+        if bar >= len(state.sl_trail):
+            # n_bars unknown (e.g. live candles): grow the trail geometrically, NaN while flat
+            grown = np.full(max(bar + 1, 2 * len(state.sl_trail)), np.nan)
+            grown[:len(state.sl_trail)] = state.sl_trail
+            state.sl_trail = grown
+        state.sl_trail[bar] = state.stop_loss
 
     return state.stop_loss
 
@@ -99,24 +111,77 @@ def should_exit_trade(current_price, state):
     return False
 
 
-def execute_entry(row, signal, state, config):
+def entry_conditions(signal, rsi, macd, signal_line, plus_di, minus_di, adx, divergence, config):
+    """
+    Evaluates the entry-reason checks (CONDITION_RULES) from the (rounded) indicator context.
+
+    Parameters:
+        signal (str): 'buy' or 'short'
+        rsi, macd, signal_line, plus_di, minus_di, adx (float): Rounded indicator values
+        divergence (str): 'bullish', 'bearish', or ''
+        config (dict): Contains RSI thresholds and min_adx_strength
+
+    Returns:
+        list[bool]: One flag per label in REASON_LABELS (same order)
+    """
+    values = {'rsi': rsi, 'macd': macd, 'signal': signal_line, '+DI': plus_di, '-DI': minus_di,
+              'ADX': adx, 'divergence': divergence}
+    return condition_checks(values, signal, config)
+
+
+def reason_text(signal, checks):
+    """
+    Comma-separated labels of the entry conditions that held (see `entry_conditions`).
+
+    Example:
+        reason_text('buy', [True, False, False, True, True]) → "RSI < oversold, ADX strong, Bullish Divergence"
+    """
+    labels = REASON_LABELS[1 if signal == 'buy' else -1]
+    return ", ".join(label for label, ok in zip(labels, checks) if ok)
+
+
+def entry_reason(signal, rsi, macd, signal_line, plus_di, minus_di, adx, divergence, config):
+    """
+    Builds the human-readable entry reason from the (rounded) indicator context.
+
+    Parameters:
+        signal (str): 'buy' or 'short'
+        rsi, macd, signal_line, plus_di, minus_di, adx (float): Rounded indicator values
+        divergence (str): 'bullish', 'bearish', or ''
+        config (dict): Contains RSI thresholds and min_adx_strength
+
+    Returns:
+        str: Comma-separated list of the conditions that were true at entry
+
+    Example:
+        BUY with RSI 28, ADX 31 and bullish divergence
+        → "RSI < oversold, ADX strong, Bullish Divergence"
+    """
+    if signal not in ('buy', 'short'):
+        return ""
+    return reason_text(signal, entry_conditions(signal, rsi, macd, signal_line, plus_di, minus_di, adx, divergence, config))
+
+
+def execute_entry(row, signal, state, config, bar=None):
     """
     Executes entry logic: assigns trade state, updates capital, computes qty.
 
     Parameters:
-        row (pd.Series): Candle row with indicator values
+        row (pd.Series or dict): Candle row with indicator values (e.g. from StreamingIndicators.update)
         signal (str): 'buy' or 'short'
         state (TradeState): Current trade state
         config (dict): Contains stop_loss_percent
+        bar (int, optional): Bar position of the candle, recorded as the trade's entry_bar
 
     Modifies:
         state: Sets trade details and deducts capital
     """
     price = row['close']
-    timestamp = row['timestamp']
+    timestamp = pd.Timestamp(row['timestamp'])
 
     if state.available_capital < state.capital_per_trade:
-        print(f"[{timestamp}] ❌ Skipped entry due to insufficient capital.")
+        state.trades.skip()
+        state.log.debug("skip", time=timestamp)
         return
 
     # Assign trade state
@@ -138,58 +203,39 @@ def execute_entry(row, signal, state, config):
     adx = round(row['ADX'], 2)
     divergence = row['divergence']
 
-    reason = []
-    if signal == 'buy':
-        if rsi < config["rsi"]["oversold"]: reason.append("RSI < oversold")
-        if macd > signal_line: reason.append("MACD > Signal")
-        if plus_di > minus_di: reason.append("+DI > -DI")
-        if adx > config["min_adx_strength"]: reason.append("ADX strong")
-        if divergence == "bullish": reason.append("Bullish Divergence")
-    elif signal == 'short':
-        if rsi > config["rsi"]["overbought"]: reason.append("RSI > overbought")
-        if macd < signal_line: reason.append("MACD < Signal")
-        if minus_di > plus_di: reason.append("-DI > +DI")
-        if adx > config["min_adx_strength"]: reason.append("ADX strong")
-        if divergence == "bearish": reason.append("Bearish Divergence")
-
-    reason_str = ", ".join(reason)
-
-    # Log enriched trade entry info
-    state.trades.append({
-        "entry_time": timestamp,
-        "direction": signal,
-        "entry_price": round(price, 2),
-        "position_size": state.position_size,
-        "capital_left": round(state.available_capital, 2),
-        "rsi": rsi,
-        "macd": macd,
-        "signal_line": signal_line,
-        "+DI": plus_di,
-        "-DI": minus_di,
-        "adx": adx,
-        "divergence": divergence,
-        "entry_reason": reason_str,
-        "entry_sl": round(state.stop_loss, 2)
-    })
-
-    print(f"[{timestamp}] ✅ ENTER {signal.upper()} @ ₹{price:.2f} | Qty: {state.position_size} | Reason: {reason_str}")
-
-
-def execute_exit(row, state):
+    checks = entry_conditions(signal, rsi, macd, signal_line, plus_di, minus_di, adx, divergence, config)
+    reason_str = reason_text(signal, checks)
+
+    # Log enriched trade entry info (raw values; the ledger rounds on export)
+    if state.trades.tz is None:
+        state.trades.tz = timestamp.tz
+    state.trades.open(
+        -1 if bar is None else bar, timestamp.value, 1 if signal == 'buy' else -1,
+        price, state.position_size, state.available_capital, state.stop_loss,
+        row['rsi'], row['macd'], row['signal'], row['+DI'], row['-DI'], row['ADX'],
+        DIVERGENCE_LABELS.index(divergence) if divergence in DIVERGENCE_LABELS else 0,
+        reason=sum(1 << k for k, ok in enumerate(checks) if ok)
+    )
+
+    state.log.info("entry", time=timestamp, side=signal.upper(), price=price, qty=state.position_size, reason=reason_str)
+
+
+def execute_exit(row, state, bar=None):
     """
     Finalizes trade: computes PnL, restores capital, logs unified trade dict.
 
     Parameters:
-        row (pd.Series): Current candle with 'timestamp' and 'close'
+        row (pd.Series or dict): Current candle with 'timestamp' and 'close'
         state (TradeState): Current trade state
+        bar (int, optional): Bar position of the candle, recorded as the trade's exit_bar
 
     Modifies:
         - Updates available capital
-        - Updates last trade in state.trades with exit data
+        - Updates last trade in the state.trades ledger with exit data
         - Resets state
     """
     exit_price = row['close']
-    timestamp = row['timestamp']
+    timestamp = pd.Timestamp(row['timestamp'])
     direction = state.active_trade
     qty = state.position_size
     entry_price = state.entry_price
@@ -203,14 +249,11 @@ def execute_exit(row, state):
     state.available_capital += (state.capital_per_trade + profit)
 
     # Add exit data to the last trade
-    state.trades[-1].update({
-        "exit_time": timestamp,
-        "exit_price": round(exit_price, 2),
-        "profit": round(profit, 2),
-        "return_pct": round(return_pct, 2),
-        "capital_left": round(state.available_capital, 2)
-    })
-
-    print(f"[{timestamp}] 🔁 EXIT {direction.upper()} @ ₹{exit_price:.2f} | PnL: ₹{profit:.2f} | Return: {return_pct:.2f}%")
+    state.trades.close(
+        len(state.trades) - 1, -1 if bar is None else bar, timestamp.value,
+        exit_price, profit, return_pct, state.available_capital
+    )
+
+    state.log.info("exit", time=timestamp, side=direction.upper(), price=exit_price, profit=profit, return_pct=return_pct)
 
     state.reset()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+
+def _ns(times):
+    """int64 ns of datetimes (UTC for tz-aware values, wall time for naive ones)."""
+    return pd.DatetimeIndex(pd.to_datetime(times)).as_unit("ns").asi8
+
+
+def bar_slice(trade):
+    """
+    Positional slice entry_bar .. exit_bar (inclusive) of a trade carrying bar
+    indices from the engine, or None when it has none.
+    """
+    entry_bar = trade.get("entry_bar")
+    exit_bar = trade.get("exit_bar")
+    if entry_bar is None or exit_bar is None or pd.isna(entry_bar) or pd.isna(exit_bar):
+        return None
+    if entry_bar < 0 or exit_bar < 0:                 # recorded without bar positions
+        return None
+    return slice(int(entry_bar), int(exit_bar) + 1)
+
+
+class CandleIndex:
+    """
+    Sorted timestamp index that maps times to candle positions with np.searchsorted.
+
+    Segments are returned as positional slices, so `df.iloc[segment]` is a view of
+    the candle frame instead of a boolean mask over every row. Trades written with
+    entry_bar / exit_bar columns (`ledger.to_csv(..., include_bars=True)`) need no
+    lookup at all.
+
+    Attributes:
+        ns (np.ndarray[int64]): Candle times in ns, increasing
+
+    Example:
+        index = CandleIndex(df['timestamp'])
+        df.iloc[index.span("2024-01-02 09:15", "2024-01-02 15:30")]   # one session
+        df.iloc[index.trade_slice(trade)]                             # entry to exit candle
+    """
+    __slots__ = ("ns",)
+
+    def __init__(self, timestamps):
+        self.ns = _ns(timestamps)
+        if len(self.ns) > 1 and (np.diff(self.ns) < 0).any():
+            raise ValueError("CandleIndex needs timestamps in increasing order")
+
+    def __len__(self):
+        return len(self.ns)
+
+    def locate(self, times, side="left"):
+        """
+        Candle positions of `times` (np.searchsorted semantics).
+
+        side="left" gives the first candle at or after each time, side="right" the
+        first candle after it. Times must be tz-aware / naive like the candles.
+        """
+        return np.searchsorted(self.ns, _ns(np.atleast_1d(times)), side=side)
+
+    def span(self, start_time=None, end_time=None):
+        """
+        Slice of the candles with start_time <= timestamp <= end_time (open ends allowed).
+
+        Example:
+            df.iloc[index.span(start_time=trade['entry_time'])]   → entry candle onwards
+        """
+        start = 0 if start_time is None else int(self.locate(start_time, "left")[0])
+        stop = len(self.ns) if end_time is None else int(self.locate(end_time, "right")[0])
+        return slice(start, max(start, stop))
+
+    def trade_bars(self, trades):
+        """
+        Entry and exit candle positions of every trade.
+
+        Uses the engine's entry_bar / exit_bar columns when present; otherwise the
+        entry / exit times are looked up (exit: last candle at or before exit_time).
+
+        Parameters:
+            trades (pd.DataFrame or Mapping): Trades with entry_bar / exit_bar or entry_time / exit_time
+
+        Returns:
+            (np.ndarray[int64], np.ndarray[int64]): entry bars, exit bars
+        """
+        if "entry_bar" in trades and "exit_bar" in trades:
+            return (np.asarray(trades["entry_bar"], dtype=np.int64),
+                    np.asarray(trades["exit_bar"], dtype=np.int64))
+        entry_bar = self.locate(trades["entry_time"], "left")
+        exit_bar = self.locate(trades["exit_time"], "right") - 1
+        return entry_bar.astype(np.int64), exit_bar.astype(np.int64)
+
+    def trade_slice(self, trade):
+        """
+        Candles of one trade, entry to exit inclusive, as a positional slice.
+
+        Parameters:
+            trade (pd.Series or Mapping): One trade (entry_bar / exit_bar, or entry_time / exit_time)
+        """
+        bars = bar_slice(trade)
+        return bars if bars is not None else self.span(trade["entry_time"], trade["exit_time"])
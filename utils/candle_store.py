@@ -0,0 +1,340 @@
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = "data/.candle_store"
+META_FILE = "meta.json"
+
+
+def _tz_name(tz):
+    return None if tz is None else str(tz)
+
+
+def _encode(series, info):
+    """
+    Converts one column (or one chunk of it) to its stored form.
+
+    Returns:
+        tuple: (np.ndarray, categories or None); `info` gets the column kind / timezone
+    """
+    if isinstance(series.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+        times = pd.DatetimeIndex(series)
+        if "kind" not in info:
+            info["kind"] = "datetime"
+            info["tz"] = _tz_name(times.tz)
+        return times.as_unit("ns").asi8, None
+    if isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series.dtype):
+        codes = pd.Categorical(series)
+        info.setdefault("kind", "categorical")
+        return codes.codes, [str(c) for c in codes.categories]
+    info.setdefault("kind", "numeric")
+    return series.to_numpy(), None
+
+
+def _merge_segments(store_dir, info, segments):
+    """Joins the per-chunk arrays of one column into its final .npy file."""
+    target = os.path.join(store_dir, info["file"])
+    if info["kind"] == "categorical":
+        categories = []
+        seen = {}
+        for _, cats in segments:
+            for c in cats:
+                if c not in seen:
+                    seen[c] = len(categories)
+                    categories.append(c)
+        info["categories"] = categories
+        dtype = np.int8 if len(categories) < 128 else np.int16 if len(categories) < 32768 else np.int32
+    else:
+        dtype = np.result_type(*[np.load(path, mmap_mode="r").dtype for path, _ in segments]) if segments else np.float64
+
+    if len(segments) == 1 and info["kind"] != "categorical" and np.load(segments[0][0], mmap_mode="r").dtype == dtype:
+        os.replace(segments[0][0], target)
+        return
+
+    parts = [np.load(path, mmap_mode="r") for path, _ in segments]
+    out = np.lib.format.open_memmap(target, mode="w+", dtype=dtype, shape=(sum(len(p) for p in parts),))
+    pos = 0
+    for part, (path, cats) in zip(parts, segments):
+        if info["kind"] == "categorical":
+            mapping = np.array([seen[c] for c in cats] + [-1], dtype=dtype)   # code -1 (missing) → -1
+            out[pos:pos + len(part)] = mapping[part]
+        else:
+            out[pos:pos + len(part)] = part
+        pos += len(part)
+    out.flush()
+    del out, parts
+    for path, _ in segments:
+        os.remove(path)
+
+
+def save_frames(frames, store_dir, source=None):
+    """
+    Writes a sequence of DataFrame chunks (same columns) as one .npy file per column
+    plus meta.json. Each chunk is written out before the next is read, so peak
+    memory is one chunk, not the whole file.
+
+    Datetime columns are stored as int64 nanoseconds since the epoch (UTC when
+    tz-aware) with their timezone in the metadata, categorical and text columns as
+    int8/int16 codes with their labels, everything else with its own dtype.
+
+    Parameters:
+        frames (iterable of pd.DataFrame): Chunks in row order
+        store_dir (str): Target folder (created if needed)
+        source (dict, optional): Source file info saved in meta.json (used for staleness checks)
+
+    Example:
+        save_frames(pd.read_csv(path, chunksize=500_000), "data/.candle_store/nifty50_5minute_data")
+        → 000.npy (timestamp), 001.npy (open), ..., meta.json
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    meta_path = os.path.join(store_dir, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)                                   # store is incomplete until rewritten
+    columns, segments, rows = None, None, 0
+    for k, df in enumerate(frames):
+        if columns is None:
+            columns = [{"name": col, "file": f"{i:03d}.npy"} for i, col in enumerate(df.columns)]
+            segments = [[] for _ in columns]
+        for info, parts in zip(columns, segments):
+            values, categories = _encode(df[info["name"]], info)
+            path = os.path.join(store_dir, f"{info['file']}.part{k}")
+            with open(path, "wb") as f:
+                np.save(f, np.ascontiguousarray(values))
+            parts.append((path, categories))
+        rows += len(df)
+
+    columns = columns or []
+    for info, parts in zip(columns, segments or []):
+        _merge_segments(store_dir, info, parts)
+
+    meta = {"rows": rows, "columns": columns, "source": source}
+    tmp_path = os.path.join(store_dir, f"{META_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=4)
+    os.replace(tmp_path, meta_path)                            # meta last: store is complete
+
+
+def save_frame(df, store_dir, source=None):
+    """
+    Writes one DataFrame to the store (see `save_frames`).
+
+    Example:
+        save_frame(df, "output/latest/candles")
+    """
+    save_frames([df], store_dir, source)
+
+
+def read_meta(store_dir):
+    path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def open_columns(store_dir, columns=None):
+    """
+    Memory-maps the stored columns (no parsing, no copy).
+
+    Returns:
+        tuple: (dict name → np.memmap, meta dict)
+    """
+    meta = read_meta(store_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No candle store in {store_dir}")
+    arrays = {}
+    for info in meta["columns"]:
+        if columns is None or info["name"] in columns:
+            arrays[info["name"]] = np.load(os.path.join(store_dir, info["file"]), mmap_mode="r")
+    return arrays, meta
+
+
+def load_frame(store_dir, columns=None, rows=None):
+    """
+    Builds a DataFrame on top of the memory-mapped columns.
+
+    Parameters:
+        store_dir (str): Folder written by `save_frame`
+        columns (list, optional): Subset of columns to load
+        rows (slice, optional): Row range, e.g. slice(1000, 5000); only those pages are read
+
+    Returns:
+        pd.DataFrame: Timestamps come back tz-aware (as saved), categoricals as pd.Categorical.
+                      The index holds the row numbers in the store (like a boolean-mask filter).
+
+    Example:
+        df = load_frame("output/latest/candles")
+    """
+    arrays, meta = open_columns(store_dir, columns)
+    index = pd.RangeIndex(*(rows if rows is not None else slice(None)).indices(meta["rows"]))
+    rows = rows if rows is not None else slice(None)
+    data = {}
+    for info in meta["columns"]:
+        name = info["name"]
+        if name not in arrays:
+            continue
+        values = arrays[name][rows]
+        if info["kind"] == "datetime":
+            times = pd.DatetimeIndex(values.view("M8[ns]"))
+            data[name] = times.tz_localize("UTC").tz_convert(info["tz"]) if info["tz"] else times
+        elif info["kind"] == "categorical":
+            data[name] = pd.Categorical.from_codes(values, info["categories"])
+        else:
+            data[name] = values
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def to_ns(value, tz=None):
+    """
+    Converts a time bound to int64 nanoseconds comparable with stored timestamps.
+
+    Naive bounds are read in the data's timezone, e.g. "2025-06-09 09:15" with
+    tz "UTC+05:30" → 2025-06-09 03:45 UTC.
+    """
+    ts = pd.Timestamp(value)
+    if tz is not None:
+        ts = ts.tz_localize(tz) if ts.tz is None else ts.tz_convert(tz)
+    elif ts.tz is not None:
+        ts = ts.tz_localize(None)
+    return ts.as_unit("ns").value
+
+
+def find_rows(timestamps, start=None, end=None, tz=None, lookback=0):
+    """
+    Row range of a [start, end] time window (both inclusive) by binary search.
+
+    Parameters:
+        timestamps (np.ndarray[int64]): Sorted stored timestamps (ns)
+        start, end (str or pd.Timestamp, optional): Window bounds; None = open-ended
+        tz (str, optional): Timezone of the data (for naive bounds)
+        lookback (int): Extra rows kept before the window (indicator warm-up)
+
+    Returns:
+        tuple: (first row incl. lookback, first window row, end row exclusive)
+
+    Example:
+        find_rows(ts, "2024-01-01", "2024-01-31", lookback=100)  → (40150, 40250, 41900)
+    """
+    lo = int(np.searchsorted(timestamps, to_ns(start, tz), side="left")) if start is not None else 0
+    hi = int(np.searchsorted(timestamps, to_ns(end, tz), side="right")) if end is not None else len(timestamps)
+    hi = max(lo, hi)
+    first = max(0, lo - lookback) if hi > lo else lo       # empty window → no warm-up rows either
+    return first, lo, hi
+
+
+def _source_info(csv_path):
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def store_path(csv_path, store_root=DEFAULT_STORE_DIR):
+    """Store folder used for a CSV file, e.g. data/.candle_store/nifty50_5minute_data."""
+    return os.path.join(store_root, os.path.splitext(os.path.basename(csv_path))[0])
+
+
+def rows_before(df, start):
+    """
+    Number of leading rows of `df` with a timestamp before `start` (warm-up rows
+    returned by the loaders' `lookback`).
+    """
+    if start is None or not len(df):
+        return 0
+    times = pd.DatetimeIndex(df['timestamp'])
+    return int(np.searchsorted(times.as_unit("ns").asi8, to_ns(start, times.tz), side="left"))
+
+
+def _csv_chunks(csv_path, chunksize):
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+        yield chunk
+
+
+def convert_csv(csv_path, store_root=DEFAULT_STORE_DIR, chunksize=500_000):
+    """
+    One-time conversion of an OHLCV CSV into the binary store, `chunksize` rows at a time.
+
+    Returns:
+        str: Store folder
+    """
+    target = store_path(csv_path, store_root)
+    save_frames(_csv_chunks(csv_path, chunksize), target, source=_source_info(csv_path))
+    return target
+
+
+def read_csv_window(csv_path, start=None, end=None, lookback=0, chunksize=500_000):
+    """
+    Reads only the rows of a time window (plus `lookback` earlier rows) from a CSV
+    sorted by timestamp, without building the whole file in memory.
+
+    Chunks before the window are parsed and dropped (only the last `lookback` rows
+    are kept), and reading stops at the first chunk past `end`, so peak memory is
+    one chunk plus the window.
+
+    Returns:
+        pd.DataFrame: Same as pd.read_csv + pd.to_datetime + boolean time filter
+                      (index = row numbers in the file)
+
+    Example:
+        df = read_csv_window("data/nifty50_5minute_data.csv", "2024-01-01", "2024-01-31")
+    """
+    pieces, tail = [], None
+    for chunk in _csv_chunks(csv_path, chunksize):
+        times = pd.DatetimeIndex(chunk['timestamp'])
+        _, lo, hi = find_rows(times.as_unit("ns").asi8, start, end, times.tz)
+        if not pieces:
+            warm = chunk.iloc[:lo] if tail is None else pd.concat([tail, chunk.iloc[:lo]])
+            tail = warm.iloc[len(warm) - min(lookback, len(warm)):]
+            if lo == len(chunk):
+                continue                        # window not reached yet
+            pieces.append(tail)
+        pieces.append(chunk.iloc[lo:hi])
+        if hi < len(chunk):
+            break                               # past the end of the window
+    if not pieces:
+        return tail.iloc[0:0] if tail is not None else pd.read_csv(csv_path, nrows=0)
+    return pd.concat(pieces)
+
+
+def ensure_store(csv_path, store_root=DEFAULT_STORE_DIR):
+    """
+    Returns the store folder for a CSV, converting it first if the store is
+    missing or older than the CSV (size / mtime changed).
+    """
+    target = store_path(csv_path, store_root)
+    meta = read_meta(target)
+    if meta is None or meta.get("source") != _source_info(csv_path):
+        convert_csv(csv_path, store_root)
+    return target
+
+
+def load_candles(csv_path, store_root=DEFAULT_STORE_DIR, start=None, end=None, lookback=0):
+    """
+    Loads candles through the binary store (converted on first use).
+
+    With `start` / `end`, the window is found by binary search on the memory-mapped
+    timestamps and only its rows (plus `lookback` earlier rows) are read.
+
+    Example:
+        df = load_candles("data/nifty50_5minute_data.csv")
+        → same columns as pd.read_csv + pd.to_datetime, memory-mapped
+        df = load_candles("data/nifty50_5minute_data.csv", start="2024-01-01", end="2024-01-31")
+    """
+    store_dir = ensure_store(csv_path, store_root)
+    if start is None and end is None:
+        return load_frame(store_dir)
+    arrays, meta = open_columns(store_dir, ["timestamp"])
+    tz = next(info["tz"] for info in meta["columns"] if info["name"] == "timestamp")
+    first, _, hi = find_rows(arrays["timestamp"], start, end, tz, lookback)
+    return load_frame(store_dir, rows=slice(first, hi))
+
+
+if __name__ == "__main__":
+    # Convert every CSV given on the command line (default: data/*.csv)
+    import glob
+
+    paths = sys.argv[1:] or sorted(glob.glob("data/*.csv"))
+    for path in paths:
+        print(f"📦 {path} → {ensure_store(path)}")
@@ -0,0 +1,154 @@
+import json
+import queue
+import atexit
+import threading
+from collections import deque
+
+# Event levels (same numbers as the logging module); SILENT drops everything
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+SILENT = 100
+
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "SILENT": SILENT}
+LEVEL_NAMES = {number: name for name, number in LEVELS.items()}
+
+# Console line per event type (the emoji lines the backtest always printed)
+CONSOLE_FORMATS = {
+    "entry": "[{time}] ✅ ENTER {side} @ ₹{price:.2f} | Qty: {qty} | Reason: {reason}",
+    "exit": "[{time}] 🔁 EXIT {side} @ ₹{price:.2f} | PnL: ₹{profit:.2f} | Return: {return_pct:.2f}%",
+    "skip": "[{time}] ❌ Skipped entry due to insufficient capital.",
+}
+
+
+def format_event(record):
+    """
+    Renders an event record as the human-readable console line.
+
+    Example:
+        {"event": "exit", "time": "2025-06-09 10:30:00+05:30", "side": "BUY", "price": 101.5, ...}
+        → "[2025-06-09 10:30:00+05:30] 🔁 EXIT BUY @ ₹101.50 | PnL: ₹73.89 | Return: 1.48%"
+    """
+    template = CONSOLE_FORMATS.get(record["event"])
+    if template is None:
+        return json.dumps(record, default=str, ensure_ascii=False)
+    return template.format(**record)
+
+
+class EventLog:
+    """
+    Structured trade-event log with levels, a bounded ring buffer and an optional
+    background JSON-lines writer.
+
+    Records are plain dicts ({"level", "event", ...fields}). Events below `level` are
+    dropped before any formatting happens; callers that need to build expensive
+    fields (timestamps, reason strings) check `enabled()` first, so a SILENT log
+    costs one attribute lookup per event.
+
+    Parameters:
+        level (str or int): Minimum level kept ("DEBUG", "INFO", "WARNING", "ERROR", "SILENT")
+        capacity (int): Number of most recent records kept in memory (`records()`)
+        echo (bool): Also print each record as its console line
+        path (str, optional): JSON-lines file written by a background thread
+
+    Example:
+        log = EventLog(level="INFO", path="output/run/trade_events.jsonl")
+        result = run_backtest(bars, config, log=log)
+        log.close()                      # flushes the writer thread
+
+        run_backtest(bars, config, log=EventLog.silent())   # sweeps: no output at all
+    """
+
+    def __init__(self, level="INFO", capacity=10000, echo=True, path=None):
+        self.level = LEVELS[level.upper()] if isinstance(level, str) else int(level)
+        self.echo = echo
+        self.path = path
+        self.buffer = deque(maxlen=capacity)
+        self._queue = None
+        self._writer = None
+        if path and self.level < SILENT:
+            self._queue = queue.SimpleQueue()
+            self._writer = threading.Thread(target=self._write_lines, name="event-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    @classmethod
+    def silent(cls):
+        """Log that drops every event (no buffer, no output, no thread)."""
+        return cls(level=SILENT, capacity=0, echo=False)
+
+    @classmethod
+    def from_config(cls, config, path=None, echo=None):
+        """
+        Builds the log from the optional "event_log" section of config.json.
+
+        Example:
+            "event_log": {"level": "INFO", "echo": true, "jsonl": true, "buffer_size": 10000}
+        """
+        settings = config.get("event_log", {})
+        return cls(
+            level=settings.get("level", "INFO"),
+            capacity=settings.get("buffer_size", 10000),
+            echo=settings.get("echo", True) if echo is None else echo,
+            path=path if settings.get("jsonl", False) else None
+        )
+
+    def enabled(self, level=INFO):
+        return level >= self.level
+
+    def log(self, level, event, **fields):
+        """Records one event if its level passes the threshold."""
+        if level < self.level:
+            return
+        record = {"level": LEVEL_NAMES.get(level, level), "event": event, **fields}
+        self.buffer.append(record)
+        if self.echo:
+            print(format_event(record))
+        if self._queue is not None:
+            self._queue.put(record)
+
+    def debug(self, event, **fields):
+        self.log(DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.log(INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(WARNING, event, **fields)
+
+    def records(self, event=None):
+        """Buffered records (oldest first), optionally only one event type."""
+        return [r for r in self.buffer if event is None or r["event"] == event]
+
+    def _write_lines(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                record = self._queue.get()
+                batch = []
+                while record is not None:
+                    batch.append(json.dumps(record, default=str, ensure_ascii=False))
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    f.write("\n".join(batch) + "\n")
+                    f.flush()
+                if record is None:
+                    return
+
+    def close(self):
+        """Stops the writer thread after it has written every queued record."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            self._queue = None
+            atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
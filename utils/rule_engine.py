@@ -0,0 +1,232 @@
+import re
+import operator
+from functools import lru_cache
+
+import numpy as np
+
+from indicators.divergence import DIVERGENCE_LABELS
+
+# Used when config.json has no "entry_rules": divergence only, like should_enter_trade
+DEFAULT_RULES = {
+    "buy": ["divergence == bullish"],
+    "short": ["divergence == bearish"],
+}
+
+# Comparison operators a rule may use
+OPERATORS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt,
+    ">=": operator.ge, "==": operator.eq, "!=": operator.ne,
+}
+
+# Candle / indicator columns a rule may read
+RULE_COLUMNS = (
+    'open', 'high', 'low', 'close', 'volume',
+    'rsi', 'ema', 'ema_fast', 'ema_slow', 'macd', 'signal', 'histogram',
+    '+DI', '-DI', 'ADX', 'divergence',
+)
+
+# A bar with any of these missing never trades (the pd.isna guard of should_enter_trade)
+REQUIRED_COLUMNS = ('rsi', 'macd', 'signal', 'ADX')
+
+_RULE_PATTERN = re.compile(r"^\s*(\S+)\s*(<=|>=|==|!=|<|>)\s*(\S+)\s*$")
+
+# Compiled entry rules per config dict for per-candle callers (see `cached_entry_rules`)
+MAX_CACHED_RULES = 32
+_RULES_CACHE = {}
+
+
+@lru_cache(maxsize=256)
+def parse_rule(text):
+    """
+    Splits a rule into (left, operator, right) tokens.
+
+    Example:
+        parse_rule("rsi < rsi.oversold") → ('rsi', '<', 'rsi.oversold')
+    """
+    match = _RULE_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"Invalid entry rule '{text}', expected '<operand> <op> <operand>' with op in {list(OPERATORS)}")
+    return match.groups()
+
+
+def _config_value(config, path):
+    node = config
+    for key in path.split("."):
+        if not isinstance(node, dict) or key not in node:
+            return None
+        node = node[key]
+    return node if isinstance(node, (int, float)) and not isinstance(node, bool) else None
+
+
+def _operand(token, other, text, config):
+    """('column', name) or ('value', constant) for one side of a rule."""
+    if token in RULE_COLUMNS:
+        return ('column', token)
+    try:
+        return ('value', float(token))
+    except ValueError:
+        pass
+    value = _config_value(config, token)
+    if value is not None:
+        return ('value', value)
+    if other == 'divergence' and token in DIVERGENCE_LABELS:
+        return ('value', token)
+    raise ValueError(
+        f"Unknown operand '{token}' in entry rule '{text}': expected a column {RULE_COLUMNS}, "
+        f"a number, a numeric config key (e.g. rsi.oversold) or a divergence label"
+    )
+
+
+def compile_rule(text, config):
+    """
+    Resolves one rule against config.json.
+
+    Returns:
+        tuple: (left operand, comparison function, right operand), operands as
+               ('column', name) or ('value', constant)
+
+    Example:
+        compile_rule("rsi < rsi.oversold", config) → (('column', 'rsi'), operator.lt, ('value', 30))
+    """
+    left, op, right = parse_rule(text)
+    lhs = _operand(left, right, text, config)
+    rhs = _operand(right, left, text, config)
+    if lhs[0] == 'value' and rhs[0] == 'value':
+        raise ValueError(f"Entry rule '{text}' compares two constants")
+    if 'divergence' in (left, right) and op not in ("==", "!="):
+        raise ValueError(f"Entry rule '{text}': divergence only supports == and !=")
+    return lhs, OPERATORS[op], rhs
+
+
+def warmed_up(bars):
+    """Boolean mask of the bars where every REQUIRED_COLUMNS value is present."""
+    valid = ~np.isnan(np.asarray(bars[REQUIRED_COLUMNS[0]], dtype=np.float64))
+    for name in REQUIRED_COLUMNS[1:]:
+        valid &= ~np.isnan(np.asarray(bars[name], dtype=np.float64))
+    return valid
+
+
+class EntryRules:
+    """
+    Entry rules compiled once, evaluated as whole-array boolean masks.
+
+    A side fires where every one of its rules holds (an empty list disables it);
+    BUY takes precedence over SHORT on the same bar, and bars with a missing
+    REQUIRED_COLUMNS value never fire.
+
+    Attributes:
+        buy, short (list): Compiled rules, see `compile_rule`
+        columns (tuple): Columns read by the rules
+
+    Example:
+        rules = EntryRules({"buy": ["rsi < rsi.oversold", "macd > signal"], "short": []}, config)
+        signals = rules.signals(bars)    # int8: 1 = buy, -1 = short, 0 = none
+    """
+    __slots__ = ("buy", "short", "columns")
+
+    def __init__(self, rules, config):
+        unknown = set(rules) - {"buy", "short"}
+        if unknown:
+            raise ValueError(f"Unknown entry rule side(s) {sorted(unknown)}, expected 'buy' / 'short'")
+        self.buy = [compile_rule(text, config) for text in rules.get("buy", [])]
+        self.short = [compile_rule(text, config) for text in rules.get("short", [])]
+        columns = {name for rule in self.buy + self.short for kind, name in (rule[0], rule[2]) if kind == 'column'}
+        self.columns = tuple(c for c in RULE_COLUMNS if c in columns)
+
+    @staticmethod
+    def _side_mask(side, values, valid):
+        if not side:
+            return np.zeros(len(valid), dtype=bool)
+        mask = valid.copy()
+        for lhs, compare, rhs in side:
+            left = values[lhs[1]] if lhs[0] == 'column' else lhs[1]
+            right = values[rhs[1]] if rhs[0] == 'column' else rhs[1]
+            mask &= np.asarray(compare(left, right), dtype=bool)
+        return mask
+
+    def masks(self, bars):
+        """
+        Boolean buy / short masks over all bars.
+
+        Parameters:
+            bars (dict): Column arrays (see `frame_to_bars`), including every column in `columns`
+
+        Returns:
+            (np.ndarray[bool], np.ndarray[bool]): buy, short (short excludes buy bars)
+        """
+        values = {}
+        for name in self.columns:
+            if name not in bars:
+                raise KeyError(f"Entry rules read column '{name}', which is missing from the bars")
+            values[name] = bars[name] if name == 'divergence' else np.asarray(bars[name], dtype=np.float64)
+
+        valid = warmed_up(bars)
+        divergence = values.get('divergence')
+        if divergence is not None and not hasattr(divergence, 'dtype'):
+            values['divergence'] = np.asarray(divergence)     # plain list of labels
+
+        buy = self._side_mask(self.buy, values, valid)
+        short = self._side_mask(self.short, values, valid) & ~buy
+        return buy, short
+
+    def signals(self, bars):
+        """Per-bar signal array: 1 = buy, -1 = short, 0 = no signal (int8)."""
+        buy, short = self.masks(bars)
+        signals = np.zeros(len(buy), dtype=np.int8)
+        signals[buy] = 1
+        signals[short] = -1
+        return signals
+
+    def check(self, values):
+        """
+        Evaluates the rules for one candle (live trading).
+
+        Parameters:
+            values (Mapping): Column name → scalar
+
+        Returns:
+            str: 'buy', 'short', or None
+        """
+        for name in REQUIRED_COLUMNS:
+            value = values[name]
+            if value is None or value != value:
+                return None
+        for side, name in ((self.buy, 'buy'), (self.short, 'short')):
+            if side and all(
+                compare(values[lhs[1]] if lhs[0] == 'column' else lhs[1],
+                        values[rhs[1]] if rhs[0] == 'column' else rhs[1])
+                for lhs, compare, rhs in side
+            ):
+                return name
+        return None
+
+
+def entry_rules(config):
+    """Compiles config.json "entry_rules" (DEFAULT_RULES when absent)."""
+    return EntryRules(config.get("entry_rules", DEFAULT_RULES), config)
+
+
+def cached_entry_rules(config):
+    """
+    `entry_rules(config)` compiled once per config dict (live trading, one call per candle).
+
+    The cache keeps a reference to each config, so its id stays unique while cached.
+    A cached dict edited in place is not recompiled: pass a new config dict (or an
+    `EntryRules` built with `entry_rules`) after changing thresholds or rules.
+    """
+    hit = _RULES_CACHE.get(id(config))
+    if hit is None:
+        if len(_RULES_CACHE) >= MAX_CACHED_RULES:
+            _RULES_CACHE.clear()
+        hit = _RULES_CACHE[id(config)] = (config, entry_rules(config))
+    return hit[1]
+
+
+def rule_columns(config):
+    """
+    Columns the configured entry rules read (the engine bars must carry them).
+
+    Example:
+        {"entry_rules": {"buy": ["close > ema"], "short": []}} → ('close', 'ema')
+    """
+    return entry_rules(config).columns
@@ -1,10 +1,30 @@
-import pandas as pd
+import numpy as np
 
-def should_enter_trade(row, rsi, macd_row, dmi_row, divergence, config):
+from utils.rule_engine import REQUIRED_COLUMNS, EntryRules, entry_rules, cached_entry_rules, warmed_up
+
+# Conditions of should_enter_trade as (entry rule, entry-reason label) per side, in
+# entry-reason bit order (engine/ledger.py builds the reason bits and labels from it)
+CONDITION_RULES = {
+    'rsi': {"buy": ("rsi < rsi.oversold", "RSI < oversold"), "short": ("rsi > rsi.overbought", "RSI > overbought")},
+    'macd': {"buy": ("macd > signal", "MACD > Signal"), "short": ("macd < signal", "MACD < Signal")},
+    'di': {"buy": ("+DI > -DI", "+DI > -DI"), "short": ("-DI > +DI", "-DI > +DI")},
+    'adx': {"buy": ("ADX > min_adx_strength", "ADX strong"), "short": ("ADX > min_adx_strength", "ADX strong")},
+    'divergence': {"buy": ("divergence == bullish", "Bullish Divergence"), "short": ("divergence == bearish", "Bearish Divergence")},
+}
+ENTRY_CONDITIONS = tuple(CONDITION_RULES)
+
+
+def should_enter_trade(row, rsi, macd_row, dmi_row, divergence, config, rules=None):
     """
     Determines whether to enter a trade (BUY or SHORT) based on combined indicator logic.
 
-    This function uses:
+    The conditions come from "entry_rules" in config.json (see `utils/rule_engine.py`;
+    divergence only by default). This per-candle form is for live trading; backtests
+    use `entry_signals`, which evaluates the same rules on all bars at once. The rules
+    are compiled once per config dict (`cached_entry_rules`), and only the values
+    they read (plus the warm-up columns) are looked up.
+
+    Conditions available as rules:
     - RSI: for overbought/oversold levels (momentum exhaustion)
     - MACD: for momentum trend confirmation via line crossover
     - DMI: for trend direction and strength using +DI and -DI
@@ -17,18 +37,19 @@ def should_enter_trade(row, rsi, macd_row, dmi_row, divergence, config):
         dmi_row (pd.Series): +DI, -DI, and ADX values
         divergence (str): 'bullish', 'bearish', or ''
         config (dict): Configuration values from config.json
+        rules (EntryRules, optional): Precompiled rules (e.g. `entry_rules(config)` built at startup)
 
     Returns:
         str: 'buy', 'short', or None if no valid trade signal is detected
 
     ----------
-    ✅ BUY signal criteria:
+    ✅ BUY signal criteria (all rules listed):
     - RSI < oversold (e.g., < 30)
     - MACD > Signal line (bullish crossover)
     - +DI > -DI (price rising more strongly than falling)
     - Divergence == 'bullish' (RSI rising while price was falling)
 
-    🔴 SHORT signal criteria:
+    🔴 SHORT signal criteria (all rules listed):
     - RSI > overbought (e.g., > 70)
     - MACD < Signal line (bearish crossover)
     - -DI > +DI (price falling more strongly than rising)
@@ -45,33 +66,84 @@ def should_enter_trade(row, rsi, macd_row, dmi_row, divergence, config):
         +DI = 15, -DI = 28, Divergence = 'bearish'
         → All conditions match → returns 'short'
     """
-    try:
-        adx = dmi_row['ADX']
-        if pd.isna(rsi) or pd.isna(macd_row['macd']) or pd.isna(macd_row['signal']) or pd.isna(adx):
-            return None  # skip if any value missing
-
-        # ---------------- BUY SETUP ----------------
-        if (
-            # rsi < config["rsi"]["oversold"] and
-            # macd_row['macd'] > macd_row['signal'] and
-            # dmi_row['+DI'] > dmi_row['-DI'] and
-            # adx > config["min_adx_strength"] and
-            divergence == 'bullish'
-        ):
-            return 'buy'
-
-        # ---------------- SHORT SETUP ----------------
-        elif (
-            # rsi > config["rsi"]["overbought"] and
-            # macd_row['macd'] < macd_row['signal'] and
-            # dmi_row['-DI'] > dmi_row['+DI'] and
-            # adx > config["min_adx_strength"] and
-            divergence == 'bearish'
-        ):
-            return 'short'
-
-    except Exception as e:
-        print(f"[ERROR in signal logic] {e}")
-        return None
-
-    return None
+    if rules is None:
+        rules = cached_entry_rules(config)
+    values = {'rsi': rsi, 'divergence': divergence}
+    sources = {'macd': macd_row, 'signal': macd_row, '+DI': dmi_row, '-DI': dmi_row, 'ADX': dmi_row}
+    for name in REQUIRED_COLUMNS + rules.columns:
+        if name not in values:
+            values[name] = sources.get(name, row)[name]
+    return rules.check(values)
+
+
+def entry_signals(bars, config):
+    """
+    Vectorized counterpart of `should_enter_trade` for the whole candle history.
+
+    The config "entry_rules" are compiled once into boolean masks over the bar
+    arrays, so the backtest engine never evaluates a rule per candle.
+
+    Parameters:
+        bars (dict): Column arrays with 'rsi', 'macd', 'signal', 'ADX' and every column the rules read
+        config (dict): Configuration values from config.json
+
+    Returns:
+        np.ndarray[int8]: 1 = 'buy', -1 = 'short', 0 = no signal (one value per bar)
+
+    Example:
+        divergence = ['', 'bullish', 'bearish'] with all indicators warmed up
+        → [0, 1, -1]
+    """
+    return entry_rules(config).signals(bars)
+
+
+def condition_bits(bars, config):
+    """
+    Evaluates every entry condition of `should_enter_trade` on all bars at once.
+
+    Bit k of a bar's code is set when ENTRY_CONDITIONS[k] holds for that side, so a
+    strategy that requires a set of conditions fires where (code & mask) == mask.
+    Bars with a missing indicator value get code 0 on both sides and no mask bit.
+
+    Parameters:
+        bars (dict): Column arrays with 'rsi', 'macd', 'signal', '+DI', '-DI', 'ADX' and 'divergence'
+        config (dict): RSI thresholds and min_adx_strength
+
+    Returns:
+        (np.ndarray[uint8], np.ndarray[uint8], np.ndarray[bool]): buy codes, short codes,
+        and the mask of bars where all indicators are warmed up
+
+    Example:
+        RSI 28, MACD > signal, +DI < -DI, ADX 15, bullish divergence
+        → buy code 0b10011 (rsi, macd, divergence), short code 0b00000
+    """
+    valid = warmed_up(bars)
+    codes = {}
+    for side in ('buy', 'short'):
+        code = np.zeros(len(valid), dtype=np.uint8)
+        for k, rules in enumerate(CONDITION_RULES.values()):
+            # one rule per mask (the buy slot of EntryRules just means "fires here")
+            check, _ = EntryRules({"buy": [rules[side][0]]}, config).masks(bars)
+            code |= check.astype(np.uint8) << k
+        codes[side] = code
+    return codes['buy'], codes['short'], valid
+
+
+def condition_checks(values, side, config):
+    """
+    Per-candle counterpart of `condition_bits`: evaluates every entry condition of one side.
+
+    Parameters:
+        values (Mapping): 'rsi', 'macd', 'signal', '+DI', '-DI', 'ADX' and 'divergence' of the candle
+        side (str): 'buy' or 'short'
+        config (dict): RSI thresholds and min_adx_strength
+
+    Returns:
+        list[bool]: One flag per ENTRY_CONDITIONS entry (all False while an indicator is missing)
+
+    Example:
+        RSI 28, MACD > signal, +DI < -DI, ADX 15, bullish divergence, side 'buy'
+        → [True, True, False, False, True]
+    """
+    return [EntryRules({"buy": [rules[side][0]]}, config).check(values) == 'buy'
+            for rules in CONDITION_RULES.values()]
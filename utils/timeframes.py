@@ -0,0 +1,169 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.candle_store import save_frame, open_columns, load_frame
+
+# Timeframe of the engine candles (stored in output/latest/candles)
+BASE_TIMEFRAME = "5min"
+
+# Aggregated timeframes stored next to the base candles: label → minutes (None = whole session)
+TIMEFRAMES = {"15min": 15, "30min": 30, "1H": 60, "3H": 180, "1D": None}
+
+# NSE cash session, exchange wall-clock time; buckets start at the open and end at the close
+SESSION_OPEN = "09:15"
+SESSION_CLOSE = "15:30"
+
+# Columns aggregated like OHLCV candles; every other numeric column is averaged
+PRICE_AGGREGATES = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+_REDUCERS = {"max": np.maximum.reduceat, "min": np.minimum.reduceat, "sum": np.add.reduceat}
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 1440 * NS_PER_MINUTE
+
+
+def _minute_of_day(hhmm):
+    hours, minutes = map(int, hhmm.split(":"))
+    return hours * 60 + minutes
+
+
+def _wall_ns(timestamps):
+    """Wall-clock ns of each candle (exchange local time)."""
+    times = pd.DatetimeIndex(timestamps)
+    if times.tz is not None:
+        times = times.tz_localize(None)
+    return times.as_unit("ns").asi8
+
+
+def session_buckets(timestamps, minutes):
+    """
+    Bucket number of every candle for one timeframe, anchored at the session open.
+
+    Buckets never cross the close, so no bar spans an overnight gap; the last
+    bucket of a day may be shorter (e.g. 1H: 15:15–15:30). Candles outside
+    SESSION_OPEN–SESSION_CLOSE get -1.
+
+    Parameters:
+        timestamps (array-like): Candle times, increasing (tz-aware or exchange local)
+        minutes (int or None): Bucket length in minutes, None for one bucket per session
+
+    Returns:
+        (np.ndarray[int64], np.ndarray[int64]): bucket per candle, and its start as wall-clock ns
+
+    Example:
+        15-minute buckets: 09:15, 09:20, 09:25 → same bucket; 09:30 → next; 15:25 → last of the day
+    """
+    wall = _wall_ns(timestamps)
+    session_open = _minute_of_day(SESSION_OPEN)
+    session_length = _minute_of_day(SESSION_CLOSE) - session_open
+
+    day = wall // NS_PER_DAY
+    minute = (wall % NS_PER_DAY) // NS_PER_MINUTE - session_open
+    if minutes is None:
+        per_day, slot = 1, np.zeros_like(minute)
+    else:
+        per_day, slot = -(-session_length // minutes), minute // minutes
+
+    bucket = day * per_day + slot
+    start = day * NS_PER_DAY + (session_open + slot * (minutes or 0)) * NS_PER_MINUTE
+    outside = (minute < 0) | (minute >= session_length)
+    bucket[outside] = -1
+    start[outside] = -1
+    return bucket, start
+
+
+def aggregate_candles(df, minutes):
+    """
+    Candles aggregated into session-anchored buckets (see `session_buckets`).
+
+    One np.*.reduceat pass per column over the bucket boundaries: open / close take
+    the first / last candle, high / low the extremes, volume the sum, and other
+    numeric columns (indicators) the mean of their non-NaN values, as
+    `resample_trade_segment` does. Text / categorical columns are dropped.
+
+    Parameters:
+        df (pd.DataFrame): Base candles in time order ('timestamp', OHLCV, indicators)
+        minutes (int or None): Bucket length, None for daily bars
+
+    Returns:
+        pd.DataFrame: One row per bucket; 'timestamp' is the bucket start (same timezone
+                      as df), 'first_bar' / 'last_bar' the base candle rows it covers
+
+    Example:
+        aggregate_candles(df, 60)['timestamp'] → 09:15, 10:15, ..., 15:15 for each day
+    """
+    bucket, start = session_buckets(df['timestamp'], minutes)
+    rows = np.flatnonzero(bucket >= 0)
+    if not len(rows):
+        return pd.DataFrame(columns=["timestamp", "first_bar", "last_bar"])
+    bucket = bucket[rows]
+    firsts = np.flatnonzero(np.diff(bucket, prepend=-2))
+    lasts = np.append(firsts[1:], len(rows)) - 1
+
+    tz = getattr(df['timestamp'].dtype, "tz", None)
+    times = pd.DatetimeIndex(start[rows[firsts]].view("M8[ns]"))
+    out = {
+        "timestamp": times.tz_localize(tz) if tz is not None else times,
+        "first_bar": rows[firsts],
+        "last_bar": rows[lasts],
+    }
+    for name in df.columns:
+        if name == 'timestamp' or not pd.api.types.is_numeric_dtype(df[name].dtype):
+            continue
+        values = df[name].to_numpy()[rows]
+        how = PRICE_AGGREGATES.get(name, "mean")
+        if how == "first":
+            out[name] = values[firsts]
+        elif how == "last":
+            out[name] = values[lasts]
+        elif how in _REDUCERS:
+            out[name] = _REDUCERS[how](values, firsts)
+        else:
+            values = values.astype(np.float64)
+            valid = ~np.isnan(values)
+            sums = np.add.reduceat(np.where(valid, values, 0.0), firsts)
+            counts = np.add.reduceat(valid.astype(np.int64), firsts)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[name] = sums / counts                     # NaN where every value is missing
+    return pd.DataFrame(out)
+
+
+def save_timeframes(df, folder, timeframes=TIMEFRAMES):
+    """
+    Precomputes every timeframe of the pyramid and stores each as a candle store.
+
+    Example:
+        save_timeframes(df, "output/latest/timeframes")
+        → timeframes/15min, timeframes/30min, timeframes/1H, timeframes/3H, timeframes/1D
+    """
+    for label, minutes in timeframes.items():
+        save_frame(aggregate_candles(df, minutes), os.path.join(folder, label))
+
+
+def timeframe_rows(store_dir, entry_bar, exit_bar):
+    """
+    Rows of a stored timeframe covering base candles entry_bar .. exit_bar.
+
+    A binary search on the memory-mapped 'first_bar' column; the bucket holding the
+    entry candle is included.
+
+    Returns:
+        slice: Row range for `load_frame(store_dir, rows=...)`
+    """
+    first_bar = open_columns(store_dir, ["first_bar"])[0]["first_bar"]
+    start = max(0, int(np.searchsorted(first_bar, entry_bar, side="right")) - 1)
+    stop = int(np.searchsorted(first_bar, exit_bar, side="right"))
+    return slice(start, max(start, stop))
+
+
+def load_timeframe_segment(folder, timeframe, entry_bar, exit_bar):
+    """
+    Aggregated candles of one trade from the stored pyramid (only those rows are read).
+
+    Example:
+        load_timeframe_segment("output/latest/timeframes", "1H", trade['entry_bar'], trade['exit_bar'])
+    """
+    store_dir = os.path.join(folder, timeframe)
+    return load_frame(store_dir, rows=timeframe_rows(store_dir, int(entry_bar), int(exit_bar)))
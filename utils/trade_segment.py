@@ -4,11 +4,21 @@
 
 import pandas as pd
 
-def get_trade_segment(df, trade):
+from utils.candle_index import CandleIndex, bar_slice
+
+def get_trade_segment(df, trade, index=None):
     """
     Returns the subset of candle dataframe between entry and exit time.
+
+    A positional slice (no copy, no mask over the whole frame): trades from
+    executed_trades.csv carry entry_bar / exit_bar; older trade files are looked up
+    by time in `index` (a CandleIndex over df['timestamp'], built when not given).
     """
-    return df[(df['timestamp'] >= trade['entry_time']) & (df['timestamp'] <= trade['exit_time'])].copy()
+    bars = bar_slice(trade)
+    if bars is None:
+        index = index if index is not None else CandleIndex(df['timestamp'])
+        bars = index.trade_slice(trade)
+    return df.iloc[bars]
 
 def determine_indicators_used(trade):
     """
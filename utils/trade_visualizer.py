@@ -1,7 +1,11 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 import os
 
+from utils.candle_store import read_meta, load_frame
+from utils.candle_index import CandleIndex
+
 
 def localize_or_convert(series, timezone="Asia/Kolkata"):
     if series.dt.tz is None:
@@ -18,17 +22,48 @@ def localize_timestamp(ts, timezone="Asia/Kolkata"):
         return ts.tz_convert(timezone)
 
 
+def load_stop_loss(candles_csv, n_bars, stop_loss=None):
+    """
+    Returns the trailing SL array (one float per candle, NaN when flat).
+
+    Parameters:
+        candles_csv (str): Candle file; stop_loss.npy next to it is used when no array is given
+        n_bars (int): Number of candle rows the array must match
+        stop_loss (np.ndarray or str, optional): Array from run_backtest, or a path to a .npy file
+
+    Returns:
+        np.ndarray or None: None when no SL trail is available
+    """
+    if stop_loss is None:
+        stop_loss = os.path.join(os.path.dirname(candles_csv), "stop_loss.npy")
+        if not os.path.exists(stop_loss):
+            return None
+    if isinstance(stop_loss, str):
+        stop_loss = np.load(stop_loss, mmap_mode='r')
+    if len(stop_loss) != n_bars:
+        return None
+    return np.asarray(stop_loss, dtype=np.float64)
+
+
 def visualize_trades(
     candles_csv,
     trades_csv,
     output_path,
     indicators_to_plot=['rsi', 'macd', 'dmi', 'divergence'],
     start_time=None,
-    end_time=None
+    end_time=None,
+    stop_loss=None
 ):
-    df = pd.read_csv(candles_csv)
+    # Candles: memory-mapped store saved next to the CSV by main.py, CSV as fallback
+    store_dir = os.path.join(os.path.dirname(candles_csv), "candles")
+    df = load_frame(store_dir) if read_meta(store_dir) else pd.read_csv(candles_csv)
     trades = pd.read_csv(trades_csv)
 
+    # Trailing SL per candle (stop_loss.npy saved next to the candles by main.py)
+    sl_trail = load_stop_loss(candles_csv, len(df), stop_loss)
+    if sl_trail is not None:
+        df['stop_loss'] = sl_trail
+
     # -----------------------------
     # 1. Timezone normalization
     # -----------------------------
@@ -43,15 +78,18 @@ def visualize_trades(
     # -----------------------------
     # 2. Filter Time Range
     # -----------------------------
+    # Candles stay positional (slices of `candles`), so trade bar indices keep pointing at them
+    candles = df
+    index = CandleIndex(candles['timestamp'])
     if start_time:
         start_time = localize_timestamp(start_time)
-        df = df[df['timestamp'] >= start_time]
         trades = trades[trades['entry_time'] >= start_time]
 
     if end_time:
         end_time = localize_timestamp(end_time)
-        df = df[df['timestamp'] <= end_time]
         trades = trades[trades['exit_time'] <= end_time]
+    df = candles.iloc[index.span(start_time or None, end_time or None)]
+    entry_bars, exit_bars = index.trade_bars(trades)
 
     # -----------------------------
     # 3. Trade Count
@@ -95,7 +133,7 @@ def visualize_trades(
     # -----------------------------
     # 6. Entry / Exit Markers + SL Breaches
     # -----------------------------
-    for _, trade in trades.iterrows():
+    for (_, trade), entry_bar, exit_bar in zip(trades.iterrows(), entry_bars, exit_bars):
         hover_text = (
             f"{trade['direction'].upper()} ENTRY<br>"
             f"RSI: {trade['rsi']}<br>"
@@ -131,7 +169,9 @@ def visualize_trades(
         ))
 
         # --- SL Breach Visualization ---
-        segment_df = df[(df['timestamp'] >= trade['entry_time']) & (df['timestamp'] <= trade['exit_time'])]
+        if 'stop_loss' not in df.columns:
+            continue
+        segment_df = candles.iloc[entry_bar:exit_bar + 1]
 
         if trade['direction'] == 'buy':
             breach_points = segment_df[segment_df['close'] <= segment_df['stop_loss']]